@@ -5,8 +5,13 @@ import json
 import argparse
 import itertools
 import pandas as pd
-from ab_utils import load_ab_data
-from utils import get_max_value, is_successful_swap, VALUES, format_value
+import numpy as np
+import pyarrow.compute as pc
+from ab_utils import pivot_ab
+from utils import get_max_values, VALUES, format_value
+from swap_store import read_table
+from child_tables import explode_list
+from asset_data import NATIVE_SOURCE
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -21,45 +26,50 @@ def get_program_args():
     return args.parse_args()
 
 args = get_program_args()
-data = load_ab_data(args.path)
+table = read_table(args.path, [
+    'id', 'api', 'side', 'maker_token', 'taker_token', 'fill_value', 'success',
+    'gas_used', 'gas_price', 'protocol_fee', 'eth_balance', 'sources',
+])
 tokens = args.tokens.split(',') if args.tokens else None
-print(f'Loaded {len(data)} data items')
 
-costs_by_url_by_value = {}
-urls = sorted(set(list(itertools.chain(*(d.keys() for d in data)))))
-for d in data:
-    if not all(is_successful_swap(swap) for swap in d.values()):
-        continue
-    costs = {}
-    for url, swap in d.items():
-        metadata = swap['metadata']
-        if tokens:
-            if metadata['makerToken'] not in tokens \
-                or metadata['takerToken'] not in tokens:
-                continue
-        if args.no_native:
-            if any(s['name'] == '0x' for s in swap['sources']):
-                continue
-        if args.forwarder:
-            if metadata['takerToken'] != 'ETH':
-                continue
-        fees = 0
-        if args.fees:
-            # Can't differentiate fees from assets in the following scenarios.
-            if metadata['makerToken'] == 'ETH':
-                continue
-            if metadata['side'] == 'buy' and metadata['takerToken'] == 'ETH':
-                continue
-            # Express fees in units of gas
-            fees = int(swap['protocolFee']) - int(metadata['swapResult']['ethBalance'])
-            fees = max(0, fees // int(swap['gasPrice']))
-        costs[url] = gas = metadata['swapResult']['gasUsed'] + fees
-    if len(urls) == len(list(costs.keys())):
-        value = get_max_value(swap)
-        for url in costs:
-            costs_by_url_by_value[url] = costs_by_url_by_value.get(url, {})
-            costs_by_url_by_value[url][value] = costs_by_url_by_value[url].get(value, [])
-            costs_by_url_by_value[url][value].append(costs[url])
+# A group counts if every one of its swaps succeeded and passes the filters.
+valid = table['success'].to_numpy(zero_copy_only=False)
+maker_tokens = table['maker_token'].to_numpy(zero_copy_only=False)
+taker_tokens = table['taker_token'].to_numpy(zero_copy_only=False)
+if tokens:
+    valid = valid & np.isin(maker_tokens, tokens) & np.isin(taker_tokens, tokens)
+if args.no_native:
+    swaps, _, sources = explode_list(table, 'sources')
+    is_native = pc.equal(pc.struct_field(sources, 'name'), NATIVE_SOURCE).to_numpy(zero_copy_only=False)
+    valid = valid & ~np.isin(np.arange(table.num_rows), swaps[is_native])
+if args.forwarder:
+    valid = valid & (taker_tokens == 'ETH')
+fees = np.zeros(table.num_rows, dtype=np.int64)
+if args.fees:
+    # Can't differentiate fees from assets in the following scenarios.
+    valid = valid & (maker_tokens != 'ETH') \
+        & ~((table['side'].to_numpy(zero_copy_only=False) == 'buy') & (taker_tokens == 'ETH'))
+    # Express fees in units of gas, with exact integer division of wei.
+    fees = np.array([
+        max(0, (int(fee) - int(balance)) // int(price)) if ok else 0
+            for ok, fee, balance, price in zip(
+                valid,
+                table['protocol_fee'].to_pylist(),
+                table['eth_balance'].to_pylist(),
+                table['gas_price'].to_pylist(),
+            )
+    ], dtype=np.int64)
+data, urls, incomplete = pivot_ab(
+    table,
+    { 'valid': valid, 'cost': table['gas_used'].to_numpy(zero_copy_only=False) + fees },
+    { 'value': get_max_values(table['fill_value'].to_numpy()) },
+)
+num_groups = len(data) + len(incomplete)
+print(f'Loaded {num_groups} data items')
+
+data = data[data[[f'valid_{url}' for url in urls]].all(axis=1)]
+costs_by_url_by_value = data.groupby('value')[[f'cost_{url}' for url in urls]].mean()
+counts_by_value = data['value'].value_counts()
 
 sns.catplot(
     x='value',
@@ -69,8 +79,7 @@ sns.catplot(
             [
                 url,
                 max_value,
-                sum(costs_by_url_by_value[url].get(max_value, [])) /
-                    (len(costs_by_url_by_value[url].get(max_value, [])) or 1)
+                costs_by_url_by_value[f'cost_{url}'].get(max_value, 0)
             ] for url, (min_value, max_value) in itertools.product(urls, VALUES)
         ],
         columns=['url', 'value', 'gas used'],
@@ -80,14 +89,11 @@ sns.catplot(
     legend_out=False
 )
 
-counts_by_value = {
-    max_value: len(costs_by_url_by_value.get(urls[0], {}).get(max_value, [])) for (min_value, max_value) in VALUES
-}
 plt.xticks(
     list(range(len(VALUES))),
-    [f'<{format_value(max_value)} ({counts_by_value[max_value]})' for (min_value, max_value) in VALUES],
+    [f'<{format_value(max_value)} ({counts_by_value.get(max_value, 0)})' for (min_value, max_value) in VALUES],
 )
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y / 1e3)}K'))
-plt.title(f'A-B average gas used by value ({len(data)} swaps)')
+plt.title(f'A-B average gas used by value ({num_groups} swaps)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.075)
 plt.show()
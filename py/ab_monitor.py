@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import time
+from incremental import read_complete_lines
+from swap_store import flatten_swap
+from utils import parse_json, get_max_value
+from sequential import ALPHA, TAU, create_test, update_test, is_decided
+
+# Paired differences (api - baseline) tested per value bucket.
+METRICS = ['price', 'revert', 'gas']
+# Null variances of metrics that have one: price is a sign test of ±1s.
+VARIANCES = { 'price': 1.0 }
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('path', type=str, help='A-B output file being written by `yarn start-ab`')
+    args.add_argument('--output', '-o', type=str, help='JSON file to write decisions to')
+    args.add_argument('--apis', type=int, default=2, help='number of apis in each A-B group')
+    args.add_argument('--alpha', type=float, default=ALPHA)
+    args.add_argument('--tau', type=float, default=TAU)
+    args.add_argument('--max-pairs', type=int, help='also stop a bucket after this many pairs')
+    args.add_argument('--max-pending', type=int, default=10000, help='lines to wait for the rest of an A-B group before dropping it')
+    args.add_argument('--interval', type=float, default=30, help='seconds between polls')
+    args.add_argument('--once', action='store_true', help='exit after reading the file once')
+    args.add_argument('--exit-when-decided', action='store_true', help='exit once every bucket is decided')
+    return args.parse_args()
+
+def get_row(swap):
+    row = flatten_swap(swap)
+    price = float('nan')
+    if row['success'] and row['sold_amount']:
+        price = float(row['bought_amount']) / float(row['sold_amount'])
+    return {
+        'api': row['api'],
+        'value': get_max_value(swap),
+        'success': row['success'],
+        'reverted': row['reverted'],
+        'price': price,
+        'gas': row['gas_used'],
+    }
+
+def get_differences(base, row):
+    diffs = { 'revert': int(row['reverted']) - int(base['reverted']) }
+    if base['success'] and row['success']:
+        diffs['gas'] = row['gas'] - base['gas']
+        # Sign test: which api got the better price, ignoring ties.
+        if row['price'] != base['price']:
+            diffs['price'] = 1 if row['price'] > base['price'] else -1
+    return diffs
+
+def evict_pending(state):
+    # Drops groups still missing an api's result `--max-pending` lines after
+    # their first one, e.g. because that api stopped answering. Groups are
+    # kept in the order they were first seen, so the oldest come first.
+    pending = state['pending']
+    while len(pending):
+        id = next(iter(pending))
+        if state['lines'] - pending[id]['line'] <= args.max_pending:
+            break
+        del pending[id]
+        state['evicted'] += 1
+
+def read_new_pairs(state):
+    # Returns {(bucket, api): {metric: [differences]}} for A-B groups completed
+    # by lines appended since the last call.
+    batch = {}
+    with open(args.path, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size
+        for offset, line in read_complete_lines(f, state['offset'], end):
+            state['offset'] = offset + len(line) + 1
+            try:
+                swap = parse_json(line)
+            except ValueError:
+                continue
+            state['lines'] += 1
+            evict_pending(state)
+            id = swap['metadata']['id']
+            group = state['pending'].setdefault(id, { 'line': state['lines'], 'rows': {} })['rows']
+            row = get_row(swap)
+            group[row['api']] = row
+            if len(group) < args.apis:
+                continue
+            del state['pending'][id]
+            apis = sorted(group)
+            base = group[apis[0]]
+            for api in apis[1:]:
+                for bucket in ['all', str(base['value'])]:
+                    diffs = batch.setdefault((bucket, f'{api} - {apis[0]}'), {})
+                    for metric, diff in get_differences(base, group[api]).items():
+                        diffs.setdefault(metric, []).append(diff)
+    return batch
+
+def update_decisions(state, batch):
+    for (bucket, comparison), diffs in batch.items():
+        tests = state['buckets'].setdefault(bucket, {}).setdefault(comparison, {
+            'pairs': 0,
+            **{ metric: create_test() for metric in METRICS },
+        })
+        tests['pairs'] += len(diffs['revert'])
+        for metric in METRICS:
+            update_test(tests[metric], diffs.get(metric, []), args.tau, VARIANCES.get(metric))
+
+def get_decisions(state):
+    buckets = {}
+    for bucket, comparisons in sorted(state['buckets'].items(), key=lambda b: -1 if b[0] == 'all' else float(b[0])):
+        buckets[bucket] = {}
+        for comparison, tests in comparisons.items():
+            decided = all(is_decided(tests[metric], args.alpha) for metric in METRICS)
+            exhausted = args.max_pairs is not None and tests['pairs'] >= args.max_pairs
+            buckets[bucket][comparison] = {
+                'pairs': tests['pairs'],
+                'decided': decided,
+                'done': decided or exhausted,
+                'metrics': {
+                    metric: {
+                        'n': tests[metric]['n'],
+                        'mean': tests[metric]['mean'],
+                        'p': tests[metric]['p'],
+                        'decided': is_decided(tests[metric], args.alpha),
+                    } for metric in METRICS
+                },
+            }
+    return {
+        'path': args.path,
+        'offset': state['offset'],
+        'pending': len(state['pending']),
+        'evicted': state['evicted'],
+        'alpha': args.alpha,
+        'buckets': buckets,
+        'done': len(buckets) > 0 and all(
+            c['done'] for comparisons in buckets.values() for c in comparisons.values()
+        ),
+    }
+
+def write_decisions(decisions):
+    with open(args.output + '.tmp', 'w') as f:
+        json.dump(decisions, f, indent=2)
+    os.replace(args.output + '.tmp', args.output)
+
+args = get_program_args()
+state = { 'offset': 0, 'lines': 0, 'pending': {}, 'evicted': 0, 'buckets': {} }
+while True:
+    update_decisions(state, read_new_pairs(state))
+    decisions = get_decisions(state)
+    if args.output:
+        write_decisions(decisions)
+    for bucket, comparisons in decisions['buckets'].items():
+        for comparison, c in comparisons.items():
+            ps = ', '.join(f'{m} p={c["metrics"][m]["p"]:.3g}' for m in METRICS)
+            status = 'decided' if c['decided'] else 'done' if c['done'] else 'undecided'
+            print(f'{bucket} {comparison}: {c["pairs"]} pairs, {ps} ({status})')
+    if decisions['evicted']:
+        print(f'Dropped {decisions["evicted"]} incomplete A-B groups ({decisions["pending"]} still pending)')
+    if args.once or (args.exit_when_decided and decisions['done']):
+        break
+    time.sleep(args.interval)
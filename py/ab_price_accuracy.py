@@ -3,10 +3,11 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import json
 import argparse
-import itertools
 import pandas as pd
-from ab_utils import load_ab_data
-from utils import VALUES, is_successful_swap, get_max_value, format_value
+from ab_utils import get_ab_swaps, get_api_names
+from utils import VALUES, is_successful_swap, get_max_values, format_value
+from swap_store import read_table
+from prices import divide
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -17,25 +18,24 @@ def get_program_args():
     return args.parse_args()
 
 args = get_program_args()
-data = [d for d in load_ab_data(args.path) if len(list(d.keys())) > 1]
-print(f'Loaded {len(data)} data items')
+table, num_groups = get_ab_swaps(
+    read_table(args.path, ['id', 'api', 'fill_value', 'buy_amount', 'bought_amount']),
+    min_apis=2,
+)
+print(f'Loaded {num_groups} data items')
 
-urls = sorted(set(itertools.chain(*(d.keys() for d in data))))
+api_names = get_api_names(table['api'].to_pylist())
+urls = sorted(api_names.values())
 
 sns.catplot(
     x='swap value',
     y='accuracy',
     hue='url',
-    data=pd.DataFrame(
-        [
-            [
-                url,
-                float(d[url]['metadata']['swapResult']['boughtAmount'])/float(d[url]['buyAmount']) if d.get(url) else None,
-                get_max_value(d[url]) if d.get(url) else None,
-            ] for url, d in itertools.product(urls, data)
-        ],
-        columns=['url', 'accuracy', 'swap value'],
-    ),
+    data=pd.DataFrame({
+        'url': [api_names[a] for a in table['api'].to_pylist()],
+        'accuracy': divide(table['bought_amount'], table['buy_amount']),
+        'swap value': get_max_values(table['fill_value'].to_numpy()),
+    }),
     kind='bar',
     errcolor='black',
     errwidth=1,
@@ -49,6 +49,6 @@ for t, url in zip(plt.gca().get_legend().texts, urls):
     t.set_text(url)
 plt.xticks(list(range(len(VALUES))), [f'< {format_value(max_value)}' for min_value, max_value in VALUES])
 
-plt.title(f'A-B price accuracy time by swap value ({len(data)} swaps)')
+plt.title(f'A-B price accuracy time by swap value ({num_groups} swaps)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
 plt.show()
@@ -4,12 +4,11 @@ import seaborn as sns
 import json
 import argparse
 import itertools
-import decimal
-from decimal import Decimal
-from ab_utils import load_ab_data
-from utils import is_successful_swap
+import pandas as pd
+from ab_utils import pivot_ab, get_valid_swaps, get_ab_edges, get_edge_stops
+from swap_store import read_table
+from prices import get_quoted_prices
 
-decimal.setcontext(decimal.Context(prec=64))
 sns.set(color_codes=True)
 sns.set_palette('muted')
 
@@ -22,60 +21,28 @@ def get_program_args():
     return args.parse_args()
 args = get_program_args()
 
-def get_quote_price(swap):
-    return float(Decimal(swap['buyAmount']) / Decimal(swap['sellAmount']))
-
-def are_valid_swaps(swaps):
-    if not all(is_successful_swap(s) for s in swaps):
-        return False
-    if args.buys and any(s['metadata']['side'] != 'buy' for s in swaps):
-        return False
-    if args.sells and any(s['metadata']['side'] != 'sell' for s in swaps):
-        return False
-    tokens = args.tokens.split(',') if len(args.tokens) else []
-    if len(tokens) > 0 and any(\
-        s['metadata']['makerToken'] not in tokens or \
-        s['metadata']['takerToken'] not in tokens \
-        for s in swaps):
-        return False
-    return True
-
-data = [d for d in load_ab_data(args.path) if are_valid_swaps(d.values())]
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, ['id', 'api', 'success', 'side', 'maker_token', 'taker_token', 'buy_amount', 'sell_amount'])
+data, urls, incomplete = pivot_ab(table, {
+    'valid': get_valid_swaps(table, args.buys, args.sells, args.tokens),
+    'price': get_quoted_prices(table),
+})
+data = data[data[[f'valid_{url}' for url in urls]].all(axis=1)]
+print(f'Loaded {len(data)} data items ({len(incomplete)} incomplete A-B groups)')
 
 BPS_STOPS = [1, 5, 10, 50, 100, 1000]
 
-count_by_stop_by_url = {}
-for d in data:
-    best_swap_url = max(d.keys(), key=lambda k: get_quote_price(d[k]))
-    worst_swap_url = min(d.keys(), key=lambda k: get_quote_price(d[k]))
-    if best_swap_url == worst_swap_url:
-        continue
-    best_swap = d[best_swap_url]
-    worst_swap = d[worst_swap_url]
-    best_price = get_quote_price(best_swap)
-    worst_price = get_quote_price(worst_swap)
-    bps = (best_price - worst_price) / worst_price * 1e4
-    stop = None
-    for s in BPS_STOPS:
-        if bps < s:
-            break
-        stop = s
-    if stop is None:
-        continue
-    count_by_stop_by_url[stop] = count_by_stop_by_url.get(stop, {})
-    count_by_stop_by_url[stop][best_swap_url] = count_by_stop_by_url[stop].get(best_swap_url, 0)
-    count_by_stop_by_url[stop][worst_swap_url] = count_by_stop_by_url[stop].get(worst_swap_url, 0)
-    count_by_stop_by_url[stop][best_swap_url] += 1
+edges = get_ab_edges(data, 'price', urls)
+edges['stop'] = get_edge_stops(edges['bps'].to_numpy(), BPS_STOPS)
+edges = edges[edges['stop'].notna()].astype({ 'stop': int })
+count_by_stop_by_url = pd.crosstab(edges['stop'], edges['best']).reindex(columns=urls, fill_value=0)
 
-stops = sorted(list(count_by_stop_by_url.keys()))
-totals_by_stop = { stop: sum(count_by_stop_by_url[stop].values()) for stop in stops }
+stops = list(count_by_stop_by_url.index)
+totals_by_stop = { stop: int(count_by_stop_by_url.loc[stop].sum()) for stop in stops }
 max_total = max(totals_by_stop.values())
-urls = sorted(list(list(count_by_stop_by_url.values())[0].keys()))
 prev_ys = [0 for d in stops]
 xs = list(range(len(stops)))
 for url in urls:
-    ys = [count_by_stop_by_url[stop].get(url, 0) / totals_by_stop[stop] for stop in stops]
+    ys = [count_by_stop_by_url.loc[stop, url] / totals_by_stop[stop] for stop in stops]
     widths = [max(totals_by_stop[stop] / max_total, 0.025) for stop in stops]
     plt.bar(xs, ys, bottom=prev_ys, label=url, width=widths)
     prev_ys = [py + y for py, y in zip(prev_ys, ys)]
@@ -5,12 +5,11 @@ import json
 import argparse
 import itertools
 import pandas as pd
-import decimal
-from decimal import Decimal
-from ab_utils import load_ab_data
-from utils import is_successful_swap, format_value
+from ab_utils import pivot_ab, get_valid_swaps, get_ab_edges
+from utils import format_value
+from swap_store import read_table
+from prices import get_realized_prices
 
-decimal.setcontext(decimal.Context(prec=64))
 sns.set(color_codes=True)
 sns.set_palette('muted')
 
@@ -24,69 +23,45 @@ def get_program_args():
     return args.parse_args()
 args = get_program_args()
 
-def get_realized_price(swap):
-    result = swap['metadata']['swapResult']
-    if args.adjusted:
-        if swap['metadata']['side'] == 'sell':
-            bought = Decimal(result['adjustedBoughtAmountUsd'])
-            sold = Decimal(result['soldAmountUsd'])
-        else:
-            bought = Decimal(result['boughtAmountUsd'])
-            sold = Decimal(result['adjustedSoldAmountUsd'])
-    else:
-        bought = Decimal(result['boughtAmount'])
-        sold = Decimal(result['soldAmount'])
-    return float(bought / sold)
-
-def are_valid_swaps(swaps):
-    if not all(is_successful_swap(s) for s in swaps):
-        return False
-    if args.buys and any(s['metadata']['side'] != 'buy' for s in swaps):
-        return False
-    if args.sells and any(s['metadata']['side'] != 'sell' for s in swaps):
-        return False
-    tokens = args.tokens.split(',') if len(args.tokens) else []
-    if len(tokens) > 0 and any(\
-        s['metadata']['makerToken'] not in tokens or \
-        s['metadata']['takerToken'] not in tokens \
-        for s in swaps):
-        return False
-    return True
-
-data = [d for d in load_ab_data(args.path) if are_valid_swaps(d.values())]
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, [
+    'id', 'api', 'success', 'side', 'maker_token', 'taker_token',
+    'fill_value',
+    'bought_amount',
+    'sold_amount',
+    'bought_amount_usd',
+    'sold_amount_usd',
+    'adjusted_bought_amount_usd',
+    'adjusted_sold_amount_usd',
+])
+data, urls, incomplete = pivot_ab(
+    table,
+    {
+        'valid': get_valid_swaps(table, args.buys, args.sells, args.tokens),
+        'price': get_realized_prices(table, args.adjusted),
+    },
+    { 'fill_value': table['fill_value'].to_numpy() },
+)
+data = data[data[[f'valid_{url}' for url in urls]].all(axis=1)]
+print(f'Loaded {len(data)} data items ({len(incomplete)} incomplete A-B groups)')
 
-urls = set()
-rows = []
-for d in data:
-    best_swap_url = max(d.keys(), key=lambda k: get_realized_price(d[k]))
-    worst_swap_url = min(d.keys(), key=lambda k: get_realized_price(d[k]))
-    if best_swap_url == worst_swap_url:
-        continue
-    best_swap = d[best_swap_url]
-    worst_swap = d[worst_swap_url]
-    best_price = get_realized_price(best_swap)
-    worst_price = get_realized_price(worst_swap)
-    bps = (best_price - worst_price) / worst_price * 1e4
-    if bps < 1:
-        continue
-    rows.append([best_swap_url, bps, float(best_swap['metadata']['fillValue'])])
-    urls.add(best_swap_url)
-rows = sorted(rows, key=lambda r: r[0])
+edges = get_ab_edges(data, 'price', urls)
+edges = edges[edges['bps'] >= 1]
+rows = pd.DataFrame({
+    'api': edges['best'],
+    'bps': edges['bps'],
+    'fill size': data.loc[edges.index, 'fill_value'],
+}).sort_values('api', kind='stable')
 
 sns.scatterplot(
     x='fill size',
     y='bps',
     hue='api',
-    data=pd.DataFrame(
-        rows,
-        columns=['api', 'bps', 'fill size'],
-    ),
+    data=rows,
 )
 
 for t in plt.gca().get_legend().texts[1:]:
     url = t.get_text()
-    t.set_text( '%s - %d%%' % (url, sum(1 for r in rows if r[0] == url) * 100 / len(rows)))
+    t.set_text( '%s - %d%%' % (url, (rows['api'] == url).sum() * 100 / len(rows)))
 
 plt.yscale('log')
 # plt.xscale('log')
@@ -5,8 +5,9 @@ import json
 import argparse
 import itertools
 import pandas as pd
-from ab_utils import load_ab_data
-from utils import get_min_delay, is_successful_swap
+from ab_utils import get_ab_swaps, get_api_names
+from utils import get_min_delays
+from swap_store import read_table
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -17,23 +18,19 @@ def get_program_args():
     return args.parse_args()
 
 args = get_program_args()
-data = load_ab_data(args.path)
-print(f'Loaded {len(data)} data items')
+table, num_groups = get_ab_swaps(read_table(args.path, ['id', 'api', 'fill_delay', 'success']))
+print(f'Loaded {num_groups} data items')
 
-counts_by_delay_by_url = {}
-urls = set()
-for d in data:
-    for url, swap in d.items():
-        delay = get_min_delay(swap)
-        counts_by_delay_by_url[delay] = counts_by_delay_by_url.get(delay, {})
-        counts_by_delay_by_url[delay][url] = \
-            counts_by_delay_by_url[delay].get(url, { 'reverts': 0, 'total': 0 })
-        if not is_successful_swap(swap):
-            counts_by_delay_by_url[delay][url]['reverts'] += 1
-            urls.add(url)
-        counts_by_delay_by_url[delay][url]['total'] += 1
-urls = sorted(urls)
-delays = sorted(list(counts_by_delay_by_url.keys()))
+api_names = get_api_names(table['api'].to_pylist())
+swaps = pd.DataFrame({
+    'url': [api_names[a] for a in table['api'].to_pylist()],
+    'delay': get_min_delays(table['fill_delay'].to_numpy()),
+    'reverted': ~table['success'].to_numpy(zero_copy_only=False),
+})
+counts_by_delay_by_url = swaps.groupby(['delay', 'url'])['reverted'].agg(reverts='sum', total='size')
+# Only apis that reverted at all are plotted.
+urls = sorted(swaps['url'][swaps['reverted']].unique())
+delays = sorted(swaps['delay'].unique())
 
 sns.catplot(
     x='delay',
@@ -43,7 +40,7 @@ sns.catplot(
             [
                 url,
                 min_delay,
-                counts_by_delay_by_url[min_delay][url]['reverts'] / counts_by_delay_by_url[min_delay][url]['total'],
+                counts_by_delay_by_url.loc[(min_delay, url), 'reverts'] / counts_by_delay_by_url.loc[(min_delay, url), 'total'],
             ] for url, min_delay in itertools.product(urls, delays)
         ],
         columns=['url', 'delay', 'revert rate'],
@@ -53,15 +50,12 @@ sns.catplot(
     legend_out=False
 )
 
-counts_by_delay = {
-    delay: sum(c['total'] for c in counts_by_delay_by_url[delay].values())
-        for delay in counts_by_delay_by_url.keys()
-}
+counts_by_delay = counts_by_delay_by_url['total'].groupby('delay').sum()
 plt.xticks(
     list(range(len(delays))),
     [f'{min_delay}s ({counts_by_delay[min_delay]})' for min_delay in delays],
 )
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y * 100)}%'))
-plt.title(f'A-B revert rate by delay ({len(data)} swaps)')
+plt.title(f'A-B revert rate by delay ({num_groups} swaps)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.075)
 plt.show()
@@ -3,10 +3,13 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import json
 import argparse
-import itertools
-import pandas as pd
-from ab_utils import load_ab_data
-from utils import get_min_delay, is_successful_swap
+import numpy as np
+import pyarrow.compute as pc
+from swap_store import read_table
+from aggregate import get_columns, get_revert_rates, complete_revert_rates, explode
+from source_sets import build_source_sets
+from attribution import get_attribution
+from ab_utils import get_latest_swaps
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -14,55 +17,44 @@ sns.set_palette('muted')
 def get_program_args():
     args = argparse.ArgumentParser()
     args.add_argument('path', type=str)
+    args.add_argument('--weighted', action='store_true', help='count swaps towards each of their sources by proportion instead of fully')
     return args.parse_args()
 
 args = get_program_args()
-data = load_ab_data(args.path)
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, ['id', *get_columns(['source', 'api'], 'failed')])
+table = table.filter(get_latest_swaps(table))
+num_groups = pc.count_distinct(table['id']).as_py()
+print(f'Loaded {num_groups} data items')
 
-counts_by_source_by_url = {}
-urls = set()
-for d in data:
-    for url, swap in d.items():
-        for source in swap['sources']:
-            source = source['name']
-            counts_by_source_by_url[source] = counts_by_source_by_url.get(source, {})
-            counts_by_source_by_url[source][url] = \
-                counts_by_source_by_url[source].get(url, { 'reverts': 0, 'total': 0 })
-            if not is_successful_swap(swap):
-                counts_by_source_by_url[source][url]['reverts'] += 1
-                urls.add(url)
-            counts_by_source_by_url[source][url]['total'] += 1
-urls = sorted(urls)
-for counts_by_url in counts_by_source_by_url.values():
-    for url in urls:
-        counts_by_url[url] = counts_by_url.get(url, { 'reverts': 0, 'total': 0 })
-sources = sorted(list(s for s in counts_by_source_by_url.keys()))
+urls = sorted(explode(table, 'api')['api'].unique())
+if args.weighted:
+    source_sets = build_source_sets(table)
+    failed = ~table['success'].to_numpy(zero_copy_only=False)
+    counts_by_source = get_attribution(source_sets, failed).set_index('source')['weight']
+    rates = get_attribution(
+        source_sets,
+        failed,
+        np.searchsorted(urls, table['api'].to_numpy(zero_copy_only=False)),
+        urls,
+    ).rename(columns={ 'group': 'api', 'mean': 'revert rate', 'weight': 'total' })
+else:
+    counts_by_source = get_revert_rates(table, ['source'], 'failed').set_index('source')['total']
+    rates = get_revert_rates(table, ['api', 'source'], 'failed')
+sources = list(counts_by_source.index)
+rates = complete_revert_rates(rates, { 'api': urls, 'source': sources })
 
 sns.catplot(
     x='source',
     y='revert rate',
     hue='url',
-    data=pd.DataFrame([
-            [
-                url,
-                source,
-                counts_by_source_by_url[source][url]['reverts'] / max(1, counts_by_source_by_url[source][url]['total']),
-            ] for url, source in itertools.product(urls, sources)
-        ],
-        columns=['url', 'source', 'revert rate'],
-    ),
+    data=rates.rename(columns={ 'api': 'url' })[['url', 'source', 'revert rate']],
     kind='bar',
     legend=True,
     legend_out=False
 )
 
-counts_by_source = {
-    source: sum(c['total'] for c in counts_by_source_by_url[source].values())
-        for source in counts_by_source_by_url.keys()
-}
-plt.xticks(list(range(len(sources))), [f'{s} ({counts_by_source[s]})' for s in sources])
+plt.xticks(list(range(len(sources))), [f'{s} ({counts_by_source[s]:.0f})' for s in sources])
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y * 100)}%'))
-plt.title(f'A-B revert rate by (included) source ({len(data)} swaps)')
+plt.title(f'A-B revert rate by ({"weighted" if args.weighted else "included"}) source ({num_groups} swaps)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.075)
 plt.show()
@@ -1,16 +1,16 @@
-import json
+import numpy as np
+import pandas as pd
+from utils import iter_data
+
+AB_FIELDS = ['metadata.id', 'metadata.api', 'metadata.apiURL']
 
 def get_swap_url(swap):
     return swap['metadata'].get('api', None) or swap['metadata'].get('apiURL')
 
-def load_ab_data(path):
-    swaps = []
-    with open(path) as f:
-        for line in f.readlines():
-            try:
-                swaps.append(json.loads(line))
-            except:
-                pass
+def load_ab_data(path, predicate=None, fields=None):
+    if fields is not None:
+        fields = [*AB_FIELDS, *fields]
+    swaps = list(iter_data(path, predicate=predicate, fields=fields))
     rewrite_urls(swaps)
     swaps_by_id_by_url = {}
     for swap in swaps:
@@ -38,3 +38,91 @@ def find_common_prefix(urls):
         if all(u.startswith(prefix) for u in urls):
             return prefix
     return ''
+
+def get_api_names(apis):
+    # Strips the common URL prefix, like `rewrite_urls()`.
+    names = sorted(set(apis))
+    prefix = find_common_prefix(names)
+    return { api: api[len(prefix):] for api in names }
+
+def get_latest_swaps(table):
+    # Mask of the last swap of every api in each A-B group, which wins like in
+    # `load_ab_data()` when a quote was logged more than once.
+    df = pd.DataFrame({
+        'id': table['id'].to_numpy(zero_copy_only=False),
+        'api': table['api'].to_numpy(zero_copy_only=False),
+    })
+    return ~df.duplicated(['id', 'api'], keep='last').to_numpy()
+
+def get_ab_swaps(table, min_apis=1):
+    # Latest swap of every api (see `get_latest_swaps()`) in A-B groups with at
+    # least `min_apis` apis, and the number of those groups.
+    table = table.filter(get_latest_swaps(table))
+    ids = pd.Series(table['id'].to_numpy(zero_copy_only=False))
+    in_groups = ids.map(ids.value_counts()).to_numpy() >= min_apis
+    return table.filter(in_groups), ids[in_groups].nunique()
+
+def get_valid_swaps(table, buys=False, sells=False, tokens='', successful=True):
+    # Vectorized per-swap half of `are_valid_swaps()`; a group is valid if
+    # all of its swaps are.
+    if successful:
+        valid = table['success'].to_numpy(zero_copy_only=False)
+    else:
+        valid = np.ones(table.num_rows, dtype=bool)
+    sides = table['side'].to_numpy(zero_copy_only=False)
+    if buys:
+        valid = valid & (sides == 'buy')
+    if sells:
+        valid = valid & (sides == 'sell')
+    tokens = tokens.split(',') if len(tokens) else []
+    if len(tokens) > 0:
+        valid = valid \
+            & np.isin(table['maker_token'].to_numpy(zero_copy_only=False), tokens) \
+            & np.isin(table['taker_token'].to_numpy(zero_copy_only=False), tokens)
+    return valid
+
+def pivot_ab(table, values, shared=None):
+    # Pairs swaps by sim id with a hash join. `values` maps metric names to
+    # per-swap arrays aligned with `table`; the result has one row per complete
+    # A-B group with a `<metric>_<api>` column per api, plus any `shared`
+    # per-swap arrays (taken from the group's first swap) under their own name.
+    # Groups where some api failed to quote are returned separately by id.
+    shared = shared or {}
+    api_names = get_api_names(table['api'].to_pylist())
+    df = pd.DataFrame({
+        'id': table['id'].to_numpy(zero_copy_only=False),
+        'api': [api_names[a] for a in table['api'].to_pylist()],
+        **values,
+        **shared,
+    })
+    # Later swaps win, like in `load_ab_data()`.
+    df = df.drop_duplicates(['id', 'api'], keep='last')
+    apis = sorted(api_names.values())
+    counts = df.groupby('id', sort=False).size()
+    incomplete = list(counts.index[counts < len(apis)])
+    df = df[df['id'].isin(counts.index[counts == len(apis)])]
+    wide = pd.concat({ m: df.pivot(index='id', columns='api', values=m) for m in values }, axis=1)
+    wide.columns = [f'{metric}_{api}' for metric, api in wide.columns]
+    if len(shared):
+        wide = wide.join(df.groupby('id', sort=False)[list(shared)].first())
+    return wide, apis, incomplete
+
+def get_ab_edges(wide, metric, apis):
+    # Best/worst api and the winner's edge (bps) of each group by `metric`,
+    # dropping groups where every api ties.
+    values = wide[[f'{metric}_{api}' for api in apis]].to_numpy(dtype=float)
+    best = np.argmax(values, axis=1)
+    worst = np.argmin(values, axis=1)
+    best_values = values[np.arange(len(values)), best]
+    worst_values = values[np.arange(len(values)), worst]
+    edges = pd.DataFrame({
+        'best': np.array(apis)[best],
+        'worst': np.array(apis)[worst],
+        'bps': (best_values - worst_values) / worst_values * 1e4,
+    }, index=wide.index)
+    return edges[best != worst]
+
+def get_edge_stops(bps, stops):
+    # Largest stop <= bps, or NaN if below every stop.
+    idx = np.searchsorted(stops, bps, side='right') - 1
+    return np.where(idx >= 0, np.array(stops)[np.maximum(idx, 0)], np.nan)
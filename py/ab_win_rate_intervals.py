@@ -0,0 +1,94 @@
+import argparse
+import os
+from functools import partial
+import numpy as np
+import pandas as pd
+from ab_utils import pivot_ab, get_valid_swaps, get_ab_edges
+from utils import VALUES, format_value, get_max_values
+from swap_store import read_table
+from prices import get_realized_prices, get_quoted_prices
+from sketches import get_buckets, get_bucket_values
+from bootstrap import RESAMPLES, bootstrap, get_interval, get_shares, get_pattern_means, get_medians
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('path', type=str)
+    args.add_argument('--buys', action='store_true', default=False)
+    args.add_argument('--sells', action='store_true', default=False)
+    args.add_argument('--adjusted', action='store_true', default=False)
+    args.add_argument('--quoted', action='store_true', default=False, help='compare quoted instead of realized prices')
+    args.add_argument('--tokens', '-t', type=str, default='')
+    args.add_argument('--resamples', type=int, default=RESAMPLES)
+    args.add_argument('--confidence', type=float, default=0.95)
+    args.add_argument('--seed', type=int, default=0)
+    args.add_argument('--jobs', '-j', type=int, default=os.cpu_count())
+    return args.parse_args()
+
+def get_intervals(rows, label, num_pairs, statistic, counts, names):
+    samples = bootstrap(statistic, counts, args.resamples, args.seed, workers=args.jobs)
+    estimates = statistic(np.asarray(counts, dtype=float)[np.newaxis])[0]
+    lows, highs = get_interval(samples, args.confidence)
+    for name, estimate, low, high in zip(names, estimates, lows, highs):
+        rows.append([label, name, num_pairs, estimate, low, high])
+
+args = get_program_args()
+table = read_table(args.path, [
+    'id', 'api', 'success', 'reverted', 'side', 'maker_token', 'taker_token',
+    'fill_value',
+    'buy_amount',
+    'sell_amount',
+    'bought_amount',
+    'sold_amount',
+    'bought_amount_usd',
+    'sold_amount_usd',
+    'adjusted_bought_amount_usd',
+    'adjusted_sold_amount_usd',
+])
+data, urls, incomplete = pivot_ab(
+    table,
+    {
+        'selected': get_valid_swaps(table, args.buys, args.sells, args.tokens, successful=False),
+        'valid': get_valid_swaps(table, args.buys, args.sells, args.tokens),
+        'reverted': table['reverted'].to_numpy(zero_copy_only=False),
+        'price': get_quoted_prices(table) if args.quoted else get_realized_prices(table, args.adjusted),
+    },
+    { 'max_value': get_max_values(table['fill_value'].to_numpy()) },
+)
+data = data[data[[f'selected_{url}' for url in urls]].all(axis=1)]
+print(f'Loaded {len(data)} data items ({len(incomplete)} incomplete A-B groups)')
+
+valid = data[data[[f'valid_{url}' for url in urls]].all(axis=1)]
+edges = get_ab_edges(valid, 'price', urls)
+edges['max_value'] = valid.loc[edges.index, 'max_value']
+
+rows = []
+for value_label, (pairs, value_edges) in [
+    ('all', (data, edges)),
+    *(
+        (f'<{format_value(max_value)}', (
+            data[data['max_value'] == max_value],
+            edges[edges['max_value'] == max_value],
+        )) for min_value, max_value in VALUES
+    ),
+]:
+    # Win rate of each api among pairs with a winner.
+    wins = value_edges['best'].value_counts().reindex(urls, fill_value=0).to_numpy()
+    get_intervals(rows, value_label, len(value_edges), get_shares, wins, [f'win rate {url}' for url in urls])
+    # Median winner's edge, to within the sketch buckets' 1%.
+    keys, counts = np.unique(get_buckets(value_edges['bps'].to_numpy())[1], return_counts=True)
+    if len(keys):
+        get_intervals(rows, value_label, len(value_edges), partial(get_medians, get_bucket_values(1, keys)), counts, ['median bps edge'])
+    # Revert rate of each api minus the first's, over every selected pair.
+    reverts, counts = np.unique(
+        pairs[[f'reverted_{url}' for url in urls]].to_numpy(dtype=float),
+        axis=0,
+        return_counts=True,
+    )
+    diffs = reverts[:, 1:] - reverts[:, :1]
+    if len(diffs):
+        get_intervals(rows, value_label, len(pairs), partial(get_pattern_means, diffs), counts, [f'revert rate {url} - {urls[0]}' for url in urls[1:]])
+
+intervals = pd.DataFrame(rows, columns=['swap value', 'statistic', 'pairs', 'estimate', 'low', 'high'])
+pd.set_option('display.width', 200)
+print(f'{args.confidence:.0%} confidence intervals from {args.resamples} Poisson bootstrap resamples:')
+print(intervals.to_string(index=False))
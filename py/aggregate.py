@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+from utils import DELAYS, VALUES, get_delay_buckets, get_value_buckets
+from entity_index import ENTITY_FIELDS, get_list_field, index_entities, get_entity_pairs
+
+# Columns each dimension reads from the swap table.
+DIMENSION_COLUMNS = {
+    'api': ['api'],
+    'side': ['side'],
+    'maker_token': ['maker_token'],
+    'taker_token': ['taker_token'],
+    'pair': ['maker_token', 'taker_token'],
+    'token': ['maker_token', 'taker_token'],
+    'source': ['sources'],
+    'maker': ['orders'],
+    'fee_recipient': ['orders'],
+    'sender': ['orders'],
+    'delay': ['fill_delay'],
+    'value': ['fill_value'],
+}
+
+def get_columns(dims, outcome='reverted'):
+    return sorted(set([
+        'reverted' if outcome == 'reverted' else 'success',
+        *(c for d in dims for c in DIMENSION_COLUMNS[d]),
+    ]))
+
+def explode(table, dim, delays=DELAYS, values=VALUES, index=None):
+    # Returns a (swap row, dimension value) frame for `dim`, with one row per
+    # distinct value a swap has for that dimension. Entity dimensions (maker,
+    # source, ...) are read from `index` (see `build_entity_index()`) if given.
+    rows = np.arange(table.num_rows)
+    if dim in ('api', 'side', 'maker_token', 'taker_token'):
+        df = pd.DataFrame({ 'swap': rows, dim: table[dim].to_numpy(zero_copy_only=False) })
+    elif dim == 'pair':
+        df = pd.DataFrame({
+            'swap': rows,
+            dim: pc.binary_join_element_wise(table['maker_token'], table['taker_token'], '/')
+                .to_numpy(zero_copy_only=False),
+        })
+    elif dim == 'token':
+        df = pd.DataFrame({
+            'swap': np.concatenate([rows, rows]),
+            dim: np.concatenate([
+                table['maker_token'].to_numpy(zero_copy_only=False),
+                table['taker_token'].to_numpy(zero_copy_only=False),
+            ]),
+        })
+    elif dim in ENTITY_FIELDS:
+        if index is None or dim not in index:
+            index = { dim: index_entities(*get_list_field(table, *ENTITY_FIELDS[dim])) }
+        swaps, keys = get_entity_pairs(index, dim)
+        return pd.DataFrame({ 'swap': swaps, dim: keys })
+    elif dim == 'delay':
+        buckets = get_delay_buckets(table['fill_delay'].to_numpy(), delays)
+        in_range = buckets < len(delays)
+        df = pd.DataFrame({
+            'swap': rows[in_range],
+            dim: np.array([min_delay for min_delay, max_delay in delays])[buckets[in_range]],
+        })
+    elif dim == 'value':
+        buckets = get_value_buckets(table['fill_value'].to_numpy(), values)
+        in_range = buckets < len(values)
+        df = pd.DataFrame({
+            'swap': rows[in_range],
+            dim: np.array([max_value for min_value, max_value in values])[buckets[in_range]],
+        })
+    else:
+        raise ValueError(f'unknown dimension: {dim}')
+    return df.drop_duplicates()
+
+def get_revert_rates(table, dims, outcome='reverted', where=None, delays=DELAYS, values=VALUES, index=None):
+    # Counts swaps and failures for every combination of `dims` in one pass.
+    # `outcome` is either 'reverted' (non-empty revert data) or 'failed'
+    # (not `is_successful_swap()`). `where` is an optional boolean mask over
+    # swaps.
+    if outcome == 'reverted':
+        failed = table['reverted'].to_numpy(zero_copy_only=False)
+    else:
+        failed = ~table['success'].to_numpy(zero_copy_only=False)
+    df = pd.DataFrame({ 'swap': np.arange(table.num_rows) })
+    if where is not None:
+        df = df[np.asarray(where)]
+    for dim in dims:
+        df = df.merge(explode(table, dim, delays, values, index), on='swap')
+    df['reverts'] = failed[df['swap'].to_numpy()]
+    rates = df.groupby(list(dims), sort=True).agg(
+        total=('swap', 'size'),
+        reverts=('reverts', 'sum'),
+    ).reset_index()
+    rates['revert rate'] = rates['reverts'] / rates['total']
+    return rates
+
+def complete_revert_rates(rates, keys_by_dim):
+    # Adds zero-count rows for every missing combination of the given keys,
+    # which is what the plots expect.
+    dims = list(keys_by_dim.keys())
+    if len(dims) == 1:
+        # `set_index()` on one column builds a flat index, which a one-level
+        # `MultiIndex` wouldn't match.
+        index = pd.Index(keys_by_dim[dims[0]], name=dims[0])
+    else:
+        index = pd.MultiIndex.from_product(list(keys_by_dim.values()), names=dims)
+    rates = rates.set_index(dims).reindex(index)
+    return rates.fillna({ 'total': 0, 'reverts': 0, 'revert rate': 0 }).reset_index()
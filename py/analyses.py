@@ -0,0 +1,32 @@
+# Analysis scripts (in this directory) that `report.py` and `benchmark.py`
+# can run.
+ANALYSES = [
+    'ab_adjusted_price_win_rate_by_value',
+    'ab_average_gas_used',
+    'ab_price_accuracy',
+    'ab_quoted_price',
+    'ab_realized_price',
+    'ab_realized_price_scatter',
+    'ab_realized_price_win_rate_by_value',
+    'ab_response_time_by_value',
+    'ab_revert_rate_by_delay',
+    'ab_revert_rate_by_source',
+    'ab_win_rate_intervals',
+    'calldata_by_source',
+    'gas_usage_by_source',
+    'measure_quantiles',
+    'quote_slippage_by_token',
+    'revert_rate_by_bridge',
+    'revert_rate_by_fee_recipient',
+    'revert_rate_by_maker',
+    'revert_rate_by_pair',
+    'revert_rate_by_source',
+    'revert_rate_by_source_class',
+    'revert_rate_by_token',
+    'revert_rate_by_value',
+    'revert_reason_by_source',
+    'reverted_order_status',
+    'slippage_by_source',
+    'slippage_by_token',
+    'sources_by_token',
+]
@@ -0,0 +1,113 @@
+import functools
+import os
+import re
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Asset proxy ids (the first 4 bytes of asset data) that can be decoded.
+ERC20_PROXY_ID = '0xf47261b0'
+ERC20_BRIDGE_PROXY_ID = '0xdc1600f3'
+PROXY_NAMES = { ERC20_PROXY_ID: 'ERC20', ERC20_BRIDGE_PROXY_ID: 'ERC20Bridge' }
+# Source name of native (ERC20) orders, as in the quotes' `sources`.
+NATIVE_SOURCE = '0x'
+TOKENS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'tokens.js')
+ASSET_COLUMNS = ['proxy', 'token', 'bridge']
+
+def load_tokens(path=TOKENS_PATH):
+    # Address, decimals and usd value of the tokens the simulator trades, by
+    # symbol.
+    try:
+        with open(path) as f:
+            tokens = f.read()
+    except FileNotFoundError:
+        return {}
+    return {
+        symbol: {
+            'address': re.search(r"address: '(0x[0-9a-fA-F]{40})'", fields).group(1).lower(),
+            'decimals': int(re.search(r'decimals: (\d+)', fields).group(1)),
+            'value': float(re.search(r'value: ([\d.]+)', fields).group(1)),
+        } for symbol, fields in re.findall(r'(\w+): \{([^}]*)\}', tokens)
+    }
+
+TOKENS = load_tokens()
+# Symbol of every token address.
+TOKEN_SYMBOLS = { t['address']: symbol for symbol, t in TOKENS.items() }
+
+def get_address(data, word):
+    # Address in the `word`th ABI word after the proxy id of hex `data`.
+    start = 8 + word * 64 + 24
+    return '0x' + data[start:start + 40]
+
+@functools.lru_cache(maxsize=None)
+def decode_asset_data(asset_data):
+    # (proxy, token address, bridge address). ERC20Bridge asset data is
+    # `(address tokenAddress, address bridgeAddress, bytes bridgeData)`.
+    if not asset_data:
+        return (None, None, None)
+    data = asset_data.lower()[2:]
+    proxy_id = '0x' + data[:8]
+    if proxy_id == ERC20_PROXY_ID and len(data) >= 8 + 64:
+        return (PROXY_NAMES[proxy_id], get_address(data, 0), None)
+    if proxy_id == ERC20_BRIDGE_PROXY_ID and len(data) >= 8 + 128:
+        return (PROXY_NAMES[proxy_id], get_address(data, 0), get_address(data, 1))
+    return (proxy_id, None, None)
+
+def build_asset_dictionary(asset_data):
+    # Interns an asset data column, decoding every distinct value once.
+    # Returns (dictionary index of every row, -1 for nulls) and the
+    # dictionary table, with one row per distinct asset data.
+    if isinstance(asset_data, pa.ChunkedArray):
+        asset_data = asset_data.combine_chunks()
+    encoded = pc.dictionary_encode(asset_data)
+    dictionary = pd.DataFrame(
+        [decode_asset_data(v) for v in encoded.dictionary.to_pylist()],
+        columns=ASSET_COLUMNS,
+    )
+    dictionary.insert(0, 'asset_data', encoded.dictionary.to_pylist())
+    dictionary['token'] = [TOKEN_SYMBOLS.get(t, t) for t in dictionary['token']]
+    return encoded.indices.fill_null(-1).to_numpy(), dictionary
+
+def to_categorical(indices, values):
+    # Expands per-dictionary-row `values` to a categorical over all rows.
+    codes, categories = pd.factorize(np.asarray(values, dtype=object))
+    return pd.Categorical.from_codes(np.append(codes, -1)[indices], categories)
+
+def get_bridge_sources(swaps, bridges, sources):
+    # Names bridges after the liquidity source they fill: the only non-native
+    # source of swaps whose bridge orders all go through one bridge (most
+    # common one if they disagree). `swaps`/`bridges` are per order and
+    # `sources` is a source child table frame.
+    orders = pd.DataFrame({ 'swap': swaps, 'bridge': bridges }).dropna()
+    orders = orders.groupby('swap')['bridge'].agg(['nunique', 'first'])
+    sources = sources[(sources['proportion'] > 0) & (sources['name'] != NATIVE_SOURCE)]
+    sources = sources.groupby('swap')['name'].agg(['nunique', 'first'])
+    votes = orders[orders['nunique'] == 1].join(
+        sources[sources['nunique'] == 1],
+        how='inner',
+        lsuffix='_bridge',
+        rsuffix='_source',
+    )
+    return votes.groupby('first_bridge')['first_source'].agg(lambda s: s.value_counts().index[0]).to_dict()
+
+def get_order_assets(orders, sources=None, side='maker'):
+    # Decoded `{side}_asset_data` of a per-order table (see
+    # `child_tables.py`) as categorical proxy, token, bridge and source
+    # columns. Bridges are named from `sources` if given, else by address.
+    indices, dictionary = build_asset_dictionary(orders[f'{side}_asset_data'])
+    bridge_sources = {}
+    if sources is not None:
+        bridge_sources = get_bridge_sources(
+            orders['swap'].to_numpy(),
+            to_categorical(indices, dictionary['bridge']),
+            sources.select(['swap', 'name', 'proportion']).to_pandas(),
+        )
+    dictionary['source'] = [
+        NATIVE_SOURCE if proxy == 'ERC20' else bridge_sources.get(bridge, bridge)
+            for proxy, bridge in zip(dictionary['proxy'], dictionary['bridge'])
+    ]
+    return pd.DataFrame({
+        'swap': orders['swap'].to_numpy(),
+        **{ c: to_categorical(indices, dictionary[c]) for c in [*ASSET_COLUMNS, 'source'] },
+    })
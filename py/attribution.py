@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+# Splits per-swap values across the sources of each swap by the proportion
+# the api routed through each source, so multi-source swaps count towards
+# every source they used instead of fully towards each (or not at all). The
+# per-source sums are the product of the transposed (swap x source)
+# proportion matrix of `source_sets.build_source_sets()` and the value
+# column, computed as one weighted `bincount` over its non-zero entries.
+
+def get_shares(source_sets):
+    # Proportions scaled to add up to 1 per swap (the api's only do up to
+    # rounding).
+    p = source_sets['proportions']
+    totals = np.bincount(p['swaps'], weights=p['values'], minlength=p['shape'][0])
+    return p['values'] / totals[p['swaps']]
+
+def attribute(source_sets, values, groups=None, group_count=1, where=None):
+    # (group x source) sums of each swap's share of `values`. `groups` are
+    # per-swap group indexes; swaps outside [0, group_count), masked out by
+    # `where`, or with a non-finite value are skipped.
+    p = source_sets['proportions']
+    source_count = p['shape'][1]
+    values = np.asarray(values, dtype=float)[p['swaps']]
+    groups = np.zeros(len(p['swaps']), dtype=int) if groups is None else np.asarray(groups)[p['swaps']]
+    keep = np.isfinite(values) & (groups >= 0) & (groups < group_count)
+    if where is not None:
+        keep &= np.asarray(where)[p['swaps']]
+    cells = groups[keep] * source_count + p['sources'][keep]
+    return np.bincount(
+        cells,
+        weights=get_shares(source_sets)[keep] * values[keep],
+        minlength=group_count * source_count,
+    ).reshape(group_count, source_count)
+
+def get_attribution(source_sets, values, groups=None, keys=[None], where=None):
+    # Proportion-weighted mean of `values` per source (and group, if `groups`
+    # indexes into `keys`). `weight` is the number of swaps attributed to
+    # each, counting multi-source swaps fractionally. Sources without any
+    # weight are left out.
+    values = np.asarray(values, dtype=float)
+    weights = attribute(source_sets, np.where(np.isfinite(values), 1.0, np.nan), groups, len(keys), where)
+    sums = attribute(source_sets, values, groups, len(keys), where)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = sums / weights
+    df = pd.DataFrame({
+        'group': np.repeat(np.asarray(keys, dtype=object), len(source_sets['names'])),
+        'source': np.tile(source_sets['names'], len(keys)),
+        'mean': means.ravel(),
+        'weight': weights.ravel(),
+    })
+    return df[df['weight'] > 0].reset_index(drop=True)
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from analyses import ANALYSES
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# `ru_maxrss` is in KB on linux and in bytes on macOS.
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('output', type=str, help='directory to write the results (and generated data) to')
+    args.add_argument('--sizes', '-n', type=int, nargs='+', default=[10000, 100000], help='numbers of swaps to benchmark with')
+    args.add_argument('--seed', type=int, default=1)
+    args.add_argument(
+        '--analysis', '-a',
+        type=str,
+        action='append',
+        help='analysis to run, with optional arguments, e.g. "revert_rate_by_source --only Kyber". Can be repeated. Defaults to the pipeline and every analysis.',
+    )
+    args.add_argument('--data', type=str, help='directory to keep generated data in. Defaults to OUTPUT/data.')
+    args.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, help='number of generator processes')
+    args.add_argument('--baseline', type=str, help='benchmark.json of an earlier run to compare against')
+    args.add_argument('--tolerance', type=float, default=1.25, help='slowdown (or peak RSS growth) ratio reported as a regression')
+    return args.parse_args()
+
+def run_step(name, size, command, log_path, result_path=None):
+    # Runs a step in its own process and records its wall time, peak RSS and
+    # (for `benchmark_analysis.py` steps) its own result, whose time leaves
+    # out interpreter startup and imports.
+    started = time.time()
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen([sys.executable, *command], stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    seconds = time.time() - started
+    step = {
+        'name': name,
+        'size': size,
+        'seconds': seconds,
+        'wall_seconds': seconds,
+        'peak_rss_mb': usage.ru_maxrss * RSS_UNIT / 2 ** 20,
+        'phases': {},
+        'error': None if process.returncode == 0 else f'exited with {process.returncode}, see {log_path}',
+    }
+    if result_path is not None and os.path.exists(result_path):
+        with open(result_path) as f:
+            result = json.load(f)
+        step['seconds'] = result['seconds']
+        step['phases'] = result['phases']
+        step['error'] = step['error'] or result['error']
+    step['swaps_per_second'] = size / step['seconds']
+    return step
+
+def format_step(step):
+    phases = ' '.join(f'{p}={s:.2f}s' for p, s in step['phases'].items())
+    status = f'failed: {step["error"]}' if step['error'] else phases
+    return f'{step["size"]:>10} {step["name"]:<45} {step["seconds"]:8.2f}s {step["swaps_per_second"]:>10.0f}/s {step["peak_rss_mb"]:8.0f}MB  {status}'
+
+def find_regressions(steps, baseline, tolerance):
+    # Steps that got slower, or grew their peak RSS, by more than `tolerance`.
+    baseline_steps = { (s['size'], s['name']): s for s in baseline['steps'] if not s['error'] }
+    regressions = []
+    for step in steps:
+        base = baseline_steps.get((step['size'], step['name']))
+        if step['error'] or base is None:
+            continue
+        for key in ['seconds', 'peak_rss_mb']:
+            if step[key] > base[key] * tolerance:
+                regressions.append(f'{step["size"]} {step["name"]}: {key} {base[key]:.2f} -> {step[key]:.2f} ({step[key] / base[key]:.2f}x)')
+    return regressions
+
+args = get_program_args()
+data_dir = args.data or os.path.join(args.output, 'data')
+log_dir = os.path.join(args.output, 'logs')
+for d in [args.output, data_dir, log_dir]:
+    os.makedirs(d, exist_ok=True)
+analyses = args.analysis or ['pipeline', *ANALYSES]
+
+steps = []
+for size in args.sizes:
+    path = os.path.join(data_dir, f'swaps-{size}-{args.seed}.json')
+    if not os.path.exists(path):
+        # Written under a temporary name so an interrupted run doesn't leave
+        # a short file behind.
+        step = run_step('generate', size, [
+            os.path.join(SCRIPT_DIR, 'generate_swaps.py'),
+            path + '.tmp',
+            '--swaps', str(size),
+            '--seed', str(args.seed),
+            '--jobs', str(args.jobs),
+        ], os.path.join(log_dir, f'{size}-generate.log'))
+        if not step['error']:
+            os.replace(path + '.tmp', path)
+        steps.append(step)
+        print(format_step(step))
+    store = os.path.join(data_dir, f'swaps-{size}-{args.seed}.parquet')
+    step = run_step('ingest', size, [
+        os.path.join(SCRIPT_DIR, 'ingest.py'), path, store,
+    ], os.path.join(log_dir, f'{size}-ingest.log'))
+    steps.append(step)
+    print(format_step(step))
+    # Parses the log into the arrow cache the analyses then load from.
+    for analysis in ['parse', *analyses]:
+        name, *script_args = shlex.split(analysis)
+        if name not in ['parse', 'pipeline', *ANALYSES]:
+            raise ValueError(f'unknown analysis: {name}')
+        file_name = '-'.join([str(size), name, *script_args]).replace('/', '_')
+        result_path = os.path.join(log_dir, f'{file_name}.json')
+        if os.path.exists(result_path):
+            os.remove(result_path)
+        step = run_step(analysis, size, [
+            os.path.join(SCRIPT_DIR, 'benchmark_analysis.py'), result_path, name, path, *script_args,
+        ], os.path.join(log_dir, f'{file_name}.log'), result_path)
+        steps.append(step)
+        print(format_step(step))
+
+with open(os.path.join(args.output, 'benchmark.json'), 'w') as f:
+    json.dump({ 'seed': args.seed, 'sizes': args.sizes, 'steps': steps }, f, indent=2)
+print(f'Wrote results to {os.path.join(args.output, "benchmark.json")}')
+
+if args.baseline:
+    with open(args.baseline) as f:
+        regressions = find_regressions(steps, json.load(f), args.tolerance)
+    for r in regressions:
+        print(f'Regression: {r}')
+    if len(regressions):
+        sys.exit(1)
+    print(f'No regressions against {args.baseline}')
@@ -0,0 +1,125 @@
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+import seaborn as sns
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import re
+import runpy
+import sys
+import time
+import traceback
+import warnings
+import child_tables
+import swap_store
+from swap_cache import get_cache_path
+from aggregate import get_revert_rates
+from source_sets import build_source_sets, has_only_source
+from asset_data import NATIVE_SOURCE
+
+# Runs one step of `benchmark.py` in its own process (so its peak RSS is its
+# own) and writes how long each phase took to a JSON file:
+# - `parse`: parsing a JSONL log into the arrow cache the scripts load from.
+# - `pipeline`: load, filter, aggregate and render of the revert rate by
+#   api, source and delay of swaps that used a bridge.
+# - any analysis script: load (reading swaps), render (drawing figures) and
+#   compute (the rest, i.e. filtering and aggregating).
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Functions whose time counts as loading.
+LOADERS = [
+    (swap_store, 'read_table'),
+    (swap_store, 'load_frame'),
+    (child_tables, 'read_child_table'),
+]
+# Seconds spent in each phase.
+PHASE_SECONDS = {}
+ACTIVE_PHASES = []
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('result', type=str, help='JSON file to write the timings to')
+    args.add_argument('name', type=str, help='parse, pipeline or an analysis')
+    args.add_argument('path', type=str)
+    args.add_argument('script_args', nargs=argparse.REMAINDER)
+    return args.parse_args()
+
+@contextlib.contextmanager
+def phase(name):
+    # Nested phases count towards the outermost one.
+    if len(ACTIVE_PHASES):
+        yield
+        return
+    ACTIVE_PHASES.append(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_SECONDS[name] = PHASE_SECONDS.get(name, 0) + time.perf_counter() - started
+        ACTIVE_PHASES.pop()
+
+def wrap_phase(name, fn):
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        with phase(name):
+            return fn(*args, **kwargs)
+    return timed
+
+def draw_figures():
+    for num in plt.get_fignums():
+        plt.figure(num).canvas.draw()
+
+def run_parse(path):
+    # From scratch, so later steps load from a warm cache.
+    if os.path.exists(get_cache_path(path)):
+        os.remove(get_cache_path(path))
+    with phase('parse'):
+        return swap_store.read_cached_log(path).num_rows
+
+def run_pipeline(path):
+    with phase('load'):
+        table = swap_store.read_table(path, ['api', 'sources', 'reverted', 'fill_delay'])
+    with phase('filter'):
+        source_sets = build_source_sets(table)
+        bridged = table.filter(~has_only_source(source_sets, NATIVE_SOURCE) & (source_sets['masks'] != 0))
+    with phase('aggregate'):
+        rates = get_revert_rates(bridged, ['api', 'source', 'delay'])
+    with phase('render'):
+        sns.catplot(x='source', y='revert rate', hue='delay', col='api', data=rates, kind='bar')
+        draw_figures()
+    return table.num_rows
+
+def run_script(name, path, script_args):
+    for module, fn_name in LOADERS:
+        setattr(module, fn_name, wrap_phase('load', getattr(module, fn_name)))
+    plt.show = wrap_phase('render', draw_figures)
+    stdout = io.StringIO()
+    sys.argv = [os.path.join(SCRIPT_DIR, f'{name}.py'), path, *script_args]
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(stdout), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        runpy.run_path(sys.argv[0], run_name='__main__')
+    PHASE_SECONDS['compute'] = time.perf_counter() - started - sum(PHASE_SECONDS.values())
+    loaded = re.search(r'Loaded (\d+) data items', stdout.getvalue())
+    return int(loaded.group(1)) if loaded else None
+
+args = get_program_args()
+result = { 'name': args.name, 'args': args.script_args, 'rows': None, 'error': None }
+started = time.perf_counter()
+try:
+    if args.name == 'parse':
+        result['rows'] = run_parse(args.path)
+    elif args.name == 'pipeline':
+        result['rows'] = run_pipeline(args.path)
+    else:
+        result['rows'] = run_script(args.name, args.path, args.script_args)
+except (Exception, SystemExit) as e:
+    result['error'] = ''.join(traceback.format_exception_only(type(e), e)).strip()
+result['seconds'] = time.perf_counter() - started
+result['phases'] = PHASE_SECONDS
+with open(args.result, 'w') as f:
+    json.dump(result, f)
@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+
+# Poisson bootstrap: every row gets an independent Poisson(1) weight per
+# resample. The total weight of `n` rows is then Poisson(n), so for statistics
+# that only depend on how many rows fall in each category (winner, revert
+# pattern, edge bucket, ...) we can resample the per-category counts directly.
+# That is the same distribution as resampling rows, but costs
+# O(resamples * categories) instead of O(resamples * rows).
+RESAMPLES = 10000
+MEMORY_BUDGET = 256 * 1024 * 1024
+
+def get_chunk_size(num_categories, budget=MEMORY_BUDGET):
+    # Resampled counts plus a couple of same-sized temporaries per chunk.
+    return max(1, budget // (num_categories * 8 * 3))
+
+def resample_chunk(statistic, counts, size, seed):
+    rng = np.random.default_rng(seed)
+    return statistic(rng.poisson(counts, size=(size, len(counts))).astype(float))
+
+def bootstrap(statistic, counts, resamples=RESAMPLES, seed=0, budget=MEMORY_BUDGET, workers=1):
+    # Returns `statistic()` of each resample of `counts`, stacked. Resamples
+    # are drawn in chunks that fit `budget`, each with its own seed, so the
+    # result doesn't depend on the number of workers. `statistic` has to be
+    # picklable (a module-level function or a `partial` of one) when
+    # `workers` > 1.
+    counts = np.asarray(counts, dtype=float)
+    chunk_size = get_chunk_size(len(counts), budget)
+    sizes = [min(chunk_size, resamples - start) for start in range(0, resamples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    run = partial(resample_chunk, statistic, counts)
+    if workers == 1 or len(sizes) == 1:
+        return np.concatenate(list(map(run, sizes, seeds)))
+    with ProcessPoolExecutor(min(workers, len(sizes))) as pool:
+        return np.concatenate(list(pool.map(run, sizes, seeds)))
+
+def get_interval(samples, confidence=0.95):
+    # Percentile interval of every statistic (column) in `samples`.
+    tail = (1 - confidence) / 2 * 100
+    return np.nanpercentile(samples, tail, axis=0), np.nanpercentile(samples, 100 - tail, axis=0)
+
+def get_shares(counts):
+    # Share of each category.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return counts / counts.sum(axis=1, keepdims=True)
+
+def get_pattern_means(patterns, counts):
+    # Mean of each column of `patterns` (one row per category).
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return counts @ patterns / counts.sum(axis=1, keepdims=True)
+
+def get_medians(values, counts):
+    # Median of categories with (ascending) `values`.
+    cumulative = np.cumsum(counts, axis=1)
+    medians = np.asarray(values)[np.argmax(cumulative >= cumulative[:, -1:] / 2, axis=1)]
+    return np.where(cumulative[:, -1] > 0, medians, np.nan)[:, np.newaxis]
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from asset_data import TOKEN_SYMBOLS
+
+# Gas per calldata byte (EIP-2028). `txDataGasUsed` in `src/quotes.js` only
+# counts the non-zero bytes.
+ZERO_BYTE_GAS = 4
+NONZERO_BYTE_GAS = 16
+TRANSFORM_ERC20_SELECTOR = '0x415565b0'
+# Functions the api's quotes call, by selector.
+FUNCTION_NAMES = {
+    TRANSFORM_ERC20_SELECTOR: 'transformERC20',
+    '0xa6c3bf33': 'marketSellOrdersFillOrKill',
+    '0x8bc8efb3': 'marketBuyOrdersFillOrKill',
+    '0x369da099': 'marketSellOrdersNoThrow',
+    '0x78d29ac1': 'marketBuyOrdersNoThrow',
+    '0x9b44d556': 'fillOrder',
+    '0xe14b58c4': 'fillOrKillOrder',
+    '0x907e5cc3': 'marketSellOrdersWithEth',
+    '0x9e832315': 'marketBuyOrdersWithEth',
+}
+# Transformers by the nonce they were deployed with by the transformer
+# deployer (`transformers.deployer` in the config).
+TRANSFORMER_NAMES = {
+    1: 'WethTransformer',
+    2: 'PayTakerTransformer',
+    3: 'FillQuoteTransformer',
+    4: 'AffiliateFeeTransformer',
+}
+CALLDATA_COLUMNS = [
+    'calldata_size', 'zero_bytes', 'nonzero_bytes', 'calldata_gas', 'function',
+    'input_token', 'output_token', 'transformations', 'transformers',
+]
+# Value of every hex digit by its ASCII code, 255 for other characters.
+HEX_VALUES = np.full(256, 255, dtype=np.uint8)
+for i, c in enumerate(b'0123456789abcdef'):
+    HEX_VALUES[c] = i
+for i, c in enumerate(b'ABCDEF'):
+    HEX_VALUES[c] = 10 + i
+
+def decode_hex(array):
+    # Decodes the hex strings (with or without `0x`) of an arrow string array
+    # into one contiguous byte buffer, straight from the array's buffers.
+    # Returns the buffer, the offsets of every row (row i is
+    # `buffer[offsets[i]:offsets[i + 1]]`) and whether each row was valid
+    # hex. Nulls are empty (and invalid); a trailing odd digit is dropped.
+    array = array.cast(pa.large_string())
+    _, offset_buffer, char_buffer = array.buffers()
+    offsets = np.frombuffer(offset_buffer, dtype=np.int64)[array.offset:array.offset + len(array) + 1]
+    chars = np.frombuffer(char_buffer, dtype=np.uint8)[offsets[0]:offsets[-1]] if len(array) \
+        else np.zeros(0, dtype=np.uint8)
+    offsets = offsets - offsets[0]
+    is_valid = array.is_valid().to_numpy(zero_copy_only=False)
+    starts = offsets[:-1]
+    lengths = np.diff(offsets)
+    padded = np.append(chars, np.zeros(2, dtype=np.uint8))
+    has_prefix = is_valid & (lengths >= 2) & (padded[starts] == ord('0')) & ((padded[starts + 1] | 0x20) == ord('x'))
+    is_odd = is_valid & ((lengths - 2 * has_prefix) % 2 == 1)
+    # Everything but the hex digits: prefixes, odd digits and (rarely) the
+    # characters behind nulls.
+    null_lengths = np.where(is_valid, 0, lengths)
+    dropped = np.concatenate([
+        starts[has_prefix],
+        starts[has_prefix] + 1,
+        offsets[1:][is_odd] - 1,
+        np.repeat(starts - np.cumsum(null_lengths) + null_lengths, null_lengths) + np.arange(null_lengths.sum()),
+    ])
+    digits = HEX_VALUES[np.delete(chars, dropped) if len(dropped) else chars]
+    # Zero padded, so words read past the end of the last row are in bounds.
+    buffer = np.zeros(len(digits) // 2 + 32, dtype=np.uint8)
+    buffer[:len(digits) // 2] = (digits[0::2] << 4) | digits[1::2]
+    byte_offsets = np.concatenate([[0], np.cumsum((lengths - 2 * has_prefix - is_odd - null_lengths) // 2)])
+    invalid_rows = np.searchsorted(byte_offsets, np.flatnonzero(digits > 15) // 2, side='right') - 1
+    is_valid[invalid_rows] = False
+    return buffer, byte_offsets, is_valid
+
+def count_by_row(flags, offsets):
+    # Sums of `flags` over the rows of a `decode_hex()` buffer.
+    # The last segment is the buffer's padding.
+    sums = np.add.reduceat(flags, offsets, dtype=np.int64)[:-1]
+    return np.where(np.diff(offsets) > 0, sums, 0)
+
+def factorize_rows(matrix):
+    # Distinct rows of a 2d array and the index of every row among them,
+    # hashing them (as fixed size binary) instead of sorting.
+    matrix = np.ascontiguousarray(matrix)
+    width = matrix.shape[1] * matrix.itemsize
+    if width == 0:
+        return matrix[:1], np.zeros(len(matrix), dtype=int)
+    encoded = pa.FixedSizeBinaryArray.from_buffers(
+        pa.binary(width), len(matrix), [None, pa.py_buffer(matrix)],
+    ).dictionary_encode()
+    unique = np.frombuffer(encoded.dictionary.buffers()[1], dtype=matrix.dtype).reshape(-1, matrix.shape[1])
+    return unique, encoded.indices.to_numpy()
+
+def read_words(buffer, positions, ends):
+    # 32-byte words at `positions` as (low 8 bytes as int, whether the word
+    # is in bounds and fits in 8 bytes).
+    ok = (positions >= 0) & (positions + 32 <= ends)
+    words = buffer[np.where(ok, positions, 0)[:, None] + np.arange(32)]
+    ok &= ~words[:, :24].any(axis=1)
+    values = np.ascontiguousarray(words[:, 24:]).view('>u8').reshape(-1).astype(np.int64)
+    return np.where(ok, values, 0), ok
+
+def to_addresses(buffer, positions, ok):
+    # Addresses in the words at `positions`, as token symbols where known.
+    # Rows that aren't `ok` are None, without reading their (possibly out of
+    # bounds) positions.
+    unique, inverse = factorize_rows(buffer[positions[ok][:, None] + np.arange(12, 32)])
+    symbols = [TOKEN_SYMBOLS.get(a, a) for a in ('0x' + w.tobytes().hex() for w in unique)]
+    addresses = np.full(len(positions), None, dtype=object)
+    addresses[ok] = np.array(symbols, dtype=object)[inverse]
+    return addresses
+
+def get_transformer_names(nonces):
+    return '+'.join(TRANSFORMER_NAMES.get(n, f'nonce {n}') for n in nonces if n >= 0)
+
+def decode_transform_erc20(buffer, starts, ends):
+    # `transformERC20(address inputToken, address outputToken,
+    # uint256 inputTokenAmount, uint256 minOutputTokenAmount,
+    # (uint32 deploymentNonce, bytes data)[] transformations)`: tokens and
+    # the nonces of the transformers, in order.
+    args = starts + 4
+    ok = args + 5 * 32 <= ends
+    args = np.where(ok, args, 0)
+    array_offsets, offset_ok = read_words(buffer, args + 4 * 32, ends)
+    items = args + array_offsets + 32
+    counts, count_ok = read_words(buffer, items - 32, ends)
+    ok &= offset_ok & count_ok & (items + 32 * counts <= ends)
+    counts = np.where(ok, counts, 0)
+    nonces = np.full((len(starts), counts.max(initial=0)), -1)
+    for i in range(nonces.shape[1]):
+        rows = np.flatnonzero(counts > i)
+        item_offsets, item_ok = read_words(buffer, items[rows] + 32 * i, ends[rows])
+        values, value_ok = read_words(buffer, items[rows] + item_offsets, ends[rows])
+        nonces[rows[item_ok & value_ok], i] = values[item_ok & value_ok]
+        # Calls cut off before a transformation's nonce aren't decoded.
+        ok[rows[~(item_ok & value_ok)]] = False
+    counts = np.where(ok, counts, 0)
+    # One name per distinct transformer list.
+    unique, inverse = factorize_rows(nonces)
+    names = np.array([get_transformer_names(n) for n in unique], dtype=object)
+    return {
+        'input_token': to_addresses(buffer, args, ok),
+        'output_token': to_addresses(buffer, args + 32, ok),
+        'transformations': np.where(ok, counts, -1),
+        'transformers': np.where(ok, names[inverse], None),
+    }
+
+# Decoders of the calldata of a function, by selector. Each is called once
+# per distinct selector with the rows that call it.
+CALLDATA_DECODERS = {
+    TRANSFORM_ERC20_SELECTOR: decode_transform_erc20,
+}
+
+def decode_calldata_chunk(array):
+    buffer, offsets, valid = decode_hex(array)
+    sizes = np.diff(offsets)
+    zero_bytes = count_by_row(buffer == 0, offsets)
+    df = pd.DataFrame({
+        'calldata_size': sizes,
+        'zero_bytes': zero_bytes,
+        'nonzero_bytes': sizes - zero_bytes,
+        'calldata_gas': zero_bytes * ZERO_BYTE_GAS + (sizes - zero_bytes) * NONZERO_BYTE_GAS,
+        'function': None,
+        'input_token': None,
+        'output_token': None,
+        'transformations': -1,
+        'transformers': None,
+    })
+    callable_rows = np.flatnonzero(valid & (sizes >= 4))
+    selectors = buffer[offsets[callable_rows][:, None] + np.arange(4)].view('>u4').reshape(-1)
+    for selector in np.unique(selectors):
+        rows = callable_rows[selectors == selector]
+        name = f'0x{selector:08x}'
+        df.loc[rows, 'function'] = FUNCTION_NAMES.get(name, name)
+        if name in CALLDATA_DECODERS:
+            for column, values in CALLDATA_DECODERS[name](buffer, offsets[rows], offsets[rows + 1]).items():
+                df.loc[rows, column] = values
+    df.loc[~valid, ['calldata_size', 'zero_bytes', 'nonzero_bytes', 'calldata_gas']] = -1
+    return df
+
+def get_calldata_stats(calldata):
+    # Per-swap calldata size, zero/non-zero byte counts and gas, function and,
+    # for `transformERC20()`, tokens and transformers of a `calldata` column.
+    # Chunks are decoded one at a time so only one chunk's bytes are held in
+    # memory. Rows without (valid hex) calldata have -1 counts.
+    if isinstance(calldata, pa.Array):
+        calldata = pa.chunked_array([calldata])
+    chunks = [decode_calldata_chunk(chunk) for chunk in calldata.chunks]
+    df = pd.concat(chunks, ignore_index=True) if chunks else decode_calldata_chunk(pa.array([], pa.string()))
+    for column in ['function', 'input_token', 'output_token', 'transformers']:
+        df[column] = df[column].astype('category')
+    return df
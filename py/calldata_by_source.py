@@ -0,0 +1,63 @@
+import matplotlib.ticker as ticker
+from matplotlib import pyplot as plt
+import seaborn as sns
+import argparse
+import pandas as pd
+from utils import VALUES, format_value, get_max_values
+from swap_store import read_table
+from source_sets import build_source_sets, get_single_sources
+from calldata import get_calldata_stats
+
+sns.set(color_codes=True)
+sns.set_palette('muted')
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('path', type=str)
+    args.add_argument('--url', type=str)
+    return args.parse_args()
+
+args = get_program_args()
+table = read_table(args.path, ['sources', 'fill_value', 'calldata'], args.url)
+print(f'Loaded {table.num_rows} data items')
+stats = get_calldata_stats(table['calldata'])
+stats = stats.assign(source=get_single_sources(build_source_sets(table)))
+stats = stats[stats['calldata_size'] >= 0]
+
+# Calldata by function and transformers.
+print(stats.groupby(['function', 'transformers'], observed=True, dropna=False).agg(
+    swaps=('calldata_size', 'size'),
+    size=('calldata_size', 'mean'),
+    zero_bytes=('zero_bytes', 'mean'),
+    calldata_gas=('calldata_gas', 'mean'),
+).reset_index().to_string(index=False))
+
+single_source = stats[stats['source'].notna()]
+df = pd.DataFrame({
+    'source': single_source['source'],
+    'calldata gas': single_source['calldata_gas'],
+    'swap value': get_max_values(table['fill_value'].to_numpy()[single_source.index]),
+})
+counts_by_source = df['source'].value_counts()
+sources = sorted(counts_by_source.index)
+sns.catplot(
+    x='source',
+    y='calldata gas',
+    hue='swap value',
+    data=df,
+    kind='bar',
+    order=sources,
+    legend=True,
+    legend_out=False,
+)
+
+for t, (min_value, max_value) in zip(plt.gca().get_legend().texts, VALUES):
+    t.set_text(f'< {format_value(max_value)}')
+plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{y / 1e3:.1f}K'))
+plt.xticks(
+    list(range(len(sources))),
+    ['%s (%d)' % (source, counts_by_source[source]) for source in sources],
+)
+plt.title(f'Calldata gas by source ({len(df)} single-source swaps)')
+plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
+plt.show()
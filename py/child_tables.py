@@ -0,0 +1,150 @@
+import os
+from decimal import Decimal
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from swap_store import SOURCE, ORDER, ORDER_INFO, is_store, read_table
+from incremental import load_state
+from asset_data import ERC20_PROXY_ID
+
+# Wide enough to add up and subtract wei amounts exactly.
+WIDE_AMOUNT = pa.decimal256(60, 0)
+SOURCE_SCHEMA = pa.schema([
+    ('swap', pa.int64()),
+    ('source_index', pa.int32()),
+    *SOURCE,
+])
+ORDER_SCHEMA = pa.schema([
+    ('swap', pa.int64()),
+    ('order_index', pa.int32()),
+    *ORDER,
+    *ORDER_INFO,
+    ('is_native', pa.bool_()),
+    ('frontrun', pa.bool_()),
+])
+
+def explode_list(table, column):
+    # (swap row, index in the list, flattened values) of a list column.
+    lengths = pc.list_value_length(table[column]).fill_null(0).to_numpy()
+    swaps = np.repeat(np.arange(len(lengths)), lengths)
+    indexes = np.arange(len(swaps)) - (np.cumsum(lengths) - lengths)[swaps]
+    return swaps, indexes, pc.list_flatten(table[column])
+
+def sum_by_swap(swaps, amounts, count):
+    # Exact per-swap totals of a decimal column, 0 for swaps without any.
+    sums = pa.table({ 'swap': swaps, 'amount': pc.cast(amounts, WIDE_AMOUNT) }) \
+        .group_by('swap').aggregate([('amount', 'sum')])
+    positions = np.full(count, -1)
+    positions[sums['swap'].to_numpy()] = np.arange(sums.num_rows)
+    totals = sums['amount_sum'].take(pa.array(positions, mask=positions < 0))
+    return pc.cast(totals, WIDE_AMOUNT).fill_null(pa.scalar(Decimal(0), WIDE_AMOUNT))
+
+def get_frontrun_flags(table):
+    # Whether a swap sells more than its orders had left to fill after the
+    # fill, i.e. someone else (probably) filled them first.
+    swaps, _, orders = explode_list(table, 'orders')
+    info_swaps, _, infos = explode_list(table, 'order_infos')
+    remaining = pc.subtract(
+        sum_by_swap(swaps, pc.struct_field(orders, 'taker_asset_amount'), table.num_rows),
+        sum_by_swap(info_swaps, pc.struct_field(infos, 'order_taker_asset_filled_amount'), table.num_rows),
+    )
+    return pc.less(pc.cast(table['sell_amount'], WIDE_AMOUNT), remaining) \
+        .fill_null(False).to_numpy(zero_copy_only=False)
+
+def build_source_table(table, offset=0):
+    swaps, indexes, sources = explode_list(table, 'sources')
+    return pa.table({
+        'swap': swaps + offset,
+        'source_index': indexes,
+        **{ f.name: pc.struct_field(sources, f.name) for f in SOURCE },
+    }, schema=SOURCE_SCHEMA)
+
+def build_order_table(table, offset=0):
+    # One row per order, with its `orderInfos` entry (matched by index).
+    swaps, indexes, orders = explode_list(table, 'orders')
+    info_counts = pc.list_value_length(table['order_infos']).fill_null(0).to_numpy()
+    info_positions = (np.cumsum(info_counts) - info_counts)[swaps] + indexes
+    infos = pc.list_flatten(table['order_infos']) \
+        .take(pa.array(info_positions, mask=indexes >= info_counts[swaps]))
+    return pa.table({
+        'swap': swaps + offset,
+        'order_index': indexes,
+        **{ f.name: pc.struct_field(orders, f.name) for f in ORDER },
+        **{ f.name: pc.struct_field(infos, f.name) for f in ORDER_INFO },
+        # Orders with any other maker asset data are bridge orders.
+        'is_native': pc.starts_with(pc.struct_field(orders, 'maker_asset_data'), ERC20_PROXY_ID)
+            .fill_null(False),
+        'frontrun': get_frontrun_flags(table)[swaps],
+    }, schema=ORDER_SCHEMA)
+
+# Child tables, with the swap columns they are built from. Their `swap`
+# column is the row of the swap in the (unfiltered) store.
+CHILD_TABLES = {
+    'sources': (['sources'], build_source_table),
+    'orders': (['sell_amount', 'orders', 'order_infos'], build_order_table),
+}
+
+def get_child_path(store, name):
+    # `swaps.parquet` -> `swaps.orders.parquet`. Incremental stores keep one
+    # file per part under `_orders/`, which parquet doesn't read as a part.
+    if os.path.isdir(store):
+        return os.path.join(store, f'_{name}')
+    return f'{os.path.splitext(store)[0]}.{name}.parquet'
+
+def write_child_table(path, table):
+    pq.write_table(table, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+def write_child_tables(store, table):
+    for name, (columns, build) in CHILD_TABLES.items():
+        write_child_table(get_child_path(store, name), build(table))
+
+def update_store_child_tables(store):
+    # Writes the child tables of every part of an incremental store that
+    # doesn't have them yet.
+    offset = 0
+    for part in load_state(store)['parts']:
+        for name, (columns, build) in CHILD_TABLES.items():
+            path = os.path.join(get_child_path(store, name), part['file'])
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                write_child_table(path, build(pq.read_table(os.path.join(store, part['file']), columns=columns), offset))
+        offset += part['swaps']
+
+def is_current(path, source):
+    # Rewriting a store without its child tables leaves them stale.
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source)
+
+def has_child_table(store, name):
+    path = get_child_path(store, name)
+    if os.path.isdir(store):
+        # Parts ingested after the child tables were last updated have none.
+        parts = [f for f in os.listdir(store) if f.startswith('part-') and f.endswith('.parquet')]
+        return os.path.isdir(path) and all(
+            is_current(os.path.join(path, part), os.path.join(store, part)) for part in parts
+        )
+    return is_current(path, store)
+
+def read_child_table(path, name, columns=None, url=None):
+    # Reads a child table of a store written by `ingest.py`, or builds it from
+    # the swaps of any other input. With `url`, only children of matching
+    # swaps are kept and `swap` is their row in the filtered swap table (as
+    # returned by `read_table(path, url=url)`).
+    read_columns = None if columns is None else sorted(set(['swap', *columns]))
+    if is_store(path) and has_child_table(path, name):
+        table = pq.read_table(get_child_path(path, name), columns=read_columns)
+    else:
+        swap_columns, build = CHILD_TABLES[name]
+        table = build(read_table(path, swap_columns))
+    if url is not None:
+        matches = pc.match_substring(read_table(path, ['api_url'])['api_url'], url) \
+            .fill_null(False).to_numpy(zero_copy_only=False)
+        table = table.filter(matches[table['swap'].to_numpy()])
+        rows = np.cumsum(matches) - 1
+        table = table.set_column(
+            table.schema.get_field_index('swap'),
+            'swap',
+            pa.array(rows[table['swap'].to_numpy()], pa.int64()),
+        )
+    return table if columns is None else table.select(columns)
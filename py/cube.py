@@ -0,0 +1,227 @@
+import os
+import numpy as np
+import pandas as pd
+from utils import DELAYS, VALUES, get_max_values, get_min_delays
+from prices import get_realized_prices, get_best_order_prices, get_slippages
+from swap_store import read_table
+from incremental import load_state, save_state
+from source_sets import build_source_sets, get_source_set_names
+
+# Dimensions of the cubes ingest keeps. Cubes by `api_url` (the same cells as
+# `api` again) or `source_set` (close to a cell per swap) are only built on the
+# fly from swaps, see `load_cube()`. `pair` and `token` are derived from the
+# maker and taker tokens when rolling up, see `expand_cube()`.
+CUBE_DIMENSIONS = ['api', 'side', 'maker_token', 'taker_token', 'delay', 'value']
+DERIVED_DIMENSIONS = ['pair', 'token']
+DIMENSIONS = [*CUBE_DIMENSIONS, 'api_url', 'source_set', *DERIVED_DIMENSIONS]
+# Outcomes counted per cell. As means of 0/1 values their sums of squares are
+# their sums, so they have stats like the measures.
+OUTCOMES = ['reverts', 'failures']
+# Swap table columns `build_cube()` reads.
+CUBE_COLUMNS = [
+    'api',
+    'api_url',
+    'side',
+    'maker_token',
+    'taker_token',
+    'sources',
+    'orders',
+    'fill_delay',
+    'fill_value',
+    'reverted',
+    'success',
+    'gas_used',
+    'response_time',
+    'bought_amount',
+    'sold_amount',
+]
+# Histogram bin edges for each measure. Values below the first or past the
+# last edge land in the under/overflow bins.
+MEASURES = {
+    'gas_used': np.linspace(0, 2e6, 41),
+    'slippage': np.linspace(-0.05, 0.05, 41),
+    'response_time': np.linspace(0, 10, 41),
+}
+
+def get_source_sets(table):
+    # '+'-joined names of the sources each swap actually used.
+    return get_source_set_names(build_source_sets(table))
+
+def get_measures(table):
+    # Gas and slippage only count successful swaps, like the scripts do. The
+    # gas of a reverted swap is only what it spent up to the revert.
+    success = table['success'].to_numpy(zero_copy_only=False)
+    slippages = get_slippages(get_realized_prices(table), get_best_order_prices(table))
+    gas_used = table['gas_used'].to_numpy(zero_copy_only=False).astype(float)
+    return {
+        'gas_used': np.where(success, gas_used, np.nan),
+        'slippage': np.where(success & np.isfinite(slippages), slippages, np.nan),
+        'response_time': table['response_time'].to_numpy(zero_copy_only=False).astype(float),
+    }
+
+def get_histogram_columns(measure):
+    return [f'{measure}_bin_{i}' for i in range(len(MEASURES[measure]) + 1)]
+
+def get_keys(table, dims, delays, values):
+    keys = {}
+    for dim in dims:
+        if dim == 'source_set':
+            keys[dim] = get_source_sets(table)
+        elif dim == 'delay':
+            keys[dim] = get_min_delays(table['fill_delay'].to_numpy(), delays)
+        elif dim == 'value':
+            keys[dim] = get_max_values(table['fill_value'].to_numpy(), values)
+        elif dim in DIMENSIONS and dim not in DERIVED_DIMENSIONS:
+            keys[dim] = table[dim].to_numpy(zero_copy_only=False)
+        else:
+            raise ValueError(f'unknown dimension: {dim}')
+    return pd.DataFrame(keys).fillna('')
+
+def get_cube_dimensions(cube):
+    return [c for c in cube.columns if c in DIMENSIONS]
+
+def build_cube(table, dims=CUBE_DIMENSIONS, delays=DELAYS, values=VALUES):
+    # One row per distinct combination of `dims`, with counts and the
+    # count/sum/sum of squares/histogram of every measure. All of these just
+    # add up, so cubes can be merged and rolled up without raw swaps.
+    groups = get_keys(table, dims, delays, values).groupby(list(dims), sort=True)
+    codes = groups.ngroup().to_numpy()
+    index = groups.size().index
+    num_groups = len(index)
+    columns = {
+        'total': np.bincount(codes, minlength=num_groups),
+        'reverts': np.bincount(codes, table['reverted'].to_numpy(zero_copy_only=False), num_groups).astype(int),
+        'failures': np.bincount(codes, ~table['success'].to_numpy(zero_copy_only=False), num_groups).astype(int),
+    }
+    for measure, measure_values in get_measures(table).items():
+        valid = ~np.isnan(measure_values)
+        measure_codes = codes[valid]
+        measure_values = measure_values[valid]
+        columns[f'{measure}_count'] = np.bincount(measure_codes, minlength=num_groups)
+        columns[f'{measure}_sum'] = np.bincount(measure_codes, measure_values, num_groups)
+        columns[f'{measure}_sumsq'] = np.bincount(measure_codes, measure_values * measure_values, num_groups)
+        bins = np.searchsorted(MEASURES[measure], measure_values, side='right')
+        num_bins = len(MEASURES[measure]) + 1
+        histogram = np.bincount(measure_codes * num_bins + bins, minlength=num_groups * num_bins) \
+            .reshape(num_groups, num_bins)
+        columns.update(zip(get_histogram_columns(measure), histogram.T))
+    return pd.concat([index.to_frame(index=False), pd.DataFrame(columns)], axis=1)
+
+def expand_cube(cube, dims):
+    # Adds the derived dimensions in `dims`. A swap counts towards both of its
+    # tokens, like `aggregate.explode()` does.
+    if 'pair' in dims:
+        cube = cube.assign(pair=cube['maker_token'] + '/' + cube['taker_token'])
+    if 'token' in dims:
+        cube = pd.concat([
+            cube.assign(token=cube['maker_token']),
+            cube[cube['maker_token'] != cube['taker_token']].assign(token=cube['taker_token']),
+        ], ignore_index=True)
+    return cube
+
+def rollup_cube(cube, dims):
+    cube = expand_cube(cube, dims)
+    measures = [c for c in cube.columns if c not in DIMENSIONS]
+    return cube.groupby(list(dims), sort=True)[measures].sum().reset_index()
+
+def merge_cubes(*cubes):
+    return rollup_cube(pd.concat(cubes, ignore_index=True), get_cube_dimensions(cubes[0]))
+
+def slice_cube(cube, url=None, buys=False, sells=False, tokens=''):
+    # Same filters as the scripts' `--url`, `--buys`, `--sells` and `--tokens`.
+    mask = np.ones(len(cube), dtype=bool)
+    if url is not None:
+        if 'api_url' not in cube.columns:
+            raise ValueError('cube has no api_url dimension to filter by')
+        mask &= cube['api_url'].str.contains(url, regex=False).to_numpy()
+    if buys:
+        mask &= (cube['side'] == 'buy').to_numpy()
+    if sells:
+        mask &= (cube['side'] == 'sell').to_numpy()
+    tokens = tokens.split(',') if len(tokens) else []
+    if len(tokens) > 0:
+        mask &= (cube['maker_token'].isin(tokens) & cube['taker_token'].isin(tokens)).to_numpy()
+    return cube[mask].reset_index(drop=True)
+
+def get_cube_revert_rates(cube, dims, outcome='reverted'):
+    # Same shape as `aggregate.get_revert_rates()`.
+    rates = rollup_cube(cube, dims)
+    rates = rates[[*dims, 'total', 'reverts' if outcome == 'reverted' else 'failures']]
+    rates.columns = [*dims, 'total', 'reverts']
+    rates['revert rate'] = rates['reverts'] / rates['total']
+    return rates
+
+def get_cube_stats(cube, measure, dims):
+    # Mean, standard deviation and 95% confidence half-width (normal
+    # approximation) of `measure`, or of the rate of an outcome, for every
+    # combination of `dims`.
+    rolled = rollup_cube(cube, dims)
+    if measure in OUTCOMES:
+        count = rolled['total'].to_numpy()
+        sums = squares = rolled[measure].to_numpy()
+    else:
+        count = rolled[f'{measure}_count'].to_numpy()
+        sums = rolled[f'{measure}_sum'].to_numpy()
+        squares = rolled[f'{measure}_sumsq'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums / count
+        var = np.maximum(squares - count * mean * mean, 0) / (count - 1)
+    return pd.DataFrame({
+        **{ dim: rolled[dim] for dim in dims },
+        'count': count,
+        'mean': mean,
+        'std': np.sqrt(var),
+        'ci': 1.96 * np.sqrt(var / count),
+    })
+
+def get_cube_histogram(cube, measure, dims):
+    # (bin edges, rolled up dims, count matrix with one row per combination).
+    rolled = rollup_cube(cube, dims)
+    return MEASURES[measure], rolled[list(dims)], rolled[get_histogram_columns(measure)].to_numpy()
+
+def is_cube(path):
+    return path.endswith('.cube.parquet')
+
+def save_cube(path, cube):
+    cube.to_parquet(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+
+def load_cube(path, dims=CUBE_DIMENSIONS):
+    # Accepts a cube file, an incremental store (which keeps its cube up to
+    # date) or anything `read_table()` reads, in which case the cube is built
+    # on the fly. Stores are read from swaps too if `dims` needs more than
+    # their cube has.
+    if is_cube(path):
+        cube = pd.read_parquet(path)
+        missing = set(dims) - set(get_cube_dimensions(cube))
+        if len(missing):
+            raise ValueError(f'{path} has no {", ".join(sorted(missing))} dimension, read the swaps instead')
+        return cube
+    if os.path.isdir(path) and set(dims) <= set(CUBE_DIMENSIONS):
+        state = load_state(path)
+        if state is not None and state.get('cube'):
+            return pd.read_parquet(os.path.join(path, state['cube']['file']))
+    return build_cube(read_table(path, CUBE_COLUMNS), dims)
+
+def update_store_cube(store):
+    # Folds the parts of an incremental store that were ingested since the
+    # last update into its cube. Like parts, cubes are named by the byte
+    # offset they cover up to, so a crash never double counts a part. The
+    # leading '_' keeps parquet from reading them as parts.
+    state = load_state(store)
+    covered = state.get('cube') or { 'file': None, 'end': 0 }
+    parts = [p for p in state['parts'] if p['start'] >= covered['end']]
+    if not len(parts):
+        return False
+    cubes = [build_cube(read_table(os.path.join(store, p['file']), CUBE_COLUMNS)) for p in parts]
+    if covered['file'] is not None:
+        # Rolled up in case it was written with other dimensions.
+        cubes.insert(0, rollup_cube(pd.read_parquet(os.path.join(store, covered['file'])), CUBE_DIMENSIONS))
+    end = parts[-1]['end']
+    file = f'_cube-{end:016d}.parquet'
+    save_cube(os.path.join(store, file), merge_cubes(*cubes))
+    state['cube'] = { 'file': file, 'end': end }
+    save_state(store, state)
+    if covered['file'] is not None and covered['file'] != file:
+        os.remove(os.path.join(store, covered['file']))
+    return True
@@ -0,0 +1,65 @@
+import numpy as np
+import pyarrow.compute as pc
+
+# Order/source participants and the list field each one is read from.
+ENTITY_FIELDS = {
+    'maker': ('orders', 'maker_address'),
+    'fee_recipient': ('orders', 'fee_recipient_address'),
+    'sender': ('orders', 'sender_address'),
+    'source': ('sources', 'name'),
+}
+
+def get_list_field(table, column, field):
+    return (
+        pc.list_parent_indices(table[column]).to_numpy(),
+        pc.struct_field(pc.list_flatten(table[column]), field).to_numpy(zero_copy_only=False),
+    )
+
+def index_entities(swaps, values):
+    # Builds a CSR-style posting list: the swap rows of `keys[i]` are
+    # `rows[offsets[i]:offsets[i + 1]]`, sorted and without duplicates.
+    keys, codes = np.unique(values.astype(str), return_inverse=True)
+    # Sorting (key, swap) pairs also dedupes swaps with several orders from
+    # the same entity.
+    pairs = np.unique(codes.astype(np.int64) * (swaps.max(initial=0) + 1) + swaps)
+    codes, rows = np.divmod(pairs, swaps.max(initial=0) + 1)
+    offsets = np.searchsorted(codes, np.arange(len(keys) + 1))
+    return { 'keys': keys, 'offsets': offsets, 'rows': rows }
+
+def build_entity_index(table, entities=None):
+    # Inverted index of entity -> swap rows for every entity whose list
+    # column is present in `table`.
+    index = {}
+    for entity, (column, field) in ENTITY_FIELDS.items():
+        if entities is not None and entity not in entities:
+            continue
+        if column not in table.column_names:
+            continue
+        index[entity] = index_entities(*get_list_field(table, column, field))
+    return index
+
+def build_child_index(children, entities):
+    # Same as `build_entity_index()`, from a child table of the swaps (see
+    # `child_tables.py`) that has the entities' fields.
+    return {
+        entity: index_entities(
+            children['swap'].to_numpy(),
+            children[ENTITY_FIELDS[entity][1]].to_numpy(zero_copy_only=False),
+        ) for entity in entities
+    }
+
+def get_entity_rows(index, entity, key):
+    postings = index[entity]
+    i = np.searchsorted(postings['keys'], key)
+    if i == len(postings['keys']) or postings['keys'][i] != key:
+        return postings['rows'][:0]
+    return postings['rows'][postings['offsets'][i]:postings['offsets'][i + 1]]
+
+def get_entity_counts(index, entity):
+    postings = index[entity]
+    return dict(zip(postings['keys'].tolist(), np.diff(postings['offsets']).tolist()))
+
+def get_entity_pairs(index, entity):
+    # (swap rows, keys) for every posting, i.e. the exploded form.
+    postings = index[entity]
+    return postings['rows'], np.repeat(postings['keys'], np.diff(postings['offsets']))
@@ -1,5 +1,6 @@
 import json
 import argparse
+from utils import iter_data
 
 def get_program_args():
     args = argparse.ArgumentParser()
@@ -7,15 +8,10 @@ def get_program_args():
     args.add_argument('input', type=str)
     return args.parse_args()
 
-def load_data(path):
-    with open(path) as f:
-        return [json.loads(line) for line in  f.readlines()]
+def is_allowed_swap(swap):
+    return swap['metadata']['makerToken'] in args.tokens \
+        and swap['metadata']['takerToken'] in args.tokens
 
 args = get_program_args()
-data = [
-    d for d in load_data(args.input)
-    if d['metadata']['makerToken'] in args.tokens
-    and d['metadata']['takerToken'] in args.tokens
-]
-for d in data:
+for d in iter_data(args.input, predicate=is_allowed_swap):
     print(json.dumps(d))
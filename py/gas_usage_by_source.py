@@ -5,7 +5,10 @@ import json
 import argparse
 import itertools
 import pandas as pd
-from utils import VALUES, load_data, get_max_value, format_value, is_successful_swap
+from utils import VALUES, format_value, get_max_values, get_value_buckets
+from swap_store import read_table
+from source_sets import build_source_sets, get_single_sources
+from attribution import get_attribution
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -14,26 +17,42 @@ def get_program_args():
     args = argparse.ArgumentParser()
     args.add_argument('path', type=str)
     args.add_argument('--url', type=str)
+    args.add_argument('--weighted', action='store_true', help='split multi-source swaps across their sources by proportion instead of only using single-source swaps')
     return args.parse_args()
 
 args = get_program_args()
-data = [d for d in load_data(args.path, args.url) if len(d['sources']) == 1 and is_successful_swap(d)]
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, ['sources', 'fill_value', 'gas_used', 'success'], args.url)
+table = table.filter(table['success'])
+source_sets = build_source_sets(table)
+gas_used = table['gas_used'].to_numpy(zero_copy_only=False).astype(float)
+fill_values = table['fill_value'].to_numpy()
 
-sources = sorted(set(d['sources'][0]['name'] for d in data))
+if args.weighted:
+    print(f'Loaded {table.num_rows} data items')
+    df = get_attribution(
+        source_sets,
+        gas_used,
+        get_value_buckets(fill_values),
+        [*(max_value for min_value, max_value in VALUES), float('inf')],
+    ).rename(columns={ 'group': 'swap value', 'mean': 'gas used' })
+    counts_by_source = df.groupby('source')['weight'].sum()
+else:
+    single_source_names = get_single_sources(source_sets)
+    is_single_source = single_source_names != None
+    print(f'Loaded {is_single_source.sum()} data items')
+    df = pd.DataFrame({
+        'source': single_source_names[is_single_source],
+        'gas used': gas_used[is_single_source],
+        'swap value': get_max_values(fill_values[is_single_source]),
+    })
+    counts_by_source = df['source'].value_counts()
+
+sources = sorted(counts_by_source.index)
 sns.catplot(
     x='source',
     y='gas used',
     hue='swap value',
-    data=pd.DataFrame([
-            [
-                d['sources'][0]['name'],
-                d['metadata']['swapResult']['gasUsed'],
-                get_max_value(d)
-            ] for d in data
-        ],
-        columns=['source', 'gas used', 'swap value'],
-    ),
+    data=df,
     kind='bar',
     order=sources,
     legend=True,
@@ -45,8 +64,11 @@ for t, (min_value, max_value) in zip(plt.gca().get_legend().texts, VALUES):
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y / 1e3)}K'))
 plt.xticks(
     list(range(len(sources))),
-    ['%s (%d)' % (source, sum(1 for d in data if d['sources'][0]['name'] == source)) for source in sources],
+    ['%s (%d)' % (source, counts_by_source[source]) for source in sources],
 )
-plt.title(f'Gas used by source ({len(data)} single-source swaps)')
+if args.weighted:
+    plt.title(f'Gas used by source ({table.num_rows} swaps, split by source proportion)')
+else:
+    plt.title(f'Gas used by source ({len(df)} single-source swaps)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
 plt.show()
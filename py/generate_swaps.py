@@ -0,0 +1,19 @@
+import argparse
+import os
+import time
+from synthetic import write_swaps
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('output', type=str, help='JSONL file to write')
+    args.add_argument('--swaps', '-n', type=int, default=10000, help='number of swaps (lines) to write')
+    args.add_argument('--seed', type=int, default=1)
+    args.add_argument('--api', type=str, action='append', help='api to quote from, one swap per api for every quote. Can be repeated. Default is A and B.')
+    args.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, help='number of generator processes')
+    return args.parse_args()
+
+args = get_program_args()
+started = time.time()
+write_swaps(args.output, args.swaps, args.seed, args.api or ['A', 'B'], args.jobs)
+seconds = time.time() - started
+print(f'Wrote {args.swaps} swaps to {args.output} in {seconds:.1f}s ({args.swaps / seconds:.0f} swaps/s)')
@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+import pyarrow.parquet as pq
+from swap_store import SCHEMA, to_batches, write_store
+from utils import parse_json, get_api_url
+
+STATE_FILE = '_state.json'
+CHUNK_SIZE = 64 * 1024 * 1024
+
+def get_state_path(store):
+    return os.path.join(store, STATE_FILE)
+
+def load_state(store):
+    try:
+        with open(get_state_path(store)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_state(store, state):
+    # Write-then-rename so a crash never leaves a half-written checkpoint.
+    path = get_state_path(store)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+def create_state(path, url=None):
+    stat = os.stat(path)
+    return {
+        'source': os.path.abspath(path),
+        'url': url,
+        'inode': stat.st_ino,
+        'offset': 0,
+        'swaps': 0,
+        'malformed': 0,
+        'parts': [],
+    }
+
+def read_complete_lines(f, start, end):
+    # Yields (offset, line) for every newline-terminated line in [start, end).
+    # A trailing line without a newline is a write still in progress and is
+    # left for the next run.
+    f.seek(start)
+    offset = start
+    pending = b''
+    while offset + len(pending) < end:
+        chunk = f.read(min(CHUNK_SIZE, end - offset - len(pending)))
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            yield offset, line
+            offset += len(line) + 1
+
+def parse_new_swaps(path, state, url=None):
+    with open(path, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size
+        for offset, line in read_complete_lines(f, state['offset'], end):
+            state['offset'] = offset + len(line) + 1
+            if not line.strip():
+                continue
+            try:
+                swap = parse_json(line)
+            except ValueError:
+                state['malformed'] += 1
+                print(f'Skipping malformed line at byte {offset}', file=sys.stderr)
+                continue
+            if url is not None and url not in get_api_url(swap):
+                continue
+            state['swaps'] += 1
+            yield swap
+
+def ingest_new(path, store, url=None):
+    os.makedirs(store, exist_ok=True)
+    state = load_state(store)
+    if state is None:
+        state = create_state(path, url)
+    # Older stores kept per-bucket totals here, which the cube replaces.
+    state.pop('aggregates', None)
+    if state.get('url') != url:
+        raise ValueError(f'{store} was ingested with --url {state.get("url")}, not {url}')
+    stat = os.stat(path)
+    if stat.st_ino != state['inode'] or stat.st_size < state['offset']:
+        raise ValueError(f'{path} was replaced or truncated since the last ingest of {store}')
+    if len(state['parts']) and not pq.read_schema(os.path.join(store, state['parts'][0]['file'])).equals(SCHEMA):
+        raise ValueError(f'{store} was written with different columns, ingest into a new store')
+    start = state['offset']
+    if stat.st_size == start:
+        return 0, state
+    # Parts are named by the byte offset they start at, so rerunning after a
+    # crash overwrites the orphaned part instead of duplicating it.
+    part = f'part-{start:016d}.parquet'
+    count = write_store(os.path.join(store, part), to_batches(parse_new_swaps(path, state, url)))
+    if count:
+        state['parts'].append({ 'file': part, 'start': start, 'end': state['offset'], 'swaps': count })
+    else:
+        os.remove(os.path.join(store, part))
+    save_state(store, state)
+    return count, state
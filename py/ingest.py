@@ -0,0 +1,48 @@
+import argparse
+import time
+from swap_store import BATCH_SIZE, iter_batches, read_log, read_table, write_store
+from incremental import ingest_new
+from sql_store import connect, insert_table
+from cube import CUBE_COLUMNS, build_cube, save_cube, update_store_cube
+from child_tables import CHILD_TABLES, write_child_tables, update_store_child_tables
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('path', type=str)
+    args.add_argument('output', type=str, help='parquet file (or directory, with --incremental) to write')
+    args.add_argument('--url', type=str)
+    args.add_argument('--incremental', action='store_true', help='only ingest lines appended since the last run')
+    args.add_argument('--follow', type=float, help='keep ingesting new lines every N seconds (implies --incremental)')
+    args.add_argument('--cube', type=str, help='also write a pre-aggregated cube (.cube.parquet) to this file. Incremental stores always keep one.')
+    args.add_argument('--sqlite', type=str, help='also append the swaps to this SQLite database (.db)')
+    args.add_argument('--jobs', '-j', type=int, help='number of parser processes. Default is one per core for large files.')
+    return args.parse_args()
+
+args = get_program_args()
+if args.incremental or args.follow:
+    while True:
+        started = time.time()
+        count, state = ingest_new(args.path, args.output, args.url)
+        update_store_cube(args.output)
+        update_store_child_tables(args.output)
+        print(f'Ingested {count} new swaps ({state["swaps"]} total, {state["malformed"]} malformed) in {time.time() - started:.1f}s')
+        if not args.follow:
+            break
+        time.sleep(args.follow)
+else:
+    started = time.time()
+    if args.jobs == 1:
+        batches = iter_batches(args.path, args.url)
+    else:
+        batches = read_log(args.path, url=args.url, workers=args.jobs).to_batches(BATCH_SIZE)
+    count = write_store(args.output, batches)
+    write_child_tables(args.output, read_table(args.output, sorted(set(c for columns, _ in CHILD_TABLES.values() for c in columns))))
+    print(f'Ingested {count} swaps into {args.output} in {time.time() - started:.1f}s')
+    if args.sqlite:
+        conn = connect(args.sqlite)
+        insert_table(conn, read_table(args.output))
+        conn.close()
+        print(f'Wrote swaps to {args.sqlite}')
+    if args.cube:
+        save_cube(args.cube, build_cube(read_table(args.output, CUBE_COLUMNS)))
+        print(f'Wrote cube to {args.cube}')
@@ -0,0 +1,24 @@
+import argparse
+import pandas as pd
+from sketches import QUANTILES, load_sketches, merge_sketches, rollup_sketches, get_quantiles
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('paths', type=str, nargs='+', help='output files, stores or saved .sketch.parquet files to merge')
+    args.add_argument('--by', type=str, default='api,value', help='comma-separated dimensions to group by')
+    args.add_argument('--measure', '-m', type=str, action='append', help='gas_used, slippage or response_time. Can be repeated. Defaults to all.')
+    args.add_argument('--save', type=str, help='also save the merged sketches to this .sketch.parquet file')
+    return args.parse_args()
+
+args = get_program_args()
+dims = args.by.split(',')
+sketches = rollup_sketches(merge_sketches(*(load_sketches(path, dims) for path in args.paths)), dims)
+print(f'Loaded {len(sketches)} sketch buckets')
+if args.save:
+    sketches.to_parquet(args.save, index=False)
+
+pd.set_option('display.width', 200)
+for measure in args.measure or ['gas_used', 'slippage', 'response_time']:
+    quantiles = get_quantiles(sketches, measure, QUANTILES)
+    print(f'\n{measure}:')
+    print(quantiles.to_string(index=False))
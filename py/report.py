@@ -0,0 +1,106 @@
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+import argparse
+import contextlib
+import io
+import json
+import os
+import runpy
+import shlex
+import sys
+import time
+import traceback
+import warnings
+import pandas as pd
+from swap_store import preload_table
+from analyses import ANALYSES
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('path', type=str)
+    args.add_argument('output', type=str, help='directory to write the report to')
+    args.add_argument(
+        '--analysis', '-a',
+        type=str,
+        action='append',
+        help='analysis to run, with optional arguments, e.g. "revert_rate_by_source --only Kyber". Can be repeated. Defaults to all.',
+    )
+    args.add_argument('--format', '-f', type=str, action='append', help='figure format (png, svg, ...). Can be repeated. Default is png.')
+    args.add_argument('--max-rows', type=int, default=10000, help='skip writing result tables longer than this')
+    return args.parse_args()
+
+def get_tables(scope, max_rows):
+    # Result frames are whatever pandas objects the script left at the top
+    # level, minus raw per-swap data.
+    return {
+        name: value for name, value in scope.items()
+            if isinstance(value, (pd.DataFrame, pd.Series))
+                and not name.startswith('_')
+                and len(value) <= max_rows
+    }
+
+def run_analysis(name, path, script_args, output, formats, max_rows):
+    plt.close('all')
+    stdout = io.StringIO()
+    result = { 'analysis': name, 'args': script_args, 'figures': [], 'tables': [], 'error': None }
+    started = time.time()
+    argv = sys.argv
+    sys.argv = [os.path.join(SCRIPT_DIR, f'{name}.py'), path, *script_args]
+    try:
+        with contextlib.redirect_stdout(stdout), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            scope = runpy.run_path(sys.argv[0], run_name='__main__')
+    except (Exception, SystemExit) as e:
+        scope = {}
+        result['error'] = ''.join(traceback.format_exception_only(type(e), e)).strip()
+    finally:
+        sys.argv = argv
+    result['seconds'] = time.time() - started
+    result['output'] = stdout.getvalue().splitlines()
+    for i, num in enumerate(plt.get_fignums()):
+        suffix = '' if i == 0 else f'-{i}'
+        for fmt in formats:
+            file = f'{name}{suffix}.{fmt}'
+            plt.figure(num).savefig(os.path.join(output, file), bbox_inches='tight')
+            result['figures'].append(file)
+    plt.close('all')
+    for table_name, table in get_tables(scope, max_rows).items():
+        file = f'{name}-{table_name}.csv'
+        table.to_csv(os.path.join(output, file))
+        result['tables'].append(file)
+    with open(os.path.join(output, f'{name}.json'), 'w') as f:
+        json.dump(result, f, indent=2)
+    return result
+
+args = get_program_args()
+os.makedirs(args.output, exist_ok=True)
+sys.path.insert(0, SCRIPT_DIR)
+
+started = time.time()
+print(f'Loaded {preload_table(args.path).num_rows} data items')
+load_seconds = time.time() - started
+
+results = []
+for analysis in args.analysis or ANALYSES:
+    name, *script_args = shlex.split(analysis)
+    if name not in ANALYSES:
+        raise ValueError(f'unknown analysis: {name}')
+    result = run_analysis(name, args.path, script_args, args.output, args.format or ['png'], args.max_rows)
+    status = 'failed: ' + result['error'] if result['error'] else f'{len(result["figures"]) + len(result["tables"])} files'
+    print(f'{analysis}: {status} ({result["seconds"]:.1f}s)')
+    results.append(result)
+
+with open(os.path.join(args.output, 'report.json'), 'w') as f:
+    json.dump({
+        'path': args.path,
+        'load_seconds': load_seconds,
+        'seconds': time.time() - started,
+        'analyses': [
+            { k: r[k] for k in ('analysis', 'args', 'seconds', 'figures', 'tables', 'error') }
+                for r in results
+        ],
+    }, f, indent=2)
+print(f'Wrote report to {args.output} in {time.time() - started:.1f}s')
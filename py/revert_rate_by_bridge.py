@@ -0,0 +1,63 @@
+import matplotlib.ticker as ticker
+from matplotlib import pyplot as plt
+import seaborn as sns
+import argparse
+import pandas as pd
+from utils import DELAYS
+from swap_store import read_table
+from child_tables import read_child_table
+from aggregate import get_columns, get_revert_rates, complete_revert_rates
+from entity_index import index_entities, get_entity_counts
+from asset_data import get_order_assets
+
+sns.set(color_codes=True)
+sns.set_palette('muted')
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('path', type=str)
+    args.add_argument('--url', type=str)
+    args.add_argument('--side', type=str, choices=['maker', 'taker'], default='maker', help='asset data to decode')
+    return args.parse_args()
+
+args = get_program_args()
+table = read_table(args.path, get_columns(['delay']), args.url)
+orders = read_child_table(args.path, 'orders', ['swap', f'{args.side}_asset_data'], args.url)
+sources = read_child_table(args.path, 'sources', ['swap', 'name', 'proportion'], args.url)
+print(f'Loaded {table.num_rows} data items')
+
+assets = get_order_assets(orders, sources, args.side)
+breakdown = assets.groupby(['source', 'bridge', 'token'], observed=True, dropna=False).agg(
+    orders=('swap', 'size'),
+    swaps=('swap', 'nunique'),
+)
+print(breakdown.reset_index().to_string(index=False))
+
+# Swaps by the source of their orders, named from the decoded bridges.
+assets = assets[assets['source'].notna()]
+index = { 'source': index_entities(assets['swap'].to_numpy(), assets['source'].to_numpy(dtype=object)) }
+counts_by_source = get_entity_counts(index, 'source')
+all_sources = sorted(counts_by_source)
+rates = complete_revert_rates(
+    get_revert_rates(table, ['source', 'delay'], index=index),
+    { 'source': all_sources, 'delay': [min_delay for min_delay, max_delay in DELAYS] },
+)
+
+sns.catplot(
+    x='source',
+    y='revert rate',
+    hue='delay',
+    data=pd.DataFrame({
+        'source': [f'{s} ({counts_by_source[s]})' for s in rates['source']],
+        'delay': [f'{min_delay}s' for min_delay in rates['delay']],
+        'revert rate': rates['revert rate'],
+    }),
+    kind='bar',
+    legend=True,
+    legend_out=False,
+)
+
+plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y * 100)}%'))
+plt.title(f'Revert rate by order source (from {args.side} asset data) and delay ({table.num_rows} swaps)')
+plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
+plt.show()
@@ -3,9 +3,11 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import json
 import argparse
-import itertools
-import pandas as pd
-from utils import DELAYS, load_data
+from utils import DELAYS
+from swap_store import read_table
+from aggregate import get_columns, get_revert_rates, complete_revert_rates
+from entity_index import build_child_index, get_entity_counts
+from child_tables import read_child_table
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -17,39 +19,23 @@ def get_program_args():
     return args.parse_args()
 
 args = get_program_args()
-data = load_data(args.path, args.url)
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, get_columns(['delay']), args.url)
+orders = read_child_table(args.path, 'orders', ['swap', 'fee_recipient_address'], args.url)
+print(f'Loaded {table.num_rows} data items')
 
-fee_recipients = sorted(set(
-    o['feeRecipientAddress'] for o in itertools.chain(*(d['orders'] for d in data))
-))
-swaps_by_fee_recipient = {
-    fee_recipient: [
-        d for d in data
-        if fee_recipient in set(o['feeRecipientAddress'] for o in d['orders'])
-    ] for fee_recipient in fee_recipients
-}
+index = build_child_index(orders, ['fee_recipient'])
+counts_by_fee_recipient = get_entity_counts(index, 'fee_recipient')
+fee_recipients = sorted(counts_by_fee_recipient)
+rates = complete_revert_rates(
+    get_revert_rates(table, ['fee_recipient', 'delay'], index=index),
+    { 'fee_recipient': fee_recipients, 'delay': [min_delay for min_delay, max_delay in DELAYS] },
+)
 
 sns.catplot(
     x='fee recipient',
     y='revert rate',
     hue='delay',
-    data=pd.DataFrame([
-            [
-                fr,
-                min_delay,
-                sum(1 for d in swaps_by_fee_recipient[fr]
-                    if d['metadata']['swapResult']['revertData'] != '0x'
-                    and d['metadata']['fillDelay'] >= min_delay
-                    and d['metadata']['fillDelay'] < max_delay
-                ) / max(1, sum(1 for d in swaps_by_fee_recipient[fr]
-                    if d['metadata']['fillDelay'] >= min_delay
-                    and d['metadata']['fillDelay'] < max_delay
-                )),
-            ] for fr, (min_delay, max_delay) in itertools.product(fee_recipients, DELAYS)
-        ],
-        columns=['fee recipient', 'delay', 'revert rate'],
-    ),
+    data=rates.rename(columns={ 'fee_recipient': 'fee recipient' })[['fee recipient', 'delay', 'revert rate']],
     kind='bar',
     legend=True,
     legend_out=False,
@@ -57,13 +43,9 @@ sns.catplot(
 
 for t, (min_delay, max_delay) in zip(plt.gca().get_legend().texts, DELAYS):
     t.set_text(f'{min_delay}s')
-counts_by_fee_recipient = {
-    fee_recipient: len(swaps_by_fee_recipient[fee_recipient])
-        for fee_recipient in fee_recipients
-}
 plt.xticks(plt.xticks()[0], [f'{fr[0:8]}... ({counts_by_fee_recipient[fr]})' for fr in fee_recipients])
 
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y * 100)}%'))
-plt.title(f'Revert rate by fee recipient and delay ({len(data)} swaps)')
+plt.title(f'Revert rate by fee recipient and delay ({table.num_rows} swaps)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
 plt.show()
@@ -3,9 +3,11 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import json
 import argparse
-import itertools
-import pandas as pd
-from utils import DELAYS, load_data
+from utils import DELAYS
+from swap_store import read_table
+from aggregate import get_columns, get_revert_rates, complete_revert_rates
+from entity_index import build_child_index, get_entity_counts
+from child_tables import read_child_table
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -17,42 +19,28 @@ def get_program_args():
     return args.parse_args()
 
 args = get_program_args()
-data = load_data(args.path, args.url)
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, get_columns(['delay']), args.url)
+orders = read_child_table(args.path, 'orders', ['swap', 'maker_address', 'fee_recipient_address'], args.url)
+print(f'Loaded {table.num_rows} data items')
 
-makers = sorted(set(
-    o['makerAddress'] for o in itertools.chain(*(d['orders'] for d in data))
-))
-swaps_by_maker = {
-    maker: [
-        d for d in data
-        if maker in set(o['makerAddress'] for o in d['orders'])
-    ] for maker in makers
-}
+index = build_child_index(orders, ['maker'])
+counts_by_maker = get_entity_counts(index, 'maker')
 # Prune low count makers
-makers = [m for m in makers if len(swaps_by_maker[m]) / len(data) >= 0.01]
-print({ m: [o['feeRecipientAddress'] for o in swaps_by_maker[m][0]['orders'] if o['makerAddress'] == m][0] for m in makers })
+makers = [m for m in sorted(counts_by_maker) if counts_by_maker[m] / table.num_rows >= 0.01]
+fee_recipient_by_maker = orders.to_pandas() \
+    .drop_duplicates('maker_address').set_index('maker_address')['fee_recipient_address']
+print({ m: fee_recipient_by_maker[m] for m in makers })
+
+rates = complete_revert_rates(
+    get_revert_rates(table, ['maker', 'delay'], index=index),
+    { 'maker': makers, 'delay': [min_delay for min_delay, max_delay in DELAYS] },
+)
 
 sns.catplot(
     x='maker',
     y='revert rate',
     hue='delay',
-    data=pd.DataFrame([
-            [
-                fr,
-                min_delay,
-                sum(1 for d in swaps_by_maker[fr]
-                    if d['metadata']['swapResult']['revertData'] != '0x'
-                    and d['metadata']['fillDelay'] >= min_delay
-                    and d['metadata']['fillDelay'] < max_delay
-                ) / max(1, sum(1 for d in swaps_by_maker[fr]
-                    if d['metadata']['fillDelay'] >= min_delay
-                    and d['metadata']['fillDelay'] < max_delay
-                )),
-            ] for fr, (min_delay, max_delay) in itertools.product(makers, DELAYS)
-        ],
-        columns=['maker', 'delay', 'revert rate'],
-    ),
+    data=rates[['maker', 'delay', 'revert rate']],
     kind='bar',
     legend=True,
     legend_out=False,
@@ -60,13 +48,9 @@ sns.catplot(
 
 for t, (min_delay, max_delay) in zip(plt.gca().get_legend().texts, DELAYS):
     t.set_text(f'{min_delay}s')
-counts_by_maker = {
-    maker: len(swaps_by_maker[maker])
-        for maker in makers
-}
 plt.xticks(plt.xticks()[0], [f'{fr[0:8]}... ({counts_by_maker[fr]})' for fr in makers])
 
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y * 100)}%'))
-plt.title(f'Revert rate by maker and delay ({len(data)} swaps)')
+plt.title(f'Revert rate by maker and delay ({table.num_rows} swaps)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
 plt.show()
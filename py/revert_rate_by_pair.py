@@ -3,16 +3,13 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import json
 import argparse
-import itertools
-import pandas as pd
-from utils import DELAYS, load_data, is_successful_swap
+from utils import DELAYS, add_error_bars
+from aggregate import complete_revert_rates
+from cube import CUBE_DIMENSIONS, load_cube, slice_cube, get_cube_revert_rates, get_cube_stats
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
 
-def get_pair(swap):
-    return '%s/%s' % (swap['metadata']['makerToken'], swap['metadata']['takerToken'])
-
 def get_program_args():
     args = argparse.ArgumentParser()
     args.add_argument('path', type=str)
@@ -20,47 +17,35 @@ def get_program_args():
     return args.parse_args()
 
 args = get_program_args()
-data = load_data(args.path, args.url)
-print(f'Loaded {len(data)} data items')
+dims = CUBE_DIMENSIONS if args.url is None else [*CUBE_DIMENSIONS, 'api_url']
+cube = slice_cube(load_cube(args.path, dims), url=args.url)
+num_swaps = cube['total'].sum()
+print(f'Loaded {num_swaps} data items')
 
-pairs = sorted(set(get_pair(d) for d in data))
+pairs = list(get_cube_revert_rates(cube, ['pair'])['pair'])
 print(f'Found {len(pairs)} pairs')
 
-swap_by_pair = {
-    p: [
-        d for d in data if get_pair(d) == p
-    ] for p in pairs
-}
+delays = [min_delay for min_delay, max_delay in DELAYS]
+rates = complete_revert_rates(
+    get_cube_stats(cube, 'failures', ['pair', 'delay']),
+    { 'pair': pairs, 'delay': delays },
+).fillna(0).rename(columns={ 'mean': 'revert rate' })
 
-sns.catplot(
+grid = sns.catplot(
     x='pair',
     y='revert rate',
     hue='delay',
-    data=pd.DataFrame([
-            [
-                pair,
-                min_delay,
-                sum(1 for s in swap_by_pair[pair]
-                    if not is_successful_swap(s)
-                    and s['metadata']['fillDelay'] >= min_delay
-                    and s['metadata']['fillDelay'] < max_delay
-                ) / max(1, sum(1 for s in swap_by_pair[pair]
-                    if s['metadata']['fillDelay'] >= min_delay
-                    and s['metadata']['fillDelay'] < max_delay
-                )),
-            ] for pair, (min_delay, max_delay) in itertools.product(pairs, DELAYS)
-        ],
-        columns=['pair', 'delay', 'revert rate'],
-    ),
+    data=rates[['pair', 'delay', 'revert rate']],
     kind='bar',
     legend_out=False,
     legend=True,
 )
+add_error_bars(grid.ax, rates['ci'].to_numpy().reshape(len(pairs), len(delays)))
 
 for t, (min_delay, max_delay) in zip(plt.gca().get_legend().texts, DELAYS):
     t.set_text(f'{min_delay}s')
 plt.xticks(list(range(len(pairs))), pairs)
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y * 100)}%'))
-plt.title(f'Revert rate by pair and delay ({len(data)} swaps)')
+plt.title(f'Revert rate by pair and delay ({num_swaps} swaps)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
 plt.show()
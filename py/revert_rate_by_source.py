@@ -3,9 +3,12 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import json
 import argparse
-import itertools
 import pandas as pd
-from utils import DELAYS, load_data, is_successful_swap, get_min_delay
+from utils import DELAYS, get_delay_buckets
+from swap_store import read_table
+from aggregate import get_columns, get_revert_rates, complete_revert_rates
+from source_sets import build_source_sets, get_source_counts, has_only_source
+from attribution import get_attribution
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -17,56 +20,57 @@ def get_program_args():
     args.add_argument('--includes', action='append')
     args.add_argument('--exclusive', action='store_true')
     args.add_argument('--only', type=str)
+    args.add_argument('--weighted', action='store_true', help='count swaps towards each of their sources by proportion instead of fully')
     return args.parse_args()
 
 args = get_program_args()
-data = load_data(args.path, args.url)
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, get_columns(['source', 'delay']), args.url)
+print(f'Loaded {table.num_rows} data items')
 
-def is_allowed_source(s, all_sources):
-    if args.only:
-        return s == args.only and set(all_sources) == set([s])
-    if args.exclusive:
-        return s in all_sources and len(all_sources) == 1
-    return args.includes is None or s in args.includes
-
-counts_by_delay_by_source = {}
-revert_rate_by_delay_by_source = {}
-totals_by_source = {}
-all_sources = set()
-for d in data:
-    delay = get_min_delay(d)
-    counts_by_source = counts_by_delay_by_source[delay] = counts_by_delay_by_source.get(delay, {})
-    revert_rate_by_source = revert_rate_by_delay_by_source[delay] = revert_rate_by_delay_by_source.get(delay, {})
-    sources = [s['name'] for s in d['sources']]
-    for s in (s for s in sources if is_allowed_source(s, sources)):
-        all_sources.add(s)
-        totals_by_source[s] = totals_by_source.get(s, 0) + 1
-        counts = counts_by_source[s] = counts_by_source.get(s, {'reverts': 0, 'total': 0})
-        counts['total'] += 1
-        if d['metadata']['swapResult']['revertData'] != '0x':
-            counts['reverts'] += 1
-        revert_rate_by_source[s] = counts['reverts'] / counts['total']
+source_sets = build_source_sets(table)
+where = None
+if args.only:
+    where = has_only_source(source_sets, args.only)
+elif args.exclusive:
+    where = get_source_counts(source_sets['masks']) == 1
+if args.weighted:
+    reverted = table['reverted'].to_numpy(zero_copy_only=False)
+    totals_by_source = get_attribution(source_sets, reverted, where=where).set_index('source')['weight']
+    rates = get_attribution(
+        source_sets,
+        reverted,
+        get_delay_buckets(table['fill_delay'].to_numpy()),
+        [min_delay for min_delay, max_delay in DELAYS],
+        where,
+    ).rename(columns={ 'group': 'delay', 'mean': 'revert rate', 'weight': 'total' })
+else:
+    totals_by_source = get_revert_rates(table, ['source'], where=where).set_index('source')['total']
+    rates = get_revert_rates(table, ['source', 'delay'], where=where)
+if args.only:
+    totals_by_source = totals_by_source[totals_by_source.index == args.only]
+elif args.includes is not None and not args.exclusive:
+    totals_by_source = totals_by_source[totals_by_source.index.isin(args.includes)]
+all_sources = list(totals_by_source.index)
+rates = complete_revert_rates(
+    rates,
+    { 'source': all_sources, 'delay': [min_delay for min_delay, max_delay in DELAYS] },
+)
 
 sns.catplot(
     x='source',
     y='revert rate',
     hue='delay',
-    data=pd.DataFrame([
-            [
-                f'{s} ({totals_by_source[s]})',
-                f'{min_delay}s',
-                revert_rate_by_delay_by_source.get(min_delay, {}).get(s, 0),
-            ] for s, (min_delay, max_delay) in itertools.product(all_sources, DELAYS)
-        ],
-        columns=['source', 'delay', 'revert rate'],
-    ),
+    data=pd.DataFrame({
+        'source': [f'{s} ({totals_by_source[s]:.0f})' for s in rates['source']],
+        'delay': [f'{min_delay}s' for min_delay in rates['delay']],
+        'revert rate': rates['revert rate'],
+    }),
     kind='bar',
     legend=True,
     legend_out=False,
 )
 
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y * 100)}%'))
-plt.title(f'Revert rate by ({"exclusive" if args.only or args.exclusive else "included"}) source and delay ({len(data)} swaps)')
+plt.title(f'Revert rate by ({"exclusive" if args.only or args.exclusive else "weighted" if args.weighted else "included"}) source and delay ({table.num_rows} swaps)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
 plt.show()
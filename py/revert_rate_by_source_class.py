@@ -3,9 +3,11 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import json
 import argparse
-import itertools
 import pandas as pd
-from utils import DELAYS, load_data
+from utils import DELAYS
+from swap_store import read_table
+from aggregate import get_columns, get_revert_rates, complete_revert_rates
+from source_sets import SOURCE_CLASSES, build_source_sets, get_source_classes
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -17,46 +19,34 @@ def get_program_args():
     return args.parse_args()
 
 args = get_program_args()
-data = load_data(args.path, args.url)
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, get_columns(['source', 'delay']), args.url)
+print(f'Loaded {table.num_rows} data items')
 
-sources = ['0x', 'bridge', 'native-mix', 'bridge-mix']
-metadata_by_source = {
-    s: [
-        d['metadata'] for d in data
-            if set(s['name'] for s in d['sources']) == set([s])
-            or (s == 'bridge' and len(d['sources']) == 1 and d['sources'][0]['name'] != '0x')
-            or (s == 'native-mix' and len(d['sources']) > 1 and '0x' in [s['name'] for s in d['sources']])
-            or (s == 'bridge-mix' and len(d['sources']) > 1 and '0x' not in [s['name'] for s in d['sources']])
-    ] for s in sources
-}
+classes = get_source_classes(build_source_sets(table))
+counts_by_class = { c: int((classes == c).sum()) for c in SOURCE_CLASSES }
+rates = complete_revert_rates(
+    pd.concat([
+        get_revert_rates(table, ['delay'], where=classes == c).assign(source=c)
+            for c in SOURCE_CLASSES
+    ]),
+    { 'source': SOURCE_CLASSES, 'delay': [min_delay for min_delay, max_delay in DELAYS] },
+)
 
 sns.catplot(
     x='source',
     y='revert rate',
     hue='delay',
-    data=pd.DataFrame([
-            [
-                f'{s} ({len(metadata_by_source[s])})',
-                f'{min_delay}s',
-                sum(1 for m in metadata_by_source[s]
-                    if m['swapResult']['revertData'] != '0x'
-                    and m['fillDelay'] >= min_delay
-                    and m['fillDelay'] < max_delay
-                ) / max(1, sum(1 for m in metadata_by_source[s]
-                    if m['fillDelay'] >= min_delay
-                    and m['fillDelay'] < max_delay
-                )),
-            ] for s, (min_delay, max_delay) in itertools.product(sources, DELAYS)
-        ],
-        columns=['source', 'delay', 'revert rate'],
-    ),
+    data=pd.DataFrame({
+        'source': [f'{c} ({counts_by_class[c]})' for c in rates['source']],
+        'delay': [f'{min_delay}s' for min_delay in rates['delay']],
+        'revert rate': rates['revert rate'],
+    }),
     kind='bar',
     legend=True,
     legend_out=False,
 )
 
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y * 100)}%'))
-plt.title(f'Revert rate by source and delay ({len(data)} swaps)')
+plt.title(f'Revert rate by source and delay ({table.num_rows} swaps)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
 plt.show()
@@ -3,9 +3,10 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import json
 import argparse
-import itertools
 import pandas as pd
-from utils import DELAYS, load_data
+from utils import DELAYS, add_error_bars
+from aggregate import complete_revert_rates
+from cube import CUBE_DIMENSIONS, load_cube, slice_cube, get_cube_revert_rates, get_cube_stats
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -17,48 +18,37 @@ def get_program_args():
     return args.parse_args()
 
 args = get_program_args()
-data = load_data(args.path, args.url)
-print(f'Loaded {len(data)} data items')
+dims = CUBE_DIMENSIONS if args.url is None else [*CUBE_DIMENSIONS, 'api_url']
+cube = slice_cube(load_cube(args.path, dims), url=args.url)
+num_swaps = cube['total'].sum()
+print(f'Loaded {num_swaps} data items')
 
-tokens = sorted(set(itertools.chain(
-    (d['metadata']['makerToken'] for d in data),
-    (d['metadata']['takerToken'] for d in data),
-)))
+totals_by_token = get_cube_revert_rates(cube, ['token']).set_index('token')['total']
+tokens = list(totals_by_token.index)
 print(f'Found {len(tokens)} tokens')
 
-metadata_by_token = {
-    t: [
-        d['metadata'] for d in data
-            if d['metadata']['makerToken'] == t or d['metadata']['takerToken'] == t
-    ] for t in tokens
-}
+delays = [min_delay for min_delay, max_delay in DELAYS]
+rates = complete_revert_rates(
+    get_cube_stats(cube, 'reverts', ['token', 'delay']),
+    { 'token': tokens, 'delay': delays },
+).fillna(0)
 
-sns.catplot(
+grid = sns.catplot(
     x='token',
     y='revert rate',
     hue='delay',
-    data=pd.DataFrame([
-            [
-                f'{t} ({len(metadata_by_token[t])})',
-                f'{min_delay}s',
-                sum(1 for m in metadata_by_token[t]
-                    if m['swapResult']['revertData'] != '0x'
-                    and m['fillDelay'] >= min_delay
-                    and m['fillDelay'] < max_delay
-                ) / max(1, sum(1 for m in metadata_by_token[t]
-                    if m['fillDelay'] >= min_delay
-                    and m['fillDelay'] < max_delay
-                )),
-            ] for t, (min_delay, max_delay) in itertools.product(tokens, DELAYS)
-        ],
-        columns=['token', 'delay', 'revert rate'],
-    ),
+    data=pd.DataFrame({
+        'token': [f'{t} ({totals_by_token[t]})' for t in rates['token']],
+        'delay': [f'{min_delay}s' for min_delay in rates['delay']],
+        'revert rate': rates['mean'],
+    }),
     legend_out=False,
     legend=True,
     kind='bar',
 )
+add_error_bars(grid.ax, rates['ci'].to_numpy().reshape(len(tokens), len(delays)))
 
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y * 100)}%'))
-plt.title(f'Revert rate by token and delay ({len(data)} swaps)')
+plt.title(f'Revert rate by token and delay ({num_swaps} swaps)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
 plt.show()
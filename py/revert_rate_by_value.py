@@ -3,9 +3,10 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import json
 import argparse
-import itertools
 import pandas as pd
-from utils import VALUES, DELAYS, load_data, format_value
+from utils import VALUES, DELAYS, format_value, add_error_bars
+from aggregate import complete_revert_rates
+from cube import CUBE_DIMENSIONS, load_cube, slice_cube, get_cube_revert_rates, get_cube_stats
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -17,45 +18,39 @@ def get_program_args():
     return args.parse_args()
 
 args = get_program_args()
-data = load_data(args.path, args.url)
-print(f'Loaded {len(data)} data items')
+dims = CUBE_DIMENSIONS if args.url is None else [*CUBE_DIMENSIONS, 'api_url']
+cube = slice_cube(load_cube(args.path, dims), url=args.url)
+num_swaps = cube['total'].sum()
+print(f'Loaded {num_swaps} data items')
 
-metadata_by_prices = {
-    max_value: [
-        d['metadata'] for d in data
-            if float(d['metadata']['fillValue']) >= min_value
-            and float(d['metadata']['fillValue']) < max_value
-    ] for min_value, max_value in VALUES
-}
+max_values = [max_value for min_value, max_value in VALUES]
+totals_by_value = complete_revert_rates(
+    get_cube_revert_rates(cube, ['value']),
+    { 'value': max_values },
+).set_index('value')['total']
+delays = [min_delay for min_delay, max_delay in DELAYS]
+rates = complete_revert_rates(
+    get_cube_stats(cube, 'reverts', ['value', 'delay']),
+    { 'value': max_values, 'delay': delays },
+).fillna(0)
 
-sns.catplot(
+grid = sns.catplot(
     x='swap value',
     y='revert rate',
     hue='delay',
-    data=pd.DataFrame([
-            [
-                f'<{format_value(max_value)} ({len(metadata_by_prices[max_value])})',
-                f'{min_delay}s',
-                sum(1 for m in metadata_by_prices[max_value]
-                    if m['swapResult']['revertData'] != '0x'
-                    and m['fillDelay'] >= min_delay
-                    and m['fillDelay'] < max_delay
-                ) / max(1, sum(1 for m in metadata_by_prices[max_value]
-                    if m['fillDelay'] >= min_delay
-                    and m['fillDelay'] < max_delay
-                )),
-            ] for (min_value, max_value), (min_delay, max_delay)
-                in itertools.product(VALUES, DELAYS)
-        ],
-        columns=['swap value', 'delay', 'revert rate'],
-    ),
+    data=pd.DataFrame({
+        'swap value': [f'<{format_value(v)} ({int(totals_by_value[v])})' for v in rates['value']],
+        'delay': [f'{min_delay}s' for min_delay in rates['delay']],
+        'revert rate': rates['mean'],
+    }),
     kind='bar',
     legend=True,
     legend_out=False,
 )
+add_error_bars(grid.ax, rates['ci'].to_numpy().reshape(len(max_values), len(delays)))
 
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y * 100)}%'))
-plt.title(f'Revert rate by swap value and delay ({len(data)} swaps)')
+plt.title(f'Revert rate by swap value and delay ({num_swaps} swaps)')
 plt.legend()
 plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
 plt.show()
@@ -0,0 +1,57 @@
+import matplotlib.ticker as ticker
+from matplotlib import pyplot as plt
+import seaborn as sns
+import argparse
+import numpy as np
+import pandas as pd
+from swap_store import read_table
+from aggregate import get_columns, explode, get_revert_rates
+from revert_reasons import get_revert_reasons
+
+sns.set(color_codes=True)
+sns.set_palette('muted')
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('path', type=str)
+    args.add_argument('--url', type=str)
+    args.add_argument('--top', type=int, default=6, help='reasons to plot, the rest are "other"')
+    return args.parse_args()
+
+args = get_program_args()
+table = read_table(args.path, ['revert_data', *get_columns(['source', 'delay'])], args.url)
+print(f'Loaded {table.num_rows} data items')
+
+reasons = get_revert_reasons(table['revert_data'])
+totals = get_revert_rates(table, ['source', 'delay'])
+reverts = pd.DataFrame({ 'swap': np.arange(table.num_rows), 'reason': reasons })
+reverts = reverts[reverts['reason'].notna()]
+for dim in ['source', 'delay']:
+    reverts = reverts.merge(explode(table, dim), on='swap')
+breakdown = reverts.groupby(['reason', 'source', 'delay'], observed=True).size() \
+    .rename('reverts').reset_index() \
+    .merge(totals[['source', 'delay', 'total']], on=['source', 'delay'])
+breakdown['revert rate'] = breakdown['reverts'] / breakdown['total']
+print(breakdown.sort_values(['reason', 'source', 'delay']).to_string(index=False))
+
+# Revert rate of the most common reasons, by source and delay.
+top_reasons = pd.Series(reasons).value_counts().index[:args.top]
+breakdown['reason'] = breakdown['reason'].astype(object) \
+    .where(breakdown['reason'].isin(top_reasons), 'other')
+rates = breakdown.groupby(['source', 'delay', 'reason']).agg(reverts=('reverts', 'sum'), total=('total', 'first')) \
+    .reset_index()
+rates['revert rate'] = rates['reverts'] / rates['total']
+sns.catplot(
+    x='source',
+    y='revert rate',
+    hue='reason',
+    col='delay',
+    data=rates.assign(delay=[f'{min_delay}s' for min_delay in rates['delay']]),
+    kind='bar',
+    legend=True,
+)
+
+plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: f'{int(y * 100)}%'))
+plt.suptitle(f'Revert rate by reason, source and delay ({len(reverts["swap"].unique())} reverts, {table.num_rows} swaps)')
+plt.subplots_adjust(top=0.85)
+plt.show()
@@ -0,0 +1,160 @@
+import functools
+import pyarrow as pa
+import pyarrow.compute as pc
+from asset_data import to_categorical
+
+# Selectors (first 4 bytes) of the revert data the api's swaps can revert
+# with: solidity's `Error(string)`/`Panic(uint256)` and the 0x rich revert
+# errors (`RevertError`s in `@0x/utils`) of the exchange, exchange proxy and
+# its transformers.
+ERROR_SELECTOR = '0x08c379a0'
+PANIC_SELECTOR = '0x4e487b71'
+REVERT_ERRORS = {
+    '0x7e5a2318': 'SignatureError(uint8,bytes32,address,bytes)',
+    '0xa15c0d06': 'SignatureValidatorNotApprovedError(address,address)',
+    '0x5bd0428d': 'EIP1271SignatureError(address,bytes,bytes,bytes)',
+    '0x1b8388f7': 'SignatureWalletError(bytes32,address,bytes,bytes)',
+    '0xfdb6ca8d': 'OrderStatusError(bytes32,uint8)',
+    '0xe53c76c8': 'ExchangeInvalidContextError(uint8,bytes32,address)',
+    '0xe94a7ed0': 'FillError(uint8,bytes32)',
+    '0x4ad31275': 'OrderEpochError(address,address,uint256)',
+    '0x11c7b720': 'AssetProxyExistsError(bytes4,address)',
+    '0x488219a6': 'AssetProxyDispatchError(uint8,bytes32,bytes)',
+    '0x4678472b': 'AssetProxyTransferError(bytes32,bytes,bytes)',
+    '0xb6555d6f': 'NegativeSpreadError(bytes32,bytes32)',
+    '0xf5985184': 'TransactionError(uint8,bytes32)',
+    '0x20d11f61': 'TransactionExecutionError(bytes32,bytes)',
+    '0xa26dac09': 'TransactionGasPriceError(bytes32,uint256,uint256)',
+    '0xdec4aedf': 'TransactionInvalidContextError(bytes32,address)',
+    '0x18e4b141': 'IncompleteFillError(uint8,uint256,uint256)',
+    '0xd4092f4f': 'BatchMatchOrdersError(uint8)',
+    '0x87cb1e75': 'PayProtocolFeeError(bytes32,uint256,address,address,bytes)',
+    '0xa791837c': 'DivisionByZeroError()',
+    '0x339f3de2': 'RoundingError(uint256,uint256,uint256)',
+    '0xe946c1bb': 'Uint256BinOpError(uint8,uint256,uint256)',
+    '0xc996af7b': 'Uint256DowncastError(uint8,uint256)',
+    '0x28006595': 'InvalidByteOperationError(uint8,uint256,uint256)',
+    '0x1de45ad1': 'OnlyOwnerError(address,address)',
+    '0x0c3b823f': 'IllegalReentrancyError()',
+    '0xf0ec779b': 'OnlyCallableBySelfError(address)',
+    '0x734e6e1c': 'NotImplementedError(bytes4)',
+    '0x96660ab1': 'InsufficientEthAttachedError(uint256,uint256)',
+    '0x990174d2': 'IncompleteTransformERC20Error(address,uint256,uint256)',
+    '0x3ea25a3c': 'NegativeTransformERC20OutputError(address,uint256)',
+    '0xf21e5cb4': 'TransformerFailedError(address,bytes,bytes)',
+    '0x0547dbab': 'UnauthorizedTransformerError(address,bytes)',
+    '0x58d71233': 'InvalidRLPNonceError(bytes)',
+    '0x86945816': 'WalletExecuteCallFailedError(address,address,bytes,uint256,bytes)',
+    '0x61e5a732': 'WalletExecuteDelegateCallFailedError(address,address,bytes,bytes)',
+    '0xdfdc6f57': 'SpenderERC20TransferFromFailedError(address,address,address,uint256,bytes)',
+    '0xadc35ca6': 'IncompleteFillSellQuoteError(address,uint256,uint256)',
+    '0x498df3ae': 'IncompleteFillBuyQuoteError(address,uint256,uint256)',
+    '0xb903dfca': 'InsufficientTakerTokenError(uint256,uint256)',
+    '0xc95e18ed': 'InsufficientProtocolFeeError(uint256,uint256)',
+    '0xd5c74bd6': 'InvalidERC20AssetDataError(bytes)',
+    '0x63eaf485': 'InvalidTakerFeeTokenError(address)',
+    '0x59afa2f0': 'WrongNumberOfTokensReceivedError(uint256,uint256)',
+    '0xceb9a9ea': 'InvalidTokenReceivedError(address)',
+}
+# Argument holding the revert data of a failed inner call, for errors that
+# wrap one.
+ERROR_DATA_ARGS = {
+    'EIP1271SignatureError': 3,
+    'SignatureWalletError': 3,
+    'AssetProxyTransferError': 2,
+    'TransactionExecutionError': 1,
+    'PayProtocolFeeError': 4,
+    'TransformerFailedError': 2,
+    'WalletExecuteCallFailedError': 4,
+    'WalletExecuteDelegateCallFailedError': 3,
+    'SpenderERC20TransferFromFailedError': 4,
+}
+# Names of the `uint8` error code/status argument, which is kept in the
+# reason (other arguments are hashes and amounts).
+ERROR_CODES = {
+    'SignatureError': [
+        'BAD_ORDER_SIGNATURE', 'BAD_TRANSACTION_SIGNATURE', 'INVALID_LENGTH', 'UNSUPPORTED',
+        'ILLEGAL', 'INAPPROPRIATE_SIGNATURE_TYPE', 'INVALID_SIGNER',
+    ],
+    'OrderStatusError': [
+        'INVALID', 'INVALID_MAKER_ASSET_AMOUNT', 'INVALID_TAKER_ASSET_AMOUNT', 'FILLABLE',
+        'EXPIRED', 'FULLY_FILLED', 'CANCELLED',
+    ],
+    'ExchangeInvalidContextError': ['INVALID_MAKER', 'INVALID_TAKER', 'INVALID_SENDER'],
+    'FillError': ['INVALID_TAKER_AMOUNT', 'TAKER_OVERPAY', 'OVERFILL', 'INVALID_FILL_PRICE'],
+    'AssetProxyDispatchError': ['INVALID_ASSET_DATA_LENGTH', 'UNKNOWN_ASSET_PROXY'],
+    'IncompleteFillError': [
+        'INCOMPLETE_MARKET_BUY_ORDERS', 'INCOMPLETE_MARKET_SELL_ORDERS', 'INCOMPLETE_FILL_ORDER',
+    ],
+    'Uint256BinOpError': [
+        'ADDITION_OVERFLOW', 'MULTIPLICATION_OVERFLOW', 'SUBTRACTION_UNDERFLOW', 'DIVISION_BY_ZERO',
+    ],
+}
+# Wrapped errors nest, but not indefinitely.
+MAX_DEPTH = 4
+
+def read_uint(args, i):
+    word = args[i * 32:(i + 1) * 32]
+    return int.from_bytes(word, 'big') if len(word) == 32 else None
+
+def read_bytes(args, i):
+    # `bytes`/`string` argument `i` of ABI encoded `args`, None if truncated.
+    offset = read_uint(args, i)
+    if offset is None or offset + 32 > len(args):
+        return None
+    length = int.from_bytes(args[offset:offset + 32], 'big')
+    if offset + 32 + length > len(args):
+        return None
+    return args[offset + 32:offset + 32 + length]
+
+def decode_reason(data, depth=0):
+    # Error message for `Error(string)`, the error name (with its error code,
+    # and the reason of the inner call it wraps) for 0x revert errors, and the
+    # selector for anything else.
+    if len(data) < 4:
+        return 'empty' if len(data) == 0 else 'invalid'
+    selector = '0x' + data[:4].hex()
+    args = data[4:]
+    if selector == ERROR_SELECTOR:
+        message = read_bytes(args, 0)
+        if message is None:
+            return 'Error'
+        return message.decode('utf-8', errors='replace').strip('\0').strip()
+    if selector == PANIC_SELECTOR:
+        code = read_uint(args, 0)
+        return 'Panic' if code is None else f'Panic(0x{code:02x})'
+    if selector not in REVERT_ERRORS:
+        return selector
+    name, types = REVERT_ERRORS[selector][:-1].split('(')
+    types = types.split(',') if types else []
+    reason = name
+    if 'uint8' in types:
+        code = read_uint(args, types.index('uint8'))
+        codes = ERROR_CODES.get(name, [])
+        reason += f'({codes[code] if code is not None and code < len(codes) else code})'
+    if name in ERROR_DATA_ARGS and depth < MAX_DEPTH:
+        error_data = read_bytes(args, ERROR_DATA_ARGS[name])
+        if error_data:
+            reason += ': ' + decode_reason(error_data, depth + 1)
+    return reason
+
+@functools.lru_cache(maxsize=None)
+def decode_revert_data(revert_data):
+    # Reason of a swap's hex revert data, None if it didn't revert.
+    if not revert_data or revert_data == '0x':
+        return None
+    try:
+        return decode_reason(bytes.fromhex(revert_data[2:]))
+    except ValueError:
+        return 'invalid'
+
+def get_revert_reasons(revert_data):
+    # Categorical reason of every swap in a `revert_data` column, decoding
+    # each distinct revert data once.
+    if isinstance(revert_data, pa.ChunkedArray):
+        revert_data = revert_data.combine_chunks()
+    encoded = pc.dictionary_encode(revert_data)
+    return to_categorical(
+        encoded.indices.fill_null(-1).to_numpy(),
+        [decode_revert_data(v) for v in encoded.dictionary.to_pylist()],
+    )
@@ -4,8 +4,13 @@ import seaborn as sns
 import json
 import argparse
 import itertools
+import numpy as np
 import pandas as pd
-from utils import DELAYS, load_data
+import pyarrow as pa
+import pyarrow.compute as pc
+from utils import DELAYS, get_delay_buckets, count_by_bucket
+from swap_store import read_table
+from child_tables import WIDE_AMOUNT, read_child_table, sum_by_swap
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -16,76 +21,42 @@ def get_program_args():
     args.add_argument('--url', type=str)
     return args.parse_args()
 
-def is_native_order(order):
-    return order['makerAssetData'].startswith('0xf47261b0')
-
-def was_frontrun(swap):
-    orders = swap['orders']
-    infos = swap['metadata']['swapResult']['orderInfos']
-    sell_amount = int(swap['sellAmount'])
-    taker_amount = sum(int(o['takerAssetAmount']) for o in orders)
-    assert(sell_amount <= taker_amount)
-    filled_amount = sum(int(oi['orderTakerAssetFilledAmount']) for oi in infos)
-    return sell_amount < taker_amount - filled_amount
-
 REASONS = ['expired', 'filled', 'cancelled', 'invalid', 'frontrun?', 'fillable']
 
-def get_order_fail_reason(swap, order_idx):
-    info = swap['metadata']['swapResult']['orderInfos'][order_idx]
-    status = info['orderStatus']
-    if status == 4:
-        return 'expired'
-    if status == 5:
-        return 'filled'
-    if status == 6:
-        return 'cancelled'
-    if status != 3:
-        return 'invalid'
-    if was_frontrun(swap):
-        return 'frontrun?'
-    return 'fillable'
+def get_order_fail_reasons(orders):
+    # Index into `REASONS` of every order.
+    status = orders['order_status'].fill_null(-1).to_numpy()
+    return np.select(
+        [status == 4, status == 5, status == 6, status != 3, orders['frontrun'].to_numpy(zero_copy_only=False)],
+        [0, 1, 2, 3, 4],
+        5,
+    )
 
 args = get_program_args()
-data = load_data(args.path, args.url)
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, ['reverted', 'fill_delay', 'sell_amount'], args.url)
+orders = read_child_table(args.path, 'orders', ['swap', 'order_status', 'is_native', 'frontrun', 'taker_asset_amount'], args.url)
+print(f'Loaded {table.num_rows} data items')
 
-failed_native_swaps = []
-orders = []
-for d in data:
-    if d['metadata']['swapResult']['revertData'] != '0x':
-        found_native_order = False
-        for i, o in enumerate(d['orders']):
-            found_native_order = True
-            if is_native_order(o):
-                orders.append({
-                    'order': o,
-                    'info': d['metadata']['swapResult']['orderInfos'][i],
-                    'delay': d['metadata']['fillDelay'],
-                    'reason': get_order_fail_reason(d, i)
-                })
-        if found_native_order:
-            failed_native_swaps.append(d)
-
-orders_by_reason_by_delay = {
-    reason: {
-        min_delay: [
-            o for o in orders
-            if o['delay'] >= min_delay
-            and o['delay'] < max_delay
-            and o['reason'] == reason
-        ] for min_delay, max_delay in DELAYS
-    } for reason in REASONS
-}
+reverted = table['reverted'].to_numpy(zero_copy_only=False)
+orders = orders.filter(reverted[orders['swap'].to_numpy()])
+failed_swap_count = len(np.unique(orders['swap'].to_numpy()))
+taker_amounts = sum_by_swap(orders['swap'].to_numpy(), orders['taker_asset_amount'], table.num_rows)
+orders = orders.filter(orders['is_native'])
 
+order_delay_buckets = get_delay_buckets(table['fill_delay'].to_numpy()[orders['swap'].to_numpy()])
+order_reasons = get_order_fail_reasons(orders)
+# Swaps of fillable orders are checked for frontrunning, which expects their
+# orders to cover the sell amount.
+checked = pa.array(np.unique(orders['swap'].to_numpy()[order_reasons >= REASONS.index('frontrun?')]))
+assert(pc.all(pc.less_equal(
+    pc.cast(table['sell_amount'].take(checked), WIDE_AMOUNT),
+    taker_amounts.take(checked),
+)).as_py() is not False)
 reason_counts_by_delay = {
     min_delay: {
-        r: sum(
-            1 for o in orders
-            if o['delay'] >= min_delay
-            and o['delay'] < max_delay
-            and o['reason'] == r
-        ) for r in REASONS
-    } for min_delay, max_delay in DELAYS
+        r: count
+            for r, count in zip(REASONS, count_by_bucket(order_reasons[order_delay_buckets == i], len(REASONS)).tolist())
+    } for i, (min_delay, max_delay) in enumerate(DELAYS)
 }
 totals_by_delay = {
     min_delay: sum(
@@ -102,9 +73,9 @@ for r in REASONS:
     prev_ys = [py + y for py, y in zip(prev_ys, ys)]
 
 plt.legend()
-plt.xticks(plt.xticks()[0], ['', *(f'{min_delay}s+ ({totals_by_delay[min_delay]})' for min_delay, max_delay in DELAYS)])
+plt.xticks(xs, [f'{min_delay}s+ ({totals_by_delay[min_delay]})' for min_delay, max_delay in DELAYS])
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: '%d%%' % (y * 100)))
 plt.xlabel('delay')
 plt.ylabel('order state frequency')
-plt.title(f'frequency of order state in failed native orders, by delay ({len(failed_native_swaps)} swaps)')
+plt.title(f'frequency of order state in failed native orders, by delay ({failed_swap_count} swaps)')
 plt.show()
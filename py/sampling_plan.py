@@ -0,0 +1,127 @@
+import argparse
+import itertools
+import json
+import numpy as np
+import pandas as pd
+from ab_utils import pivot_ab
+from utils import get_value_buckets, get_delay_buckets
+from swap_store import read_table
+from prices import get_realized_prices
+
+# Same as `FILL_STOPS` and `DELAY_STOPS` in `src/constants.js`.
+FILL_STOPS = [10, 250, 1e3, 5e3, 10e3, 25e3]
+DELAY_STOPS = [0, 30, 60, 90, 180, 300]
+CELL_DIMENSIONS = ['side', 'maker_token', 'taker_token', 'value', 'delay']
+ETH_TOKENS = ['ETH', 'WETH']
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('path', type=str)
+    args.add_argument('output', type=str, help='plan file to pass to `yarn start --plan`/`yarn start-ab --plan`')
+    args.add_argument('--tokens', '-t', type=str, help='tokens to plan for. Defaults to the tokens in the results.')
+    args.add_argument('--buys', action='store_true', default=False)
+    args.add_argument('--sells', action='store_true', default=False)
+    args.add_argument('--exploration', type=float, default=0.1, help='share of samples spread evenly over all cells')
+    return args.parse_args()
+
+def get_brackets(stops):
+    return list(zip(stops, stops[1:]))
+
+def get_cells(tokens, sides):
+    # Every cell the simulator can sample (see `getRandomQuotePair()`).
+    return pd.DataFrame([
+        [side, maker_token, taker_token, value, delay]
+            for side, (maker_token, taker_token), value, delay in itertools.product(
+                sides,
+                itertools.permutations(tokens, 2),
+                range(len(FILL_STOPS) - 1),
+                range(len(DELAY_STOPS) - 1),
+            )
+            if not (maker_token in ETH_TOKENS and taker_token in ETH_TOKENS)
+    ], columns=CELL_DIMENSIONS)
+
+def get_swap_cells(table):
+    return pd.DataFrame({
+        'side': table['side'].to_numpy(zero_copy_only=False),
+        'maker_token': table['maker_token'].to_numpy(zero_copy_only=False),
+        'taker_token': table['taker_token'].to_numpy(zero_copy_only=False),
+        'value': get_value_buckets(table['fill_value'].to_numpy(), get_brackets(FILL_STOPS)),
+        'delay': get_delay_buckets(table['fill_delay'].to_numpy(), get_brackets(DELAY_STOPS)),
+    })
+
+def get_gains(n, variances):
+    # Reduction in the variance of a cell's mean from one more sample.
+    return variances / ((n + 1) * (n + 2))
+
+def get_revert_gains(cells, swaps):
+    counts = swaps.groupby(CELL_DIMENSIONS).agg(n=('reverted', 'size'), reverts=('reverted', 'sum'))
+    counts = counts.reindex(pd.MultiIndex.from_frame(cells), fill_value=0)
+    # Smoothed so cells without reverts (or samples) still have some variance.
+    rates = (counts['reverts'] + 1) / (counts['n'] + 2)
+    return counts['n'].to_numpy(), get_gains(counts['n'].to_numpy(), (rates * (1 - rates)).to_numpy())
+
+def get_price_gains(cells, pairs):
+    stats = pairs.groupby(CELL_DIMENSIONS)['delta'].agg(['size', 'var'])
+    stats = stats.reindex(pd.MultiIndex.from_frame(cells))
+    n = stats['size'].fillna(0).to_numpy()
+    # Cells with too few pairs get the variance of all pairs.
+    variances = stats['var'].fillna(pairs['delta'].var()).to_numpy()
+    return n, get_gains(n, variances)
+
+args = get_program_args()
+table = read_table(args.path, [
+    'id', 'api', 'side', 'maker_token', 'taker_token', 'fill_value', 'fill_delay',
+    'reverted', 'success', 'bought_amount', 'sold_amount',
+])
+print(f'Loaded {table.num_rows} data items')
+
+sides = ['buy'] if args.buys else ['sell'] if args.sells else ['buy', 'sell']
+swaps = get_swap_cells(table).assign(reverted=table['reverted'].to_numpy(zero_copy_only=False))
+tokens = args.tokens.split(',') if args.tokens \
+    else sorted(set(swaps['maker_token']) | set(swaps['taker_token']))
+cells = get_cells(tokens, sides)
+
+n, gains = get_revert_gains(cells, swaps)
+cells['samples'] = n
+# Normalize each metric's gains so they count equally.
+total_gains = gains / gains.sum()
+
+if len(set(table['api'].to_pylist())) > 1:
+    # Price delta (bps) between the first two apis of each A-B group.
+    data, apis, incomplete = pivot_ab(
+        table,
+        { 'price': get_realized_prices(table), 'success': table['success'].to_numpy(zero_copy_only=False) },
+        get_swap_cells(table).to_dict('series'),
+    )
+    data = data[data[[f'success_{api}' for api in apis[:2]]].all(axis=1)]
+    pairs = data[CELL_DIMENSIONS].assign(
+        delta=(data[f'price_{apis[1]}'] - data[f'price_{apis[0]}']) / data[f'price_{apis[0]}'] * 1e4,
+    )
+    pairs = pairs[np.isfinite(pairs['delta'])]
+    if len(pairs) > 1:
+        n, gains = get_price_gains(cells, pairs)
+        cells['pairs'] = n
+        total_gains += gains / gains.sum()
+
+cells['weight'] = (1 - args.exploration) * total_gains / total_gains.sum() + args.exploration / len(cells)
+
+plan = {
+    'source': args.path,
+    'cells': [
+        {
+            'side': c.side,
+            'makerToken': c.maker_token,
+            'takerToken': c.taker_token,
+            'minValue': FILL_STOPS[c.value],
+            'maxValue': FILL_STOPS[c.value + 1],
+            'minDelay': DELAY_STOPS[c.delay],
+            'maxDelay': DELAY_STOPS[c.delay + 1],
+            'weight': c.weight,
+        } for c in cells.itertuples()
+    ],
+}
+with open(args.output, 'w') as f:
+    json.dump(plan, f, indent=2)
+
+print(f'Wrote a plan over {len(cells)} cells to {args.output}. Most sampled cells:')
+print(cells.sort_values('weight', ascending=False).head(10).to_string(index=False))
@@ -0,0 +1,47 @@
+import numpy as np
+
+# Mixture sequential probability ratio test (mSPRT) for a zero mean of paired
+# differences, mixing over normal effect sizes. Its p-values are always valid:
+# they can be checked after every batch and a run stopped as soon as one drops
+# below alpha without inflating the false positive rate.
+ALPHA = 0.05
+# Standard deviation of the mixing distribution, relative to the (plug-in)
+# standard deviation of the differences.
+TAU = 1.0
+# Floor for the plug-in variance, so that constant non-zero differences (e.g.
+# the same gas saving on every swap) still count as evidence.
+MIN_VARIANCE = 1e-9
+
+def create_test():
+    return { 'n': 0, 'mean': 0.0, 'm2': 0.0, 'p': 1.0 }
+
+def get_p_value(n, mean, variance, tau=TAU):
+    if n < 2 or not variance > 0:
+        return 1.0
+    mixing_variance = tau * tau * variance
+    log_ratio = 0.5 * np.log(variance / (variance + n * mixing_variance)) \
+        + n * n * mixing_variance * mean * mean / (2 * variance * (variance + n * mixing_variance))
+    return float(min(1.0, np.exp(-log_ratio)))
+
+def update_test(test, values, tau=TAU, variance=None):
+    # Folds a batch of differences into the running mean/variance (Chan et
+    # al.'s parallel update) and lowers the p-value if the new evidence is
+    # stronger. Only checking at batch ends is conservative. `variance` is the
+    # variance of the differences under the null when it is known, e.g. 1 for
+    # a sign test, and the sample variance is used otherwise.
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return test
+    batch_mean = values.mean()
+    n = test['n'] + len(values)
+    delta = batch_mean - test['mean']
+    test['m2'] += ((values - batch_mean) ** 2).sum() + delta * delta * test['n'] * len(values) / n
+    test['mean'] += delta * len(values) / n
+    test['n'] = n
+    if variance is None:
+        variance = max(test['m2'] / (n - 1), MIN_VARIANCE) if n > 1 else 0.0
+    test['p'] = min(test['p'], get_p_value(n, test['mean'], variance, tau))
+    return test
+
+def is_decided(test, alpha=ALPHA):
+    return test['p'] < alpha
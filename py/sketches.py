@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset
+from swap_store import is_store, iter_batches
+from aggregate import DIMENSION_COLUMNS, explode
+from cube import CUBE_COLUMNS, get_measures
+
+# Log-bucketed (DDSketch-style) quantile sketches: every value falls in a
+# bucket (sign, key) with key = ceil(log_gamma(|value|)), so any quantile
+# read back is within RELATIVE_ACCURACY of the true value. Sketches are just
+# bucket counts, so they merge by adding, and their size only grows with the
+# log of the value range, not the number of swaps.
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+# Values smaller than this in magnitude are counted as zero.
+MIN_VALUE = 1e-9
+QUANTILES = [0.5, 0.9, 0.99, 0.999]
+
+def get_buckets(values):
+    signs = np.sign(values).astype(int)
+    magnitudes = np.abs(values)
+    signs[magnitudes < MIN_VALUE] = 0
+    keys = np.zeros(len(values), dtype=int)
+    nonzero = signs != 0
+    keys[nonzero] = np.ceil(np.log(magnitudes[nonzero]) / np.log(GAMMA)).astype(int)
+    return signs, keys
+
+def get_bucket_values(signs, keys):
+    return signs * 2 * np.power(GAMMA, keys) / (GAMMA + 1)
+
+def build_sketches(table, dims):
+    # Sketch of every measure in `cube.get_measures()` for every combination
+    # of `dims`, as a (dims..., measure, sign, key, count) frame.
+    df = pd.DataFrame({ 'swap': np.arange(table.num_rows) })
+    for dim in dims:
+        df = df.merge(explode(table, dim), on='swap')
+    sketches = []
+    for measure, values in get_measures(table).items():
+        values = values[df['swap'].to_numpy()]
+        valid = ~np.isnan(values)
+        signs, keys = get_buckets(values[valid])
+        buckets = df[valid].drop(columns='swap').assign(measure=measure, sign=signs, key=keys)
+        sketches.append(buckets.groupby([*dims, 'measure', 'sign', 'key']).size().rename('count').reset_index())
+    return pd.concat(sketches, ignore_index=True)
+
+def merge_sketches(*sketches):
+    df = pd.concat(sketches, ignore_index=True)
+    return df.groupby([c for c in df.columns if c != 'count'], sort=True)['count'].sum().reset_index()
+
+def rollup_sketches(sketches, dims):
+    return merge_sketches(sketches[[*dims, 'measure', 'sign', 'key', 'count']])
+
+def get_columns(dims):
+    return sorted(set([*CUBE_COLUMNS, *(c for d in dims for c in DIMENSION_COLUMNS[d])]))
+
+def iter_tables(path, columns):
+    # Streams a log or store a batch at a time so sketching runs in bounded
+    # memory.
+    if is_store(path):
+        batches = pa.dataset.dataset(path, format='parquet').to_batches(columns=columns)
+    else:
+        batches = iter_batches(path, columns=columns)
+    for batch in batches:
+        yield pa.Table.from_batches([batch])
+
+def sketch_file(path, dims):
+    sketches = None
+    for table in iter_tables(path, get_columns(dims)):
+        sketch = build_sketches(table, dims)
+        sketches = sketch if sketches is None else merge_sketches(sketches, sketch)
+    return sketches
+
+def get_quantiles(sketches, measure, quantiles=QUANTILES):
+    # One row per group with the count and each requested quantile of
+    # `measure`.
+    df = sketches[sketches['measure'] == measure].drop(columns='measure')
+    dims = [c for c in df.columns if c not in ('sign', 'key', 'count')]
+    df = df.assign(bucket_value=get_bucket_values(df['sign'].to_numpy(), df['key'].to_numpy()))
+    df = df.sort_values([*dims, 'bucket_value'], kind='stable').reset_index(drop=True)
+    groups = df.groupby(dims, sort=True)
+    ranks = groups['count'].cumsum()
+    totals = groups['count'].transform('sum')
+    result = groups['count'].sum().rename('count').reset_index()
+    for q in quantiles:
+        # First bucket whose cumulative count covers rank q * (n - 1).
+        covered = df[ranks > q * (totals - 1)]
+        result[f'p{q * 100:g}'] = covered.groupby(dims, sort=True)['bucket_value'].first().to_numpy()
+    return result
+
+def is_sketch(path):
+    return path.endswith('.sketch.parquet')
+
+def load_sketches(path, dims):
+    if is_sketch(path):
+        return pd.read_parquet(path)
+    return sketch_file(path, dims)
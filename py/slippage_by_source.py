@@ -3,13 +3,13 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import json
 import argparse
-import itertools
 import pandas as pd
-import decimal
-from decimal import Decimal
-from utils import DELAYS, VALUES, load_data, format_value, get_max_value, is_successful_swap
-
-decimal.setcontext(decimal.Context(prec=64))
+import pyarrow.compute as pc
+from utils import VALUES, format_value, get_max_values, get_value_buckets
+from swap_store import read_table
+from prices import get_realized_prices, get_best_order_prices, get_slippages
+from source_sets import build_source_sets, get_single_sources
+from attribution import get_attribution
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -18,49 +18,45 @@ def get_program_args():
     args = argparse.ArgumentParser()
     args.add_argument('path', type=str)
     args.add_argument('--url', type=str)
+    args.add_argument('--weighted', action='store_true', help='split multi-source swaps across their sources by proportion instead of only using single-source swaps')
     return args.parse_args()
 
-def get_slippage(swap_data):
-    price = max(
-        Decimal(o['makerAssetAmount']) / Decimal(o['takerAssetAmount']) for o in swap_data['orders']
-    )
-    filled_price = Decimal(swap_data['metadata']['swapResult']['boughtAmount']) / \
-        Decimal(swap_data['metadata']['swapResult']['soldAmount'])
-    return (filled_price - price) / price
+COLUMNS = ['orders', 'sources', 'fill_value', 'bought_amount', 'sold_amount', 'success']
 
 args = get_program_args()
-data = [d for d in load_data(args.path, args.url) if is_successful_swap(d)]
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, COLUMNS, args.url)
+table = table.filter(table['success'])
+print(f'Loaded {table.num_rows} data items')
 
-sources = sorted(set(itertools.chain(
-    *[i for i in [
-        [s['name'] for s in d['sources'] if s['name'] != '0x']
-        for d in data
-    ]],
-)))
+sources = sorted(set(pc.struct_field(pc.list_flatten(table['sources']), 'name').to_pylist()) - set(['0x']))
 print(f'Found {len(sources)} sources')
 
-data_by_source = {
-    s: [
-        d for d in data
-            if len(d['sources']) == 1 and d['sources'][0]['name'] == s
-    ] for s in sources
-}
-
-df_values = []
-for s in sources:
-    for d in data_by_source[s]:
-        df_values.append([s, get_max_value(d), float(get_slippage(d))])
+source_sets = build_source_sets(table)
+if args.weighted:
+    df = get_attribution(
+        source_sets,
+        get_slippages(get_realized_prices(table), get_best_order_prices(table)),
+        get_value_buckets(table['fill_value'].to_numpy()),
+        [*(max_value for min_value, max_value in VALUES), float('inf')],
+    ).rename(columns={ 'group': 'swap value', 'mean': 'slippage' })
+    df = df[df['source'].isin(sources)]
+    counts_by_source = df.groupby('source')['weight'].sum()
+else:
+    single_source_names = get_single_sources(source_sets)
+    single_source = table.filter(single_source_names != None)
+    df = pd.DataFrame({
+        'source': single_source_names[single_source_names != None],
+        'swap value': get_max_values(single_source['fill_value'].to_numpy()),
+        'slippage': get_slippages(get_realized_prices(single_source), get_best_order_prices(single_source)),
+    })
+    df = df[df['source'].isin(sources)]
+    counts_by_source = df['source'].value_counts()
 
-tokens = sorted(set([ *(d['metadata']['makerToken'] for d in data), *(d['metadata']['takerToken'] for d in data) ]))
 sns.catplot(
     x='source',
     y='slippage',
     hue='swap value',
-    data=pd.DataFrame(
-        df_values,
-        columns=['source', 'swap value', 'slippage'],
-    ),
+    data=df,
     kind='bar',
     errcolor='black',
     errwidth=1,
@@ -72,10 +68,10 @@ sns.catplot(
 
 for t, (min_value, max_value) in zip(plt.gca().get_legend().texts, VALUES):
     t.set_text(f'< {format_value(max_value)}')
-plt.xticks(plt.xticks()[0], ['%s (%d)' % (s, len(data_by_source[s])) for s in sources])
+plt.xticks(plt.xticks()[0], ['%s (%d)' % (s, counts_by_source.get(s, 0)) for s in sources])
 
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: '%.1f%%' % (y * 100)))
-plt.title(f'Slippage by source and swap value ({len(data)} swaps)')
+plt.title(f'Slippage by source and swap value ({table.num_rows} swaps{", split by source proportion" if args.weighted else ""})')
 plt.ylabel('slippage (+ is good)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
 plt.show()
@@ -5,11 +5,10 @@ import json
 import argparse
 import itertools
 import pandas as pd
-import decimal
-from decimal import Decimal
-from utils import VALUES, load_data, format_value, get_max_value, is_successful_swap
-
-decimal.setcontext(decimal.Context(prec=64))
+import numpy as np
+from utils import VALUES, format_value, get_max_values
+from swap_store import read_table
+from prices import get_realized_prices, get_best_order_prices, get_slippages
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -20,37 +19,27 @@ def get_program_args():
     args.add_argument('--url', type=str)
     return args.parse_args()
 
-def get_slippage(swap_data):
-    price = max(
-        Decimal(o['makerAssetAmount']) / Decimal(o['takerAssetAmount']) for o in swap_data['orders']
-    )
-    filled_price = Decimal(swap_data['metadata']['swapResult']['boughtAmount']) / \
-        Decimal(swap_data['metadata']['swapResult']['soldAmount'])
-    return (filled_price - price) / price
+COLUMNS = ['orders', 'maker_token', 'taker_token', 'fill_value', 'bought_amount', 'sold_amount', 'success']
 
 args = get_program_args()
-data = [d for d in load_data(args.path, args.url) if is_successful_swap(d)]
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, COLUMNS, args.url)
+table = table.filter(table['success'])
+print(f'Loaded {table.num_rows} data items')
 
-tokens = sorted(set([ *(d['metadata']['makerToken'] for d in data), *(d['metadata']['takerToken'] for d in data) ]))
+slippages = get_slippages(get_realized_prices(table), get_best_order_prices(table))
+max_values = get_max_values(table['fill_value'].to_numpy())
+maker_tokens = table['maker_token'].to_numpy(zero_copy_only=False)
+taker_tokens = table['taker_token'].to_numpy(zero_copy_only=False)
+tokens = sorted(set([*maker_tokens, *taker_tokens]))
 sns.catplot(
     x='token',
     y='slippage',
     hue='swap value',
-    data=pd.DataFrame([
-            *([
-                d['metadata']['takerToken'],
-                get_max_value(d),
-                float(get_slippage(d)),
-            ] for d in data),
-            *([
-                d['metadata']['makerToken'],
-                get_max_value(d),
-                float(get_slippage(d)),
-            ] for d in data)
-        ],
-        columns=['token', 'swap value', 'slippage'],
-    ),
+    data=pd.DataFrame({
+        'token': np.concatenate([taker_tokens, maker_tokens]),
+        'swap value': np.concatenate([max_values, max_values]),
+        'slippage': np.concatenate([slippages, slippages]),
+    }),
     kind='bar',
     errcolor='black',
     errwidth=1,
@@ -64,13 +53,13 @@ for t, (min_value, max_value) in zip(plt.gca().get_legend().texts, VALUES):
     t.set_text(f'< {format_value(max_value)}')
 
 counts_by_token = {
-    t: sum(1 for d in data if d['metadata']['makerToken'] == t or d['metadata']['takerToken'] == t)
+    t: int(((maker_tokens == t) | (taker_tokens == t)).sum())
         for t in tokens
 }
 plt.xticks(plt.xticks()[0], ['%s (%d)' % (t, counts_by_token[t]) for t in tokens])
 
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: '%.1f%%' % (y * 100)))
-plt.title(f'Slippage by token and swap value ({len(data)} swaps)')
+plt.title(f'Slippage by token and swap value ({table.num_rows} swaps)')
 plt.ylabel('slippage (+ is good)')
 plt.subplots_adjust(top=0.9, right=0.95, left=0.05)
 plt.show()
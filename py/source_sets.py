@@ -0,0 +1,94 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from asset_data import NATIVE_SOURCE
+
+# Classes of `get_source_classes()`.
+SOURCE_CLASSES = ['0x', 'bridge', 'native-mix', 'bridge-mix']
+MAX_SOURCES = 64
+
+def build_source_sets(table):
+    # Interns the sources each swap used (non-zero proportion) into a bitmask
+    # over a dictionary of every source name in `table` (bit i is
+    # `names[i]`). `proportions` is the (swap x source) proportion matrix in
+    # sparse (coordinate) form.
+    sources = pc.list_flatten(table['sources'])
+    swaps = pc.list_parent_indices(table['sources']).to_numpy()
+    proportions = pc.struct_field(sources, 'proportion').fill_null(0).to_numpy()
+    encoded = pc.dictionary_encode(pc.struct_field(sources, 'name'))
+    if isinstance(encoded, pa.ChunkedArray):
+        encoded = encoded.unify_dictionaries().combine_chunks()
+    # Sorted names, so bits don't depend on the order sources first appear.
+    names = np.asarray(encoded.dictionary.to_pylist(), dtype=str)
+    order = np.argsort(names)
+    names = names[order]
+    if len(names) > MAX_SOURCES:
+        raise ValueError(f'more than {MAX_SOURCES} sources')
+    codes = np.argsort(order)[encoded.indices.to_numpy()]
+    used = proportions > 0
+    masks = np.zeros(table.num_rows, dtype=np.uint64)
+    # Sources are grouped by swap, so each swap's bits are one contiguous run.
+    used_swaps = swaps[used]
+    starts = np.flatnonzero(np.diff(used_swaps, prepend=-1))
+    bits = np.left_shift(np.uint64(1), codes[used].astype(np.uint64))
+    if len(starts):
+        masks[used_swaps[starts]] = np.bitwise_or.reduceat(bits, starts)
+    return {
+        'names': names,
+        'masks': masks,
+        'proportions': {
+            'swaps': swaps[used],
+            'sources': codes[used],
+            'values': proportions[used],
+            'shape': (table.num_rows, len(names)),
+        },
+    }
+
+def get_source_bit(source_sets, name):
+    # 0 (matches nothing) for unknown sources.
+    i = np.searchsorted(source_sets['names'], name)
+    if i == len(source_sets['names']) or source_sets['names'][i] != name:
+        return np.uint64(0)
+    return np.left_shift(np.uint64(1), np.uint64(i))
+
+def get_source_counts(masks):
+    # Number of sources (set bits) of every swap.
+    return np.unpackbits(masks.astype('<u8').view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+def has_source(source_sets, name):
+    return (source_sets['masks'] & get_source_bit(source_sets, name)) != 0
+
+def has_only_source(source_sets, name):
+    bit = get_source_bit(source_sets, name)
+    return (source_sets['masks'] == bit) & (bit != 0)
+
+def get_single_sources(source_sets):
+    # Name of the only source of single-source swaps, None for the rest.
+    masks = source_sets['masks']
+    single = get_source_counts(masks) == 1
+    names = np.full(len(masks), None, dtype=object)
+    # The only set bit of a power of two is its log2.
+    names[single] = source_sets['names'][np.log2(masks[single].astype(float)).astype(int)]
+    return names
+
+def get_source_classes(source_sets):
+    # Native only, a single bridge, or a mix with or without native orders.
+    masks = source_sets['masks']
+    native = get_source_bit(source_sets, NATIVE_SOURCE)
+    counts = get_source_counts(masks)
+    has_native = (masks & native) != 0
+    return np.select(
+        [(counts == 1) & has_native, (counts == 1) & ~has_native, (counts > 1) & has_native, counts > 1],
+        SOURCE_CLASSES,
+        None,
+    )
+
+def get_source_set_names(source_sets):
+    # '+'-joined names of the sources each swap used, joining once per
+    # distinct set.
+    masks, inverse = np.unique(source_sets['masks'], return_inverse=True)
+    bits = np.left_shift(np.uint64(1), np.arange(len(source_sets['names']), dtype=np.uint64))
+    joined = np.array([
+        '+'.join(source_sets['names'][(mask & bits) != 0]) for mask in masks
+    ], dtype=object)
+    return joined[inverse.reshape(-1)]
@@ -5,7 +5,11 @@ import json
 import argparse
 import itertools
 import pandas as pd
-from utils import DELAYS, load_data
+import numpy as np
+import pyarrow.compute as pc
+from utils import DELAYS
+from swap_store import read_table
+from child_tables import explode_list
 
 sns.set(color_codes=True)
 sns.set_palette('muted')
@@ -17,33 +21,28 @@ def get_program_args():
     return args.parse_args()
 
 args = get_program_args()
-data = load_data(args.path, args.url)
-print(f'Loaded {len(data)} data items')
+table = read_table(args.path, ['maker_token', 'taker_token', 'sources'], args.url)
+print(f'Loaded {table.num_rows} data items')
 
-tokens = set()
-for d in data:
-   tokens.add(d['metadata']['makerToken'])
-   tokens.add(d['metadata']['takerToken'])
-
-counts_by_source_by_token = {}
-for d in data:
-    for source in [s['name'] for s in d['sources']]:
-        counts_by_source_by_token[source] = counts_by_source_by_token.get(source, {})
-        swap_tokens = (d['metadata']['makerToken'], d['metadata']['takerToken'])
-        for token in tokens:
-            counts_by_source_by_token[source][token] = counts_by_source_by_token[source].get(token, 0)
-            counts_by_source_by_token[source][token] += 1 if token in swap_tokens else 0
-sources = sorted(set(counts_by_source_by_token.keys()))
-tokens = sorted(tokens)
-totals_by_token = {
-    token: sum(counts_by_source_by_token[s][token] for s in sources)
-        for token in tokens
-}
+# One row per source of a swap and token of its pair, for every source listed.
+swaps, _, sources = explode_list(table, 'sources')
+names = pc.struct_field(sources, 'name').to_numpy(zero_copy_only=False)
+maker_tokens = table['maker_token'].to_numpy(zero_copy_only=False)[swaps]
+taker_tokens = table['taker_token'].to_numpy(zero_copy_only=False)[swaps]
+same_token = maker_tokens == taker_tokens
+counts_by_source_by_token = pd.crosstab(
+    np.concatenate([names, names[~same_token]]),
+    np.concatenate([maker_tokens, taker_tokens[~same_token]]),
+)
+sources = sorted(counts_by_source_by_token.index)
+tokens = sorted(set(table['maker_token'].to_pylist()) | set(table['taker_token'].to_pylist()))
+counts_by_source_by_token = counts_by_source_by_token.reindex(columns=tokens, fill_value=0)
+totals_by_token = counts_by_source_by_token.sum()
 
 prev_ys = [0 for d in tokens]
 xs = list(range(len(tokens)))
 for s in sources:
-    ys = [counts_by_source_by_token[s][t] / totals_by_token[t] for t in tokens]
+    ys = [counts_by_source_by_token.loc[s, t] / totals_by_token[t] for t in tokens]
     plt.bar(xs, ys, bottom=prev_ys, label=s)
     prev_ys = [py + y for py, y in zip(prev_ys, ys)]
 
@@ -52,5 +51,5 @@ plt.xticks(list(range(len(tokens))), tokens)
 plt.gca().yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, pos: '%d%%' % (y * 100)))
 plt.xlabel('token')
 plt.ylabel('source inclusion rate')
-plt.title(f'frequency of sources included by token ({len(data)} swaps)')
+plt.title(f'frequency of sources included by token ({table.num_rows} swaps)')
 plt.show()
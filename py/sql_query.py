@@ -0,0 +1,27 @@
+import argparse
+import os
+import time
+import pandas as pd
+from sql_store import connect, insert_table
+from swap_store import read_table
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('path', type=str, help='SQLite database (.db) written by `ingest.py --sqlite`, or any output file/store')
+    args.add_argument('query', type=str, help='SQL to run. The `swap_metrics` view has every per-swap metric.')
+    return args.parse_args()
+
+args = get_program_args()
+if args.path.endswith('.db'):
+    if not os.path.exists(args.path):
+        raise FileNotFoundError(args.path)
+    conn = connect(args.path)
+else:
+    conn = connect(':memory:')
+    print(f'Loaded {insert_table(conn, read_table(args.path))} data items')
+
+started = time.time()
+result = pd.read_sql_query(args.query, conn)
+pd.set_option('display.width', 200)
+print(result.to_string(index=False))
+print(f'{len(result)} rows in {(time.time() - started) * 1e3:.1f}ms')
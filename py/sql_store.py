@@ -0,0 +1,172 @@
+import sqlite3
+import pyarrow as pa
+from utils import DELAYS, VALUES
+
+# Wei amounts are stored as decimal strings (SQLite integers are only 64-bit);
+# `CAST(x AS REAL)` them for arithmetic.
+SWAP_COLUMNS = [
+    'sim_id',
+    'api',
+    'api_url',
+    'side',
+    'maker_token',
+    'taker_token',
+    'timestamp',
+    'fill_value',
+    'fill_delay',
+    'response_time',
+    'gas_used',
+    'gas_price',
+    'protocol_fee',
+    'reverted',
+    'success',
+    'revert_data',
+    'buy_amount',
+    'sell_amount',
+    'bought_amount',
+    'sold_amount',
+    'eth_balance',
+    'bought_amount_usd',
+    'sold_amount_usd',
+    'adjusted_bought_amount_usd',
+    'adjusted_sold_amount_usd',
+]
+ORDER_COLUMNS = [
+    'maker_address',
+    'taker_address',
+    'fee_recipient_address',
+    'sender_address',
+    'maker_asset_data',
+    'taker_asset_data',
+    'maker_asset_amount',
+    'taker_asset_amount',
+]
+SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS swaps (
+    swap_id INTEGER PRIMARY KEY,
+    {', '.join(SWAP_COLUMNS)}
+);
+CREATE TABLE IF NOT EXISTS sources (
+    swap_id INTEGER NOT NULL REFERENCES swaps(swap_id),
+    name TEXT NOT NULL,
+    proportion REAL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    swap_id INTEGER NOT NULL REFERENCES swaps(swap_id),
+    order_index INTEGER NOT NULL,
+    {', '.join(ORDER_COLUMNS)},
+    order_status INTEGER,
+    order_taker_asset_filled_amount
+);
+CREATE INDEX IF NOT EXISTS swaps_sim_id ON swaps(sim_id);
+CREATE INDEX IF NOT EXISTS swaps_api ON swaps(api);
+CREATE INDEX IF NOT EXISTS swaps_tokens ON swaps(maker_token, taker_token);
+CREATE INDEX IF NOT EXISTS swaps_taker_token ON swaps(taker_token);
+CREATE INDEX IF NOT EXISTS swaps_timestamp ON swaps(timestamp);
+CREATE INDEX IF NOT EXISTS sources_name ON sources(name, swap_id);
+CREATE INDEX IF NOT EXISTS sources_swap_id ON sources(swap_id);
+CREATE INDEX IF NOT EXISTS orders_swap_id ON orders(swap_id);
+CREATE INDEX IF NOT EXISTS orders_maker_address ON orders(maker_address);
+'''
+
+def get_bucket_case(column, buckets, bound):
+    # SQL for the `utils.get_max_value()`/`get_min_delay()` bucket of `column`.
+    whens = ' '.join(
+        f'WHEN {column} < {max_bound} THEN {min_bound if bound == "min" else max_bound}'
+            for min_bound, max_bound in buckets
+    )
+    # 9e999 is how SQLite spells infinity.
+    overflow = buckets[-1][1] if bound == 'min' else '9e999'
+    return f'CASE {whens} ELSE {overflow} END'
+
+# One row per swap with every metric the py/ scripts compute. Per-swap child
+# row metrics are correlated subqueries, so filtered queries only look up the
+# orders and sources of the swaps they match, by their `swap_id` indexes.
+# `source_count` and `source_set` only count sources with a non-zero
+# proportion.
+METRICS_VIEW = f'''
+DROP VIEW IF EXISTS swap_metrics;
+CREATE VIEW swap_metrics AS
+SELECT
+    m.*,
+    -- Failed swaps have no realized price to compare.
+    CASE WHEN m.success
+        THEN (m.realized_price - m.best_order_price) / m.best_order_price
+    END AS slippage
+FROM (
+    SELECT
+        s.*,
+        {get_bucket_case('s.fill_value', VALUES, 'max')} AS max_value,
+        {get_bucket_case('s.fill_delay', DELAYS, 'min')} AS min_delay,
+        s.maker_token || '/' || s.taker_token AS pair,
+        NOT s.success AS failed,
+        CAST(s.bought_amount AS REAL) / CAST(s.sold_amount AS REAL) AS realized_price,
+        CASE WHEN s.side = 'sell'
+            THEN s.adjusted_bought_amount_usd / s.sold_amount_usd
+            ELSE s.bought_amount_usd / s.adjusted_sold_amount_usd
+        END AS adjusted_realized_price,
+        CAST(s.buy_amount AS REAL) / CAST(s.sell_amount AS REAL) AS quoted_price,
+        (SELECT MAX(CAST(maker_asset_amount AS REAL) / CAST(taker_asset_amount AS REAL))
+            FROM orders o WHERE o.swap_id = s.swap_id) AS best_order_price,
+        (SELECT COUNT(*) FROM sources x WHERE x.swap_id = s.swap_id AND x.proportion > 0) AS source_count,
+        (SELECT GROUP_CONCAT(name, '+') FROM (
+            SELECT name FROM sources x WHERE x.swap_id = s.swap_id AND x.proportion > 0 ORDER BY name
+        )) AS source_set
+    FROM swaps s
+) m;
+'''
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA + METRICS_VIEW)
+    return conn
+
+def to_sql_amount(v):
+    return None if v is None else str(v)
+
+def to_sql_values(column):
+    # Decimals become strings, everything else native python values.
+    if pa.types.is_decimal(column.type):
+        return [to_sql_amount(v) for v in column.to_pylist()]
+    return column.to_pylist()
+
+def get_order_rows(swap_id, orders, infos):
+    # `orderInfos` line up with `orders` by index.
+    for i, order in enumerate(orders):
+        info = infos[i] if i < len(infos) else {}
+        yield (
+            swap_id,
+            i,
+            *(to_sql_amount(order[c]) if c.endswith('_amount') else order[c] for c in ORDER_COLUMNS),
+            info.get('order_status'),
+            to_sql_amount(info.get('order_taker_asset_filled_amount')),
+        )
+
+def insert_table(conn, table):
+    # Appends a swap table (see `swap_store.SCHEMA`), with its sources and
+    # orders as child rows. Returns the number of swaps inserted.
+    start = conn.execute('SELECT COALESCE(MAX(swap_id), 0) FROM swaps').fetchone()[0] + 1
+    swap_ids = range(start, start + table.num_rows)
+    columns = [to_sql_values(table['id' if c == 'sim_id' else c]) for c in SWAP_COLUMNS]
+    conn.executemany(
+        f'INSERT INTO swaps (swap_id, {", ".join(SWAP_COLUMNS)}) VALUES ({", ".join("?" * (len(SWAP_COLUMNS) + 1))})',
+        zip(swap_ids, *columns),
+    )
+    conn.executemany(
+        'INSERT INTO sources (swap_id, name, proportion) VALUES (?, ?, ?)',
+        (
+            (swap_id, s['name'], s['proportion'])
+                for swap_id, sources in zip(swap_ids, table['sources'].to_pylist())
+                for s in sources
+        ),
+    )
+    conn.executemany(
+        f'INSERT INTO orders VALUES ({", ".join("?" * (len(ORDER_COLUMNS) + 4))})',
+        (
+            row
+                for swap_id, orders, infos in zip(swap_ids, table['orders'].to_pylist(), table['order_infos'].to_pylist())
+                for row in get_order_rows(swap_id, orders, infos)
+        ),
+    )
+    conn.commit()
+    return table.num_rows
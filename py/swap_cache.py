@@ -0,0 +1,47 @@
+import hashlib
+import os
+import pyarrow as pa
+
+# Bytes hashed from each end of the log. Hashing whole multi-GB logs would cost
+# about as much as parsing them, and size + mtime already catch appends.
+HASH_BLOCK_SIZE = 1024 * 1024
+
+def get_cache_path(path):
+    head, tail = os.path.split(path)
+    return os.path.join(head, f'.{tail}.arrow')
+
+def get_fingerprint(path, schema):
+    stat = os.stat(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(schema.to_string().encode())
+    with open(path, 'rb') as f:
+        h.update(f.read(HASH_BLOCK_SIZE))
+        if stat.st_size > HASH_BLOCK_SIZE:
+            f.seek(max(stat.st_size - HASH_BLOCK_SIZE, HASH_BLOCK_SIZE))
+            h.update(f.read())
+    return f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{h.hexdigest()}'
+
+def open_cache(path, fingerprint):
+    # Memory-maps the cached table, so opening it is free and concurrent
+    # readers share pages. Returns None if there's no up-to-date cache.
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(get_cache_path(path)))
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if (reader.schema.metadata or {}).get(b'fingerprint') != fingerprint.encode():
+        return None
+    return reader.read_all().replace_schema_metadata(None)
+
+def write_cache(path, fingerprint, table):
+    # Uncompressed so it can be mapped without decoding. Failing to write the
+    # cache (e.g. a read-only directory) is not an error.
+    cache_path = get_cache_path(path)
+    table = table.replace_schema_metadata({ 'fingerprint': fingerprint })
+    try:
+        with pa.OSFile(cache_path + '.tmp', 'wb') as f:
+            with pa.ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(cache_path + '.tmp', cache_path)
+    except OSError:
+        return False
+    return True
@@ -0,0 +1,242 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+import pyarrow as pa
+import pyarrow.compute
+import pyarrow.parquet as pq
+from swap_cache import get_fingerprint, open_cache, write_cache
+from utils import iter_data, parse_lines, filter_swaps, is_successful_swap
+
+# Wei amounts are stored as fixed-width integer decimals.
+AMOUNT = pa.decimal128(38, 0)
+SOURCE = pa.struct([
+    ('name', pa.string()),
+    ('proportion', pa.float64()),
+])
+ORDER = pa.struct([
+    ('maker_address', pa.string()),
+    ('taker_address', pa.string()),
+    ('fee_recipient_address', pa.string()),
+    ('sender_address', pa.string()),
+    ('maker_asset_data', pa.string()),
+    ('taker_asset_data', pa.string()),
+    ('maker_asset_amount', AMOUNT),
+    ('taker_asset_amount', AMOUNT),
+])
+ORDER_INFO = pa.struct([
+    ('order_status', pa.int32()),
+    ('order_taker_asset_filled_amount', AMOUNT),
+])
+SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('api', pa.string()),
+    ('api_url', pa.string()),
+    ('side', pa.string()),
+    ('maker_token', pa.string()),
+    ('taker_token', pa.string()),
+    ('timestamp', pa.int64()),
+    ('fill_value', pa.float64()),
+    ('fill_delay', pa.float64()),
+    ('response_time', pa.float64()),
+    ('gas_used', pa.int64()),
+    ('gas_price', AMOUNT),
+    ('protocol_fee', AMOUNT),
+    ('reverted', pa.bool_()),
+    ('success', pa.bool_()),
+    ('revert_data', pa.string()),
+    ('calldata', pa.string()),
+    ('buy_amount', AMOUNT),
+    ('sell_amount', AMOUNT),
+    ('bought_amount', AMOUNT),
+    ('sold_amount', AMOUNT),
+    ('eth_balance', AMOUNT),
+    ('bought_amount_usd', pa.float64()),
+    ('sold_amount_usd', pa.float64()),
+    ('adjusted_bought_amount_usd', pa.float64()),
+    ('adjusted_sold_amount_usd', pa.float64()),
+    ('sources', pa.list_(SOURCE)),
+    ('orders', pa.list_(ORDER)),
+    ('order_infos', pa.list_(ORDER_INFO)),
+])
+COLUMNS = SCHEMA.names
+BATCH_SIZE = 65536
+# Smallest byte range worth handing to a parser process.
+MIN_RANGE_SIZE = 32 * 1024 * 1024
+PARQUET_MAGIC = b'PAR1'
+# Full tables loaded by `preload_table()`, by path.
+PRELOADED_TABLES = {}
+
+def to_amount(v):
+    return None if v is None else Decimal(str(v))
+
+def to_float(v):
+    return None if v is None else float(v)
+
+def flatten_order(order):
+    return {
+        'maker_address': order.get('makerAddress'),
+        'taker_address': order.get('takerAddress'),
+        'fee_recipient_address': order.get('feeRecipientAddress'),
+        'sender_address': order.get('senderAddress'),
+        'maker_asset_data': order.get('makerAssetData'),
+        'taker_asset_data': order.get('takerAssetData'),
+        'maker_asset_amount': to_amount(order.get('makerAssetAmount')),
+        'taker_asset_amount': to_amount(order.get('takerAssetAmount')),
+    }
+
+def flatten_order_info(info):
+    return {
+        'order_status': info.get('orderStatus'),
+        'order_taker_asset_filled_amount': to_amount(info.get('orderTakerAssetFilledAmount')),
+    }
+
+def flatten_swap(swap):
+    metadata = swap['metadata']
+    result = metadata['swapResult']
+    return {
+        'id': metadata.get('id'),
+        'api': metadata.get('api') or metadata.get('apiURL'),
+        'api_url': metadata.get('apiURL') or metadata.get('apiPath'),
+        'side': metadata.get('side'),
+        'maker_token': metadata['makerToken'],
+        'taker_token': metadata['takerToken'],
+        'timestamp': metadata.get('timestamp'),
+        'fill_value': float(metadata['fillValue']),
+        'fill_delay': float(metadata['fillDelay']),
+        'response_time': to_float(metadata.get('responseTime')),
+        'gas_used': result.get('gasUsed'),
+        'gas_price': to_amount(swap.get('gasPrice')),
+        'protocol_fee': to_amount(swap.get('protocolFee')),
+        'reverted': result['revertData'] != '0x',
+        'success': is_successful_swap(swap),
+        'revert_data': result['revertData'],
+        'calldata': swap.get('data'),
+        'buy_amount': to_amount(swap.get('buyAmount')),
+        'sell_amount': to_amount(swap.get('sellAmount')),
+        'bought_amount': to_amount(result.get('boughtAmount')),
+        'sold_amount': to_amount(result.get('soldAmount')),
+        'eth_balance': to_amount(result.get('ethBalance')),
+        'bought_amount_usd': to_float(result.get('boughtAmountUsd')),
+        'sold_amount_usd': to_float(result.get('soldAmountUsd')),
+        'adjusted_bought_amount_usd': to_float(result.get('adjustedBoughtAmountUsd')),
+        'adjusted_sold_amount_usd': to_float(result.get('adjustedSoldAmountUsd')),
+        'sources': [
+            { 'name': s['name'], 'proportion': float(s['proportion']) }
+            for s in swap.get('sources', [])
+        ],
+        'orders': [flatten_order(o) for o in swap.get('orders', [])],
+        'order_infos': [flatten_order_info(oi) for oi in result.get('orderInfos', [])],
+    }
+
+def get_schema(columns=None):
+    return SCHEMA if columns is None else pa.schema([SCHEMA.field(c) for c in columns])
+
+def to_batches(swaps, columns=None, batch_size=BATCH_SIZE):
+    schema = get_schema(columns)
+    rows = []
+    for swap in swaps:
+        row = flatten_swap(swap)
+        rows.append(row if columns is None else { c: row[c] for c in columns })
+        if len(rows) == batch_size:
+            yield pa.RecordBatch.from_pylist(rows, schema=schema)
+            rows = []
+    if len(rows):
+        yield pa.RecordBatch.from_pylist(rows, schema=schema)
+
+def iter_batches(path, url=None, predicate=None, columns=None, batch_size=BATCH_SIZE):
+    return to_batches(iter_data(path, url, predicate), columns, batch_size)
+
+def get_byte_ranges(path, count):
+    # Splits the file into `count` ranges that each start at the start of a
+    # line.
+    size = os.path.getsize(path)
+    offsets = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, count):
+            f.seek(max(size * i // count - 1, offsets[-1]))
+            f.readline()
+            offsets.append(min(f.tell(), size))
+    offsets.append(size)
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if start < end]
+
+def read_range(path, start, end, columns=None, url=None):
+    swaps = filter_swaps(parse_lines(path, start, end), url)
+    return pa.Table.from_batches(to_batches(swaps, columns), schema=get_schema(columns))
+
+def get_workers(path, workers=None):
+    if workers is None:
+        workers = min(os.cpu_count() or 1, os.path.getsize(path) // MIN_RANGE_SIZE)
+    return max(workers, 1)
+
+def read_log(path, columns=None, url=None, workers=None):
+    # Parses a JSONL log into a table, splitting it across `workers` processes
+    # (by default one per core, for large enough files). Rows keep file order,
+    # so the result is the same for any number of workers.
+    workers = get_workers(path, workers)
+    if workers == 1:
+        return read_range(path, 0, None, columns, url)
+    ranges = get_byte_ranges(path, workers)
+    with ProcessPoolExecutor(workers) as pool:
+        tables = list(pool.map(
+            read_range,
+            *zip(*[(path, start, end, columns, url) for start, end in ranges]),
+        ))
+    return pa.concat_tables(tables).combine_chunks()
+
+def read_cached_log(path, workers=None):
+    # Parses the whole log once, then serves it from a memory-mapped cache
+    # next to it until the log changes.
+    fingerprint = get_fingerprint(path, SCHEMA)
+    table = open_cache(path, fingerprint)
+    if table is None:
+        table = read_log(path, workers=workers)
+        write_cache(path, fingerprint, table)
+    return table
+
+def write_store(path, batches):
+    count = 0
+    with pq.ParquetWriter(path, SCHEMA) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
+
+def is_parquet(path):
+    # By the magic bytes rather than the extension, which is up to the user.
+    try:
+        with open(path, 'rb') as f:
+            return f.read(4) == PARQUET_MAGIC
+    except OSError:
+        return False
+
+def is_store(path):
+    return os.path.isdir(path) or is_parquet(path)
+
+def select_table(table, columns=None, url=None):
+    if url is not None:
+        table = table.filter(pa.compute.match_substring(table['api_url'], url))
+    return table if columns is None else table.select(columns)
+
+def preload_table(path, workers=None):
+    # Loads every column of a store (or the cached table of a log) once so
+    # later `read_table()` calls in the same process are just column
+    # selections.
+    PRELOADED_TABLES[path] = pq.read_table(path) if is_store(path) else read_cached_log(path, workers)
+    return PRELOADED_TABLES[path]
+
+def read_table(path, columns=None, url=None, workers=None):
+    # Accepts either a raw simbot JSONL log or a store written by `ingest.py`.
+    if path in PRELOADED_TABLES:
+        return select_table(PRELOADED_TABLES[path], columns, url)
+    if not is_store(path):
+        return select_table(read_cached_log(path, workers), columns, url)
+    read_columns = columns
+    if url is not None and columns is not None and 'api_url' not in columns:
+        read_columns = [*columns, 'api_url']
+    table = pq.read_table(path, columns=read_columns)
+    if url is None:
+        return table
+    return select_table(table, columns, url)
+
+def load_frame(path, columns=None, url=None):
+    return read_table(path, columns, url).to_pandas()
@@ -0,0 +1,451 @@
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+from asset_data import TOKENS, NATIVE_SOURCE, ERC20_PROXY_ID, ERC20_BRIDGE_PROXY_ID
+from revert_reasons import ERROR_SELECTOR, REVERT_ERRORS
+from calldata import TRANSFORM_ERC20_SELECTOR, TRANSFORMER_NAMES
+from utils import DELAYS, VALUES
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Seeded synthetic simbot output: JSONL lines shaped like what
+# `src/quotes.js:fillQuote()` writes for 0x api `transformERC20()` quotes.
+# Lines are generated in chunks of quote groups (one swap per api, sharing
+# `metadata.id`), each from its own seeded rng, so a file only depends on
+# the seed and size, not on how many processes wrote it.
+
+CHUNK_GROUPS = 2048
+EXCHANGE_PROXY = '0xdef1c0ded9bec7f1a1670819833240f027b25eff'
+EXCHANGE = '0x61935cbdd02287b511119ddb11aeb42f1593b7ef'
+ZERO_ADDRESS = '0x' + '00' * 20
+# Fee recipient of the api's bridge orders.
+BRIDGE_FEE_RECIPIENT = '0x1000000000000000000000000000000000000011'
+START_TIMESTAMP = 1600000000
+START_BLOCK = 10880000
+# Relative frequency of each source in a quote.
+SOURCE_WEIGHTS = {
+    NATIVE_SOURCE: 30,
+    'Uniswap': 8,
+    'Uniswap_V2': 20,
+    'Kyber': 10,
+    'Curve': 8,
+    'Balancer': 10,
+    'Eth2Dai': 4,
+    'MStable': 2,
+    'Mooniswap': 4,
+    'LiquidityProvider': 4,
+}
+# Number of sources of a quote, by relative frequency.
+SOURCE_COUNT_WEIGHTS = [0, 55, 30, 12, 3]
+# Error messages of reverting bridges and other contracts.
+REVERT_MESSAGES = [
+    'UniswapV2: K',
+    'UniswapV2: INSUFFICIENT_OUTPUT_AMOUNT',
+    'Kyber: trade failed',
+    'ERC20: transfer amount exceeds balance',
+    'SafeMath: subtraction overflow',
+    'BAL#507',
+    'Exchange not enabled',
+]
+SELECTORS = { signature.split('(')[0]: bytes.fromhex(selector[2:]) for selector, signature in REVERT_ERRORS.items() }
+TRANSFORMER_NONCES = { name: nonce for nonce, name in TRANSFORMER_NAMES.items() }
+TRANSFORM_ERC20 = bytes.fromhex(TRANSFORM_ERC20_SELECTOR[2:])
+ORDER_STATUS_FILLABLE = 3
+ORDER_STATUS_EXPIRED = 4
+ORDER_STATUS_FULLY_FILLED = 5
+ORDER_STATUS_CANCELLED = 6
+
+def to_word(value):
+    return value.to_bytes(32, 'big')
+
+def to_address_word(address):
+    return bytes(12) + bytes.fromhex(address[2:])
+
+def to_bytes_tail(data):
+    return to_word(len(data)) + data + bytes(-len(data) % 32)
+
+def encode_args(args):
+    # ABI encodes a list of static words (bytes) and dynamic `bytes` (given
+    # as `('bytes', data)`).
+    head_size = 32 * len(args)
+    head = []
+    tail = b''
+    for arg in args:
+        if isinstance(arg, tuple):
+            head.append(to_word(head_size + len(tail)))
+            tail += to_bytes_tail(arg[1])
+        else:
+            head.append(arg)
+    return b''.join(head) + tail
+
+def encode_error(message):
+    return bytes.fromhex(ERROR_SELECTOR[2:]) + encode_args([('bytes', message.encode())])
+
+def encode_revert_error(name, args):
+    return SELECTORS[name] + encode_args(args)
+
+def encode_transform_erc20(input_token, output_token, input_amount, min_output_amount, transformations):
+    # `transformERC20()` calldata. `transformations` are (nonce, data).
+    items = [to_word(nonce) + to_word(64) + to_bytes_tail(data) for nonce, data in transformations]
+    offsets = []
+    offset = 32 * len(items)
+    for item in items:
+        offsets.append(to_word(offset))
+        offset += len(item)
+    return TRANSFORM_ERC20 + b''.join([
+        to_address_word(input_token),
+        to_address_word(output_token),
+        to_word(input_amount),
+        to_word(min_output_amount),
+        to_word(5 * 32),
+        to_word(len(items)),
+        *offsets,
+        *items,
+    ])
+
+def random_address(rng):
+    return f'0x{rng.getrandbits(160):040x}'
+
+def random_hash(rng):
+    return f'0x{rng.getrandbits(256):064x}'
+
+def get_bracket_value(rng, brackets):
+    # Like `getRandomBracketValue()` in `src/utils.js`: a uniform bracket,
+    # then uniform within it.
+    low, high = rng.choice(brackets)
+    return rng.uniform(low, high)
+
+def get_erc20_asset_data(token):
+    return ERC20_PROXY_ID + to_address_word(TOKENS[token]['address']).hex()
+
+def get_bridge_asset_data(token, bridge):
+    return ERC20_BRIDGE_PROXY_ID + encode_args([
+        to_address_word(TOKENS[token]['address']),
+        to_address_word(bridge),
+        ('bytes', to_address_word(TOKENS[token]['address'])),
+    ]).hex()
+
+def to_weis(token, units):
+    return int(units * 10 ** TOKENS[token]['decimals'])
+
+def create_world(seed):
+    # Entities shared by every chunk of a run: makers, fee recipients, the
+    # bridge of each source and how each api behaves.
+    rng = random.Random(f'{seed}:world')
+    return {
+        'makers': [random_address(rng) for i in range(40)],
+        'fee_recipients': [random_address(rng) for i in range(6)],
+        'bridges': { s: random_address(rng) for s in SOURCE_WEIGHTS if s != NATIVE_SOURCE },
+        'run_id': f'run-{rng.getrandbits(32):08x}',
+    }
+
+def get_api_bias(apis, api):
+    # Later apis revert a little less and slip a little more, so A-B
+    # analyses have something to find.
+    i = apis.index(api)
+    return { 'revert_rate': 1 - 0.1 * i, 'slippage': 0.0005 * i }
+
+def create_orders(rng, world, source, maker_token, taker_token, maker_amount, taker_amount, expiration):
+    native = source == NATIVE_SOURCE
+    count = rng.choice([1, 1, 2, 3]) if native else 1
+    # The last order gets what's left after rounding down.
+    maker_share = maker_amount // count
+    taker_share = taker_amount // count
+    orders = []
+    for i in range(count):
+        last = i == count - 1
+        maker = rng.choice(world['makers']) if native else world['bridges'][source]
+        orders.append({
+            'makerAddress': maker,
+            'takerAddress': ZERO_ADDRESS,
+            'feeRecipientAddress': rng.choice(world['fee_recipients']) if native else BRIDGE_FEE_RECIPIENT,
+            'senderAddress': ZERO_ADDRESS,
+            'makerAssetAmount': str(maker_amount - maker_share * i if last else maker_share),
+            'takerAssetAmount': str(taker_amount - taker_share * i if last else taker_share),
+            'makerFee': '0',
+            'takerFee': '0',
+            'expirationTimeSeconds': str(expiration + (rng.randrange(60, 3600) if native else 0)),
+            'salt': str(rng.getrandbits(128)),
+            'makerAssetData': get_erc20_asset_data(maker_token) if native
+                else get_bridge_asset_data(maker_token, world['bridges'][source]),
+            'takerAssetData': get_erc20_asset_data(taker_token),
+            'makerFeeAssetData': '0x',
+            'takerFeeAssetData': '0x',
+            'chainId': 1,
+            'exchangeAddress': EXCHANGE,
+            'signature': f'0x{rng.getrandbits(520):0130x}02' if native else '0x04',
+        })
+    return orders
+
+def encode_fill_quote_data(orders):
+    # Stand-in for the FillQuoteTransformer's `TransformData`: the orders'
+    # amounts, addresses, asset data and signatures, ABI encoded, which is
+    # what makes up most of real calldata.
+    return b''.join(
+        encode_args([
+            to_address_word(o['makerAddress']),
+            to_address_word(o['feeRecipientAddress']),
+            to_word(int(o['makerAssetAmount'])),
+            to_word(int(o['takerAssetAmount'])),
+            to_word(int(o['expirationTimeSeconds'])),
+            to_word(int(o['salt'])),
+            ('bytes', bytes.fromhex(o['makerAssetData'][2:])),
+            ('bytes', bytes.fromhex(o['takerAssetData'][2:])),
+            ('bytes', bytes.fromhex(o['signature'][2:])),
+        ]) for o in orders
+    )
+
+def is_native_order(order):
+    return order['makerAssetData'].startswith(ERC20_PROXY_ID)
+
+def create_revert_data(rng, native, maker_token, taker_token, side, amounts):
+    # Native orders mostly revert because they were filled or expired; bridges
+    # with their own errors.
+    if native and rng.random() < 0.6:
+        inner = encode_revert_error('IncompleteFillSellQuoteError' if side == 'sell' else 'IncompleteFillBuyQuoteError', [
+            to_address_word(TOKENS[taker_token if side == 'sell' else maker_token]['address']),
+            to_word(amounts[0] // 2),
+            to_word(amounts[0]),
+        ])
+    elif native and rng.random() < 0.5:
+        inner = encode_revert_error('OrderStatusError', [
+            bytes.fromhex(random_hash(rng)[2:]),
+            to_word(rng.choice([ORDER_STATUS_EXPIRED, ORDER_STATUS_FULLY_FILLED, ORDER_STATUS_CANCELLED])),
+        ])
+    else:
+        inner = encode_error(rng.choice(REVERT_MESSAGES))
+    if rng.random() < 0.8:
+        return encode_revert_error('TransformerFailedError', [
+            to_address_word(random_address(rng)),
+            ('bytes', b''),
+            ('bytes', inner),
+        ])
+    return inner
+
+def get_order_infos(rng, orders, reverted):
+    infos = []
+    for o in orders:
+        status = ORDER_STATUS_FILLABLE
+        filled = 0
+        if is_native_order(o) and reverted and rng.random() < 0.7:
+            status = rng.choice([ORDER_STATUS_FILLABLE, ORDER_STATUS_EXPIRED, ORDER_STATUS_FULLY_FILLED, ORDER_STATUS_FULLY_FILLED])
+        if status == ORDER_STATUS_FULLY_FILLED:
+            filled = int(o['takerAssetAmount'])
+        elif status == ORDER_STATUS_FILLABLE and rng.random() < 0.2:
+            filled = int(o['takerAssetAmount']) * rng.randrange(1, 100) // 100
+        infos.append({
+            'orderHash': random_hash(rng),
+            'orderStatus': status,
+            'orderTakerAssetFilledAmount': str(filled),
+        })
+    return infos
+
+def create_swap(rng, world, group, api, apis):
+    bias = get_api_bias(apis, api)
+    maker_token = group['maker_token']
+    taker_token = group['taker_token']
+    maker_price = TOKENS[maker_token]['value']
+    taker_price = TOKENS[taker_token]['value']
+    eth_price = TOKENS['ETH']['value']
+    side = group['side']
+    value = group['fill_value']
+    # The quote trades `value` worth of tokens, minus a spread.
+    spread = rng.uniform(0.001, 0.01)
+    sell_units = value / taker_price
+    buy_units = value * (1 - spread) / maker_price
+    sell_amount = to_weis(taker_token, sell_units)
+    buy_amount = to_weis(maker_token, buy_units)
+
+    names = list(SOURCE_WEIGHTS)
+    source_count = rng.choices(range(len(SOURCE_COUNT_WEIGHTS)), SOURCE_COUNT_WEIGHTS)[0]
+    sources = []
+    while len(sources) < source_count:
+        name = rng.choices(names, list(SOURCE_WEIGHTS.values()))[0]
+        if name not in sources:
+            sources.append(name)
+    weights = [rng.random() + 0.1 for s in sources]
+    proportions = [round(w / sum(weights), 4) for w in weights]
+    proportions[-1] = round(1 - sum(proportions[:-1]), 4)
+
+    # Orders fill exactly the swap's amounts, the last source getting what's
+    # left after rounding down.
+    buy_amounts = [int(buy_amount * p) for p in proportions[:-1]]
+    sell_amounts = [int(sell_amount * p) for p in proportions[:-1]]
+    buy_amounts.append(buy_amount - sum(buy_amounts))
+    sell_amounts.append(sell_amount - sum(sell_amounts))
+
+    timestamp = group['timestamp']
+    orders = []
+    for source, source_buy_amount, source_sell_amount in zip(sources, buy_amounts, sell_amounts):
+        orders += create_orders(
+            rng,
+            world,
+            source,
+            maker_token,
+            taker_token,
+            source_buy_amount,
+            source_sell_amount,
+            timestamp,
+        )
+    native = NATIVE_SOURCE in sources
+    native_count = sum(1 for o in orders if is_native_order(o))
+    gas_price = rng.choice([40, 50, 60, 80, 100, 150]) * 10 ** 9
+    protocol_fee = native_count * 70000 * gas_price
+
+    transformations = []
+    if taker_token == 'ETH':
+        transformations.append((TRANSFORMER_NONCES['WethTransformer'], to_address_word(TOKENS['ETH']['address']) + to_word(sell_amount)))
+    transformations.append((TRANSFORMER_NONCES['FillQuoteTransformer'], encode_fill_quote_data(orders)))
+    transformations.append((TRANSFORMER_NONCES['PayTakerTransformer'], encode_args([
+        to_word(64), to_word(128), to_word(1), to_address_word(TOKENS[maker_token]['address']), to_word(0),
+    ])))
+    if rng.random() < 0.1:
+        transformations.append((TRANSFORMER_NONCES['AffiliateFeeTransformer'], encode_args([
+            to_address_word(TOKENS[maker_token]['address']), to_word(0), to_address_word(random_address(rng)),
+        ])))
+    min_buy_amount = int(buy_amount * 0.99)
+    calldata = encode_transform_erc20(
+        TOKENS[taker_token]['address'],
+        TOKENS[maker_token]['address'],
+        sell_amount,
+        min_buy_amount,
+        transformations,
+    )
+
+    # Reverts get likelier the longer the fill is delayed and the more
+    # native orders (which can be filled by someone else) there are.
+    delay = group['fill_delay']
+    revert_rate = (0.02 + 0.1 * delay / DELAYS[-1][1] + 0.04 * native_count) * bias['revert_rate']
+    reverted = rng.random() < revert_rate
+    tx_data_gas_used = (len(calldata) - calldata.count(0)) * 16
+    execution_gas = int((90000 + 45000 * native_count + 85000 * (len(orders) - native_count)) * rng.uniform(0.9, 1.2))
+    if reverted:
+        revert_data = '0x' + create_revert_data(rng, native, maker_token, taker_token, side, [sell_amount, buy_amount]).hex()
+        bought_amount = 0
+        sold_amount = 0
+        execution_gas //= 2
+    else:
+        revert_data = '0x'
+        slippage = rng.gauss(-bias['slippage'], 0.003)
+        bought_amount = max(int(buy_amount * (1 + slippage)), 0)
+        sold_amount = sell_amount
+    gas_used = execution_gas + tx_data_gas_used
+    protocol_fee_paid = 0 if reverted else protocol_fee
+    bought_amount_usd = bought_amount / 10 ** TOKENS[maker_token]['decimals'] * maker_price
+    sold_amount_usd = sold_amount / 10 ** TOKENS[taker_token]['decimals'] * taker_price
+    gas_used_usd = gas_used * gas_price / 1e18 * eth_price
+    protocol_fee_usd = protocol_fee_paid / 1e18 * eth_price
+    cost_usd = gas_used_usd + protocol_fee_usd
+    swap = {
+        'price': str(buy_units / sell_units if side == 'sell' else sell_units / buy_units),
+        'guaranteedPrice': str((buy_units / sell_units if side == 'sell' else sell_units / buy_units) * 0.99),
+        'to': EXCHANGE_PROXY,
+        'data': '0x' + calldata.hex(),
+        'value': str(protocol_fee + (sell_amount if taker_token == 'ETH' else 0)),
+        'gas': str(int(gas_used * 1.5)),
+        'estimatedGas': str(gas_used),
+        'from': ZERO_ADDRESS,
+        'gasPrice': str(gas_price),
+        'protocolFee': str(protocol_fee),
+        'minimumProtocolFee': str(protocol_fee),
+        'buyTokenAddress': TOKENS[maker_token]['address'],
+        'sellTokenAddress': TOKENS[taker_token]['address'],
+        'buyAmount': str(buy_amount),
+        'sellAmount': str(sell_amount),
+        'sources': [{ 'name': s, 'proportion': str(p) } for s, p in zip(sources, proportions)],
+        'orders': orders,
+        'allowanceTarget': '0xf740b67da229f2f10bcbd38a7979992fcc71b8eb',
+        'metadata': {
+            'id': group['id'],
+            'makerToken': maker_token,
+            'takerToken': taker_token,
+            'apiPath': f'https://api.example.com/{api}/swap/v1/quote',
+            'api': api,
+            'side': side,
+            'fillAmount': str(sell_amount if side == 'sell' else buy_amount),
+            'fillValue': value,
+            'timestamp': timestamp,
+            'responseTime': rng.lognormvariate(-0.5, 0.5),
+            'fillDelay': delay,
+            'maxSellAmount': str(sell_amount),
+            'ethPrice': eth_price,
+            'sellTokenPrice': taker_price,
+            'buyTokenPrice': maker_price,
+            'ethUsd': str(eth_price),
+            'makerTokenUsd': str(maker_price),
+            'makerTokenDecimals': TOKENS[maker_token]['decimals'],
+            'takerTokenDecimals': TOKENS[taker_token]['decimals'],
+            'swapResult': {
+                'gasUsed': gas_used,
+                'blockNumber': group['block_number'],
+                'revertData': revert_data,
+                'boughtAmount': str(bought_amount),
+                'soldAmount': str(sold_amount),
+                'ethBalance': '0',
+                'protocolFeePaid': str(protocol_fee_paid),
+                'orderInfos': get_order_infos(rng, orders, reverted),
+                'success': not reverted and bought_amount > 0,
+                'soldAmountUsd': str(sold_amount_usd),
+                'boughtAmountUsd': str(bought_amount_usd),
+                'protocolFeeUsd': str(protocol_fee_usd),
+                'gasUsedUsd': str(gas_used_usd),
+                'adjustedBoughtAmountUsd': str(bought_amount_usd - cost_usd),
+                'adjustedSoldAmountUsd': str(sold_amount_usd + cost_usd),
+                'costUsd': str(cost_usd),
+                'txDataGasUsed': tx_data_gas_used,
+            },
+        },
+    }
+    if len(apis) > 1:
+        swap['metadata']['runId'] = world['run_id']
+    return swap
+
+def create_group(rng, index):
+    tokens = [t for t in TOKENS if t != 'ETH' or rng.random() < 0.3]
+    maker_token, taker_token = rng.sample(tokens, 2)
+    return {
+        'id': random_hash(rng),
+        'side': rng.choice(['buy', 'sell']),
+        'maker_token': maker_token,
+        'taker_token': taker_token,
+        'fill_value': get_bracket_value(rng, VALUES),
+        'fill_delay': get_bracket_value(rng, DELAYS),
+        'timestamp': START_TIMESTAMP + index * 2,
+        'block_number': START_BLOCK + index // 6,
+    }
+
+def dumps(swap):
+    return orjson.dumps(swap) if orjson is not None else json.dumps(swap).encode()
+
+def generate_chunk(seed, chunk, apis, swap_count):
+    # JSONL bytes of chunk `chunk` of a `swap_count` swap file.
+    rng = random.Random(f'{seed}:{chunk}')
+    world = create_world(seed)
+    lines = []
+    start = chunk * CHUNK_GROUPS * len(apis)
+    for i in range(CHUNK_GROUPS):
+        group = create_group(rng, chunk * CHUNK_GROUPS + i)
+        for api in apis:
+            if start + len(lines) == swap_count:
+                return b''.join(lines)
+            lines.append(dumps(create_swap(rng, world, group, api, apis)) + b'\n')
+    return b''.join(lines)
+
+def write_swaps(path, swap_count, seed=1, apis=['A', 'B'], jobs=1):
+    # Writes `swap_count` swaps, generating chunks in `jobs` processes.
+    chunk_count = -(-swap_count // (CHUNK_GROUPS * len(apis)))
+    with open(path, 'wb') as f:
+        if jobs == 1:
+            for chunk in range(chunk_count):
+                f.write(generate_chunk(seed, chunk, apis, swap_count))
+            return swap_count
+        with ProcessPoolExecutor(jobs) as pool:
+            # A few chunks ahead per process, so finished chunks don't pile
+            # up in memory.
+            for start in range(0, chunk_count, jobs * 4):
+                chunks = range(start, min(start + jobs * 4, chunk_count))
+                for data in pool.map(generate_chunk, *zip(*[(seed, c, apis, swap_count) for c in chunks])):
+                    f.write(data)
+    return swap_count
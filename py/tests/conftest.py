@@ -0,0 +1,17 @@
+import os
+import sys
+import pytest
+
+# The modules under `py/` import each other by name, as scripts run from it.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import write_swaps
+
+SWAP_COUNT = 600
+
+@pytest.fixture(scope='session')
+def swaps_path(tmp_path_factory):
+    # A small simbot log of A-B swaps, the same on every run.
+    path = str(tmp_path_factory.mktemp('swaps') / 'swaps.json')
+    write_swaps(path, SWAP_COUNT, seed=7)
+    return path
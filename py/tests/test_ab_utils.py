@@ -0,0 +1,47 @@
+import numpy as np
+from ab_utils import load_ab_data, pivot_ab, get_ab_edges, get_ab_swaps, get_latest_swaps
+from swap_store import read_log
+
+def test_pivot_matches_ab_groups(swaps_path, tmp_path):
+    # A group that lost one api's swap, and a repeated (later) quote.
+    with open(swaps_path) as f:
+        lines = f.readlines()
+    path = str(tmp_path / 'swaps.json')
+    with open(path, 'w') as f:
+        f.writelines([*lines[1:], lines[10]])
+    table = read_log(path)
+    wide, apis, incomplete = pivot_ab(table, { 'gas': table['gas_used'].to_numpy(zero_copy_only=False) })
+    groups = load_ab_data(path)
+    assert apis == ['A', 'B']
+    complete = { d['A']['metadata']['id']: d for d in groups if len(d) == 2 }
+    assert sorted(wide.index) == sorted(complete)
+    assert incomplete == [d[next(iter(d))]['metadata']['id'] for d in groups if len(d) < 2]
+    for id, group in complete.items():
+        for api in apis:
+            assert wide.loc[id, f'gas_{api}'] == group[api]['metadata']['swapResult']['gasUsed']
+    edges = get_ab_edges(wide, 'gas', apis)
+    ties = wide['gas_A'] == wide['gas_B']
+    assert sorted(edges.index) == sorted(wide.index[~ties])
+    assert ((edges['best'] == 'A') == (wide.loc[edges.index, 'gas_A'] > wide.loc[edges.index, 'gas_B'])).all()
+
+def test_latest_swaps_drop_repeated_quotes(swaps_path):
+    table = read_log(swaps_path)
+    repeated = table.take(np.concatenate([np.arange(table.num_rows), [3, 5, 3]]))
+    latest = get_latest_swaps(repeated)
+    assert latest.sum() == table.num_rows
+    assert not latest[[3, 5]].any()
+    assert latest[-2:].all()
+
+def test_ab_swaps_match_ab_groups(swaps_path, tmp_path):
+    with open(swaps_path) as f:
+        lines = f.readlines()
+    path = str(tmp_path / 'swaps.json')
+    with open(path, 'w') as f:
+        f.writelines([*lines[1:], lines[10]])
+    groups = load_ab_data(path)
+    for min_apis in [1, 2]:
+        table, num_groups = get_ab_swaps(read_log(path), min_apis)
+        expected = [s for d in groups if len(d) >= min_apis for s in d.values()]
+        assert num_groups == len([d for d in groups if len(d) >= min_apis])
+        assert sorted(zip(table['id'].to_pylist(), table['response_time'].to_pylist())) \
+            == sorted((s['metadata']['id'], s['metadata']['responseTime']) for s in expected)
@@ -0,0 +1,37 @@
+import pandas as pd
+from aggregate import get_revert_rates, complete_revert_rates
+from swap_store import read_log
+from utils import VALUES
+
+def test_complete_one_dim_keeps_totals():
+    rates = pd.DataFrame({ 'value': [100, 1000], 'total': [5, 7], 'reverts': [1, 2] })
+    rates['revert rate'] = rates['reverts'] / rates['total']
+    completed = complete_revert_rates(rates, { 'value': [100, 1000, 10000] })
+    assert completed['value'].tolist() == [100, 1000, 10000]
+    assert completed['total'].tolist() == [5, 7, 0]
+    assert completed['reverts'].tolist() == [1, 2, 0]
+
+def test_complete_two_dims_keeps_totals():
+    rates = pd.DataFrame({ 'value': [100, 1000], 'delay': [0.0, 60.0], 'total': [5, 7], 'reverts': [1, 2] })
+    rates['revert rate'] = rates['reverts'] / rates['total']
+    completed = complete_revert_rates(rates, { 'value': [100, 1000], 'delay': [0.0, 60.0] })
+    assert len(completed) == 4
+    totals = completed.set_index(['value', 'delay'])['total']
+    assert totals[(100, 0.0)] == 5
+    assert totals[(1000, 60.0)] == 7
+    assert totals[(100, 60.0)] == 0
+
+def test_revert_rates_match_pandas(swaps_path):
+    table = read_log(swaps_path)
+    rates = get_revert_rates(table, ['api', 'value'])
+    rates = complete_revert_rates(rates, {
+        'api': sorted(set(rates['api'])),
+        'value': [max_value for min_value, max_value in VALUES],
+    })
+    df = table.select(['api', 'fill_value', 'reverted']).to_pandas()
+    for api, max_value, total, reverts in rates[['api', 'value', 'total', 'reverts']].itertuples(index=False):
+        min_value = next(lo for lo, hi in VALUES if hi == max_value)
+        in_bucket = df[(df['api'] == api) & (df['fill_value'] >= min_value) & (df['fill_value'] < max_value)]
+        assert total == len(in_bucket)
+        assert reverts == in_bucket['reverted'].sum()
+    assert rates['total'].sum() > 0
@@ -0,0 +1,61 @@
+import pyarrow as pa
+from asset_data import NATIVE_SOURCE, TOKENS, decode_asset_data, build_asset_dictionary, get_order_assets, load_tokens
+from child_tables import CHILD_TABLES
+from swap_store import read_log
+from synthetic import create_world, get_erc20_asset_data, get_bridge_asset_data
+
+BRIDGE = '0x' + '22' * 20
+
+def build_child_table(table, name):
+    columns, build = CHILD_TABLES[name]
+    return build(table.select(columns))
+
+def test_decodes_asset_data():
+    dai = TOKENS['DAI']['address']
+    assert decode_asset_data(get_erc20_asset_data('DAI')) == ('ERC20', dai, None)
+    assert decode_asset_data(get_bridge_asset_data('DAI', BRIDGE)) == ('ERC20Bridge', dai, BRIDGE)
+    assert decode_asset_data(get_erc20_asset_data('DAI').upper().replace('0X', '0x')) == ('ERC20', dai, None)
+    assert decode_asset_data(get_erc20_asset_data('DAI')[:-2]) == ('0xf47261b0', None, None)
+    assert decode_asset_data('0x94cfcdd7' + '00' * 64) == ('0x94cfcdd7', None, None)
+    assert decode_asset_data(None) == (None, None, None)
+
+def test_dictionary_decodes_each_value_once():
+    values = [get_erc20_asset_data('DAI'), None, get_bridge_asset_data('USDC', BRIDGE), get_erc20_asset_data('DAI')]
+    indices, dictionary = build_asset_dictionary(pa.chunked_array([values[:2], values[2:]]))
+    assert len(dictionary) == 2
+    assert indices.tolist() == [0, -1, 1, 0]
+    assert dictionary['token'].tolist() == ['DAI', 'USDC']
+    assert dictionary['bridge'].isna().tolist() == [True, False] and dictionary['bridge'][1] == BRIDGE
+
+def test_bridges_are_named_after_their_source(swaps_path):
+    table = read_log(swaps_path)
+    orders = build_child_table(table, 'orders')
+    assets = get_order_assets(orders, build_child_table(table, 'sources'))
+    assert len(assets) == orders.num_rows
+    sources = { address: source for source, address in create_world(7)['bridges'].items() }
+    named = 0
+    for proxy, bridge, source in set(zip(assets['proxy'], assets['bridge'], assets['source'])):
+        if proxy == 'ERC20':
+            assert source == NATIVE_SOURCE
+        else:
+            assert source in [sources[bridge], bridge]
+            named += source == sources[bridge]
+    assert named > 0
+    # Without sources bridges keep their address.
+    assets = get_order_assets(orders)
+    bridges = assets[assets['proxy'] == 'ERC20Bridge']
+    assert len(bridges) and (bridges['source'].astype(str) == bridges['bridge'].astype(str)).all()
+
+def test_load_tokens(tmp_path):
+    path = tmp_path / 'tokens.js'
+    path.write_text('''const TOKENS = {
+    DAI: {
+        decimals: 18,
+        address: '0x6B175474E89094C44Da98b954EedeAC495271d0F',
+        value: 1.01,
+    },
+};''')
+    assert load_tokens(str(path)) == {
+        'DAI': { 'address': '0x6b175474e89094c44da98b954eedeac495271d0f', 'decimals': 18, 'value': 1.01 },
+    }
+    assert load_tokens(str(tmp_path / 'missing.js')) == {}
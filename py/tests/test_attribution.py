@@ -0,0 +1,33 @@
+import numpy as np
+from attribution import attribute, get_attribution
+from source_sets import build_source_sets, get_single_sources
+from swap_store import read_log
+
+def test_attribution_totals(swaps_path):
+    table = read_log(swaps_path)
+    source_sets = build_source_sets(table)
+    gas = table['gas_used'].to_numpy(zero_copy_only=False).astype(float)
+    has_sources = source_sets['masks'] != 0
+    sums = attribute(source_sets, gas)
+    assert np.isclose(sums.sum(), gas[has_sources].sum())
+    attribution = get_attribution(source_sets, gas)
+    assert np.isclose(attribution['weight'].sum(), has_sources.sum())
+    # Single-source swaps count fully towards their source.
+    single = get_single_sources(source_sets)
+    name = next(s for s in single if s is not None)
+    only = get_attribution(source_sets, gas, where=single == name)
+    assert only['source'].tolist() == [name]
+    assert np.isclose(only['mean'][0], gas[single == name].mean())
+
+def test_attribution_by_group(swaps_path):
+    table = read_log(swaps_path)
+    source_sets = build_source_sets(table)
+    failed = (~table['success'].to_numpy(zero_copy_only=False)).astype(float)
+    apis = sorted(set(table['api'].to_pylist()))
+    groups = np.searchsorted(apis, table['api'].to_numpy(zero_copy_only=False))
+    by_api = get_attribution(source_sets, failed, groups, apis)
+    overall = get_attribution(source_sets, failed).set_index('source')
+    weights = by_api.groupby('source')['weight'].sum()
+    assert np.allclose(weights, overall['weight'][weights.index])
+    failures = (by_api['mean'] * by_api['weight']).groupby(by_api['source']).sum()
+    assert np.allclose(failures, (overall['mean'] * overall['weight'])[failures.index])
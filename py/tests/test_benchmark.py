@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark.py')
+
+def benchmark(output, *args):
+    return subprocess.run(
+        [sys.executable, BENCHMARK, output, '--sizes', '200', '-j', '1', '-a', 'pipeline', '-a', 'revert_rate_by_source', *args],
+        capture_output=True,
+        text=True,
+    )
+
+def test_benchmark_runs_and_compares(tmp_path):
+    output = str(tmp_path / 'bench')
+    assert benchmark(output).returncode == 0
+    with open(os.path.join(output, 'benchmark.json')) as f:
+        result = json.load(f)
+    steps = result['steps']
+    assert [s['name'] for s in steps] == ['generate', 'ingest', 'parse', 'pipeline', 'revert_rate_by_source']
+    assert all(s['error'] is None and s['size'] == 200 and s['seconds'] > 0 for s in steps)
+    assert set(steps[3]['phases']) == {'load', 'filter', 'aggregate', 'render'}
+    with open(os.path.join(output, 'data', 'swaps-200-1.json'), 'rb') as f:
+        assert f.read().count(b'\n') == 200
+    # Reuses the generated data, and compares against the first run.
+    baseline = str(tmp_path / 'baseline.json')
+    os.replace(os.path.join(output, 'benchmark.json'), baseline)
+    run = benchmark(output, '--baseline', baseline, '--tolerance', '1000')
+    assert run.returncode == 0 and 'No regressions' in run.stdout
+    with open(os.path.join(output, 'benchmark.json')) as f:
+        assert [s['name'] for s in json.load(f)['steps']][0] == 'ingest'
+    run = benchmark(output, '--baseline', baseline, '--tolerance', '0.001')
+    assert run.returncode == 1 and 'Regression: 200 ingest: seconds' in run.stdout
@@ -0,0 +1,48 @@
+import numpy as np
+from functools import partial
+from bootstrap import bootstrap, get_chunk_size, get_interval, get_shares, get_pattern_means, get_medians
+
+COUNTS = [120, 60, 20]
+
+def test_same_seed_same_samples():
+    samples = bootstrap(get_shares, COUNTS, resamples=1000, seed=3)
+    assert samples.shape == (1000, len(COUNTS))
+    assert np.array_equal(samples, bootstrap(get_shares, COUNTS, resamples=1000, seed=3))
+    assert not np.array_equal(samples, bootstrap(get_shares, COUNTS, resamples=1000, seed=4))
+
+def test_workers_do_not_change_samples():
+    # A budget small enough for several chunks.
+    budget = 100 * len(COUNTS) * 8 * 3
+    assert get_chunk_size(len(COUNTS), budget) == 100
+    serial = bootstrap(get_shares, COUNTS, resamples=1050, seed=1, budget=budget)
+    parallel = bootstrap(get_shares, COUNTS, resamples=1050, seed=1, budget=budget, workers=3)
+    assert serial.shape == (1050, len(COUNTS))
+    assert np.array_equal(serial, parallel)
+
+def test_shares_match_row_bootstrap():
+    # Resampling counts has the same spread as resampling rows, i.e. the
+    # binomial standard error of each share.
+    samples = bootstrap(get_shares, COUNTS, resamples=20000, seed=2)
+    n = sum(COUNTS)
+    shares = np.array(COUNTS) / n
+    assert np.allclose(samples.mean(axis=0), shares, atol=0.005)
+    assert np.allclose(samples.std(axis=0), np.sqrt(shares * (1 - shares) / n), rtol=0.05)
+    low, high = get_interval(samples)
+    assert (low < shares).all() and (shares < high).all()
+
+def test_statistics_of_counts():
+    counts = np.array([[2, 0, 1], [0, 0, 0], [1, 1, 2]], dtype=float)
+    patterns = np.array([[1, 0], [0, 1], [1, 1]], dtype=float)
+    means = get_pattern_means(patterns, counts)
+    assert np.allclose(means[0], [1, 1 / 3])
+    assert np.isnan(means[1]).all()
+    assert np.allclose(means[2], [3 / 4, 3 / 4])
+    values = [10, 20, 30]
+    medians = get_medians(values, counts)
+    assert medians.shape == (3, 1)
+    assert medians[0, 0] == np.median(np.repeat(values, [2, 0, 1]))
+    assert np.isnan(medians[1, 0])
+    assert medians[2, 0] == 20
+    statistic = partial(get_pattern_means, patterns)
+    samples = bootstrap(statistic, counts[0], resamples=500, workers=2, budget=100 * 3 * 8 * 3)
+    assert samples.shape == (500, 2)
@@ -0,0 +1,53 @@
+import pyarrow as pa
+from calldata import ZERO_BYTE_GAS, NONZERO_BYTE_GAS, get_calldata_stats
+from swap_store import read_log
+from synthetic import encode_transform_erc20
+from asset_data import TOKENS
+
+WETH = TOKENS['WETH']['address']
+DAI = TOKENS['DAI']['address']
+CALLDATA = encode_transform_erc20(WETH, DAI, 10 ** 18, 10 ** 20, [(3, bytes(100)), (2, b'')])
+
+def test_decodes_transform_erc20():
+    stats = get_calldata_stats(pa.array(['0x' + CALLDATA.hex()]))
+    row = stats.iloc[0]
+    zero_bytes = CALLDATA.count(0)
+    assert row['calldata_size'] == len(CALLDATA)
+    assert row['zero_bytes'] == zero_bytes
+    assert row['calldata_gas'] == zero_bytes * ZERO_BYTE_GAS + (len(CALLDATA) - zero_bytes) * NONZERO_BYTE_GAS
+    assert row['function'] == 'transformERC20'
+    assert (row['input_token'], row['output_token']) == ('WETH', 'DAI')
+    assert row['transformations'] == 2
+    assert row['transformers'] == 'FillQuoteTransformer+PayTakerTransformer'
+
+def test_truncated_transform_erc20():
+    # Every cut of the calldata, alone (so nothing follows it in the decoded
+    # buffer) and all together.
+    cuts = ['0x' + CALLDATA[:n].hex() for n in range(len(CALLDATA))]
+    for calldata in cuts:
+        stats = get_calldata_stats(pa.array([calldata]))
+        assert stats['calldata_size'][0] == len(calldata) // 2 - 1
+    stats = get_calldata_stats(pa.array(cuts))
+    assert (stats['calldata_size'] == range(len(CALLDATA))).all()
+    assert (stats['function'][4:] == 'transformERC20').all()
+    # Calls are only decoded up to the last transformation's nonce.
+    last_nonce_end = len(CALLDATA) - 64
+    assert (stats['transformations'][:last_nonce_end] == -1).all()
+    assert stats['input_token'][:last_nonce_end].isna().all()
+    assert (stats['transformers'][last_nonce_end:] == 'FillQuoteTransformer+PayTakerTransformer').all()
+
+def test_invalid_calldata():
+    stats = get_calldata_stats(pa.chunked_array([['0x415565b0', None], ['0xzz', '0x' + CALLDATA.hex()]]))
+    assert stats['calldata_size'].tolist() == [4, -1, -1, len(CALLDATA)]
+    assert stats['function'].isna().tolist() == [False, True, True, False]
+    assert stats['transformations'].tolist() == [-1, -1, -1, 2]
+
+def test_synthetic_calldata(swaps_path):
+    table = read_log(swaps_path)
+    stats = get_calldata_stats(table['calldata'])
+    assert len(stats) == table.num_rows
+    sizes = [len(c) // 2 - 1 for c in table['calldata'].to_pylist()]
+    assert stats['calldata_size'].tolist() == sizes
+    decoded = stats[stats['function'] == 'transformERC20']
+    assert len(decoded) and (decoded['transformations'] > 0).all()
+    assert (decoded['input_token'] != decoded['output_token']).all()
@@ -0,0 +1,37 @@
+from child_tables import CHILD_TABLES, has_child_table, read_child_table, update_store_child_tables, write_child_tables
+from incremental import ingest_new
+from swap_store import read_log, read_table, write_store, iter_batches
+
+def build_child_table(table, name):
+    columns, build = CHILD_TABLES[name]
+    return build(table.select(columns))
+
+def test_child_tables_of_file_store(swaps_path, tmp_path):
+    store = str(tmp_path / 'swaps.parquet')
+    write_store(store, iter_batches(swaps_path))
+    assert not has_child_table(store, 'orders')
+    write_child_tables(store, read_table(store))
+    for name in CHILD_TABLES:
+        assert has_child_table(store, name)
+        assert read_child_table(store, name).equals(build_child_table(read_log(swaps_path), name))
+
+def test_child_tables_cover_every_part(swaps_path, tmp_path):
+    with open(swaps_path, 'rb') as f:
+        lines = f.readlines()
+    log = str(tmp_path / 'swaps.json')
+    store = str(tmp_path / 'store')
+    with open(log, 'wb') as f:
+        f.writelines(lines[:100])
+    ingest_new(log, store)
+    update_store_child_tables(store)
+    assert has_child_table(store, 'orders')
+    with open(log, 'ab') as f:
+        f.writelines(lines[100:])
+    ingest_new(log, store)
+    # The new part has no child tables yet, so they are built from swaps.
+    assert not has_child_table(store, 'orders')
+    expected = build_child_table(read_log(swaps_path), 'orders')
+    assert read_child_table(store, 'orders').equals(expected)
+    update_store_child_tables(store)
+    assert has_child_table(store, 'orders')
+    assert read_child_table(store, 'orders').equals(expected)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from aggregate import get_revert_rates
+from cube import CUBE_COLUMNS, CUBE_DIMENSIONS, build_cube, merge_cubes, get_cube_revert_rates, get_cube_stats, load_cube, save_cube, slice_cube
+from swap_store import read_log
+
+def test_rollup_equals_group_by(swaps_path):
+    table = read_log(swaps_path)
+    cube = build_cube(table.select(CUBE_COLUMNS))
+    assert list(cube.columns[:len(CUBE_DIMENSIONS)]) == CUBE_DIMENSIONS
+    assert cube['total'].sum() == table.num_rows
+    for dims in [['value'], ['api', 'delay'], ['side', 'value', 'delay']]:
+        expected = get_revert_rates(table, dims)
+        rates = get_cube_revert_rates(cube, dims)
+        # The cube also keeps swaps outside every bucket, under ''.
+        rates = rates[(rates[dims] != '').all(axis=1)].reset_index(drop=True)
+        rates = rates.astype(expected.dtypes.to_dict())
+        assert rates[[*dims, 'total', 'reverts']].equals(expected[[*dims, 'total', 'reverts']])
+
+def test_derived_dimensions_and_rate_stats(swaps_path):
+    table = read_log(swaps_path)
+    cube = build_cube(table.select(CUBE_COLUMNS))
+    for dims, outcome, measure in [(['token', 'delay'], 'reverted', 'reverts'), (['pair', 'delay'], 'failed', 'failures')]:
+        expected = get_revert_rates(table, dims, outcome)
+        # Delays past the last bucket only exist in the cube.
+        stats = expected[dims].merge(get_cube_stats(cube, measure, dims), on=dims, how='left')
+        assert (stats['count'] == expected['total']).all()
+        assert np.allclose(stats['mean'], expected['revert rate'])
+        rates = expected['revert rate'].to_numpy()
+        n = expected['total'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ci = 1.96 * np.sqrt(rates * (1 - rates) / (n - 1))
+        assert np.allclose(stats['ci'], ci, equal_nan=True)
+    tokens = get_cube_revert_rates(cube, ['token'])
+    assert tokens['total'].sum() == 2 * table.num_rows
+
+def test_merged_halves_equal_whole(swaps_path):
+    table = read_log(swaps_path).select(CUBE_COLUMNS)
+    half = table.num_rows // 2
+    merged = merge_cubes(build_cube(table.slice(0, half)), build_cube(table.slice(half)))
+    assert merged.equals(build_cube(table))
+
+def test_url_needs_api_url_dimension(swaps_path, tmp_path):
+    path = str(tmp_path / 'swaps.cube.parquet')
+    save_cube(path, build_cube(read_log(swaps_path).select(CUBE_COLUMNS)))
+    with pytest.raises(ValueError):
+        slice_cube(load_cube(path), url='/A/')
+    with pytest.raises(ValueError):
+        load_cube(path, [*CUBE_DIMENSIONS, 'api_url'])
+    cube = slice_cube(load_cube(swaps_path, [*CUBE_DIMENSIONS, 'api_url']), url='/A/')
+    assert set(cube['api']) == { 'A' }
+    assert cube['total'].sum() == load_cube(path).query('api == "A"')['total'].sum()
@@ -0,0 +1,31 @@
+from entity_index import build_entity_index, build_child_index, get_entity_rows, get_entity_counts, get_entity_pairs
+from child_tables import CHILD_TABLES
+from swap_store import read_log
+
+def get_swaps_by_key(table, column, field):
+    swaps_by_key = {}
+    for row, items in enumerate(table[column].to_pylist()):
+        for item in items:
+            swaps_by_key.setdefault(item[field], set()).add(row)
+    return swaps_by_key
+
+def test_index_matches_swaps(swaps_path):
+    table = read_log(swaps_path)
+    index = build_entity_index(table)
+    for entity, column, field in [('maker', 'orders', 'maker_address'), ('source', 'sources', 'name')]:
+        swaps_by_key = get_swaps_by_key(table, column, field)
+        assert get_entity_counts(index, entity) == { k: len(v) for k, v in swaps_by_key.items() }
+        for key, rows in swaps_by_key.items():
+            assert get_entity_rows(index, entity, key).tolist() == sorted(rows)
+        rows, keys = get_entity_pairs(index, entity)
+        assert sorted(zip(keys.tolist(), rows.tolist())) == sorted((k, r) for k, v in swaps_by_key.items() for r in v)
+    assert len(get_entity_rows(index, 'maker', 'unknown')) == 0
+
+def test_child_index_equals_index(swaps_path):
+    table = read_log(swaps_path)
+    columns, build = CHILD_TABLES['orders']
+    child_index = build_child_index(build(table.select(columns)), ['maker', 'fee_recipient'])
+    index = build_entity_index(table, ['maker', 'fee_recipient'])
+    for entity in ['maker', 'fee_recipient']:
+        for name in ['keys', 'offsets', 'rows']:
+            assert child_index[entity][name].tolist() == index[entity][name].tolist()
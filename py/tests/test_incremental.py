@@ -0,0 +1,40 @@
+import pytest
+from incremental import ingest_new
+from swap_store import read_log, read_table
+
+def test_resumed_ingest_equals_full_parse(swaps_path, tmp_path):
+    with open(swaps_path, 'rb') as f:
+        data = f.read()
+    log = str(tmp_path / 'swaps.json')
+    store = str(tmp_path / 'store')
+    # Appended in pieces that end mid-line, like a log still being written.
+    cuts = [0, len(data) // 3, len(data) // 3 + 5, len(data) * 2 // 3, len(data)]
+    for start, end in zip(cuts, cuts[1:]):
+        with open(log, 'ab') as f:
+            f.write(data[start:end])
+        ingest_new(log, store)
+    count, state = ingest_new(log, store)
+    assert count == 0
+    assert state['offset'] == len(data)
+    assert len(state['parts']) == 3
+    expected = read_log(swaps_path)
+    assert state['swaps'] == expected.num_rows
+    assert read_table(store).equals(expected)
+
+def test_resumed_ingest_filters_by_url(swaps_path, tmp_path):
+    with open(swaps_path, 'rb') as f:
+        lines = f.readlines()
+    log = str(tmp_path / 'swaps.json')
+    store = str(tmp_path / 'store')
+    with open(log, 'wb') as f:
+        f.writelines(lines[:100])
+    ingest_new(log, store, '/B/')
+    with open(log, 'ab') as f:
+        f.writelines(lines[100:])
+    count, state = ingest_new(log, store, '/B/')
+    expected = read_log(swaps_path, url='/B/')
+    assert state['swaps'] == expected.num_rows < len(lines)
+    assert read_table(store).equals(expected)
+    # Resuming with another filter would mix swaps of both into the store.
+    with pytest.raises(ValueError):
+        ingest_new(log, store)
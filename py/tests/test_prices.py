@@ -0,0 +1,38 @@
+import json
+from decimal import Decimal
+import numpy as np
+from prices import get_realized_prices, get_quoted_prices, get_best_order_prices, get_slippages
+from swap_store import read_log
+
+# Relative error bound of float64 prices, from `prices.py`.
+PRICE_ERROR = 2.5 * 2 ** -52
+
+def get_decimal_prices(swap):
+    result = swap['metadata']['swapResult']
+    realized = quoted = best = None
+    if result.get('boughtAmount') and Decimal(result['soldAmount']):
+        realized = Decimal(result['boughtAmount']) / Decimal(result['soldAmount'])
+    quoted = Decimal(swap['buyAmount']) / Decimal(swap['sellAmount'])
+    rates = [Decimal(o['makerAssetAmount']) / Decimal(o['takerAssetAmount']) for o in swap['orders']]
+    if len(rates):
+        best = max(rates)
+    return realized, quoted, best
+
+def test_prices_match_decimals(swaps_path):
+    table = read_log(swaps_path)
+    with open(swaps_path) as f:
+        expected = [get_decimal_prices(json.loads(line)) for line in f]
+    realized = get_realized_prices(table)
+    quoted = get_quoted_prices(table)
+    best = get_best_order_prices(table)
+    slippages = get_slippages(realized, best)
+    for i, (realized_price, quoted_price, best_price) in enumerate(expected):
+        assert abs(quoted[i] - float(quoted_price)) <= float(quoted_price) * PRICE_ERROR
+        if best_price is None:
+            assert np.isnan(best[i])
+        else:
+            assert abs(best[i] - float(best_price)) <= float(best_price) * PRICE_ERROR
+        if realized_price is not None:
+            assert abs(realized[i] - float(realized_price)) <= float(realized_price) * PRICE_ERROR
+            if best_price is not None:
+                assert np.isclose(slippages[i], float((realized_price - best_price) / best_price), rtol=1e-9, atol=1e-12)
@@ -0,0 +1,45 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+from analyses import ANALYSES
+from swap_cache import get_cache_path
+
+REPORT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'report.py')
+
+def test_every_analysis_renders(swaps_path, tmp_path):
+    output = str(tmp_path / 'report')
+    subprocess.run([sys.executable, REPORT, swaps_path, output], check=True, capture_output=True)
+    with open(os.path.join(output, 'report.json')) as f:
+        report = json.load(f)
+    assert [r['analysis'] for r in report['analyses']] == ANALYSES
+    for result in report['analyses']:
+        assert result['error'] is None, result['analysis']
+        assert len(result['figures']) + len(result['tables']) > 0, result['analysis']
+        for file in result['figures'] + result['tables']:
+            assert os.path.getsize(os.path.join(output, file)) > 0
+
+def test_analysis_args_and_formats(swaps_path, tmp_path):
+    output = str(tmp_path / 'report')
+    subprocess.run([
+        sys.executable, REPORT, swaps_path, output,
+        '-a', 'revert_rate_by_source --only Kyber', '-a', 'revert_rate_by_value', '-f', 'png', '-f', 'svg',
+    ], check=True, capture_output=True)
+    with open(os.path.join(output, 'report.json')) as f:
+        report = json.load(f)
+    assert [(r['analysis'], r['args']) for r in report['analyses']] == [
+        ('revert_rate_by_source', ['--only', 'Kyber']),
+        ('revert_rate_by_value', []),
+    ]
+    assert report['analyses'][1]['figures'] == ['revert_rate_by_value.png', 'revert_rate_by_value.svg']
+
+def test_logs_are_loaded_into_the_cache(swaps_path, tmp_path):
+    # Analyses share the cached arrow table of a log rather than its parsed
+    # JSON.
+    path = str(tmp_path / 'swaps.json')
+    shutil.copy(swaps_path, path)
+    output = str(tmp_path / 'report')
+    run = subprocess.run([sys.executable, REPORT, path, output, '-a', 'revert_rate_by_token'], check=True, capture_output=True, text=True)
+    assert run.stdout.startswith('Loaded 600 data items')
+    assert os.path.exists(get_cache_path(path))
@@ -0,0 +1,46 @@
+import pandas as pd
+import pyarrow as pa
+from revert_reasons import MAX_DEPTH, PANIC_SELECTOR, decode_revert_data, get_revert_reasons
+from synthetic import encode_error, encode_revert_error, to_word, to_address_word
+
+ADDRESS = to_address_word('0x' + '11' * 20)
+
+def to_hex(data):
+    return '0x' + data.hex()
+
+def transformer_failed(inner):
+    return encode_revert_error('TransformerFailedError', [ADDRESS, ('bytes', b''), ('bytes', inner)])
+
+def test_decodes_errors():
+    assert decode_revert_data('0x') is None
+    assert decode_revert_data(to_hex(encode_error('UniswapV2: K'))) == 'UniswapV2: K'
+    assert decode_revert_data(PANIC_SELECTOR + to_word(0x11).hex()) == 'Panic(0x11)'
+    assert decode_revert_data(to_hex(encode_revert_error('OrderStatusError', [bytes(32), to_word(4)]))) \
+        == 'OrderStatusError(EXPIRED)'
+    assert decode_revert_data('0x12345678') == '0x12345678'
+    assert decode_revert_data('0x1234') == 'invalid'
+    assert decode_revert_data('0xzz') == 'invalid'
+
+def test_decodes_nested_errors():
+    inner = encode_revert_error('OrderStatusError', [bytes(32), to_word(6)])
+    assert decode_revert_data(to_hex(transformer_failed(inner))) \
+        == 'TransformerFailedError: OrderStatusError(CANCELLED)'
+    assert decode_revert_data(to_hex(transformer_failed(transformer_failed(encode_error('BAL#507'))))) \
+        == 'TransformerFailedError: TransformerFailedError: BAL#507'
+    # Deeper errors stop after `MAX_DEPTH` wrappers.
+    data = encode_error('too deep')
+    for i in range(MAX_DEPTH + 2):
+        data = transformer_failed(data)
+    assert decode_revert_data(to_hex(data)) == ': '.join(['TransformerFailedError'] * (MAX_DEPTH + 1))
+
+def test_truncated_errors():
+    message = encode_error('truncated')
+    assert decode_revert_data(to_hex(message[:40])) == 'Error'
+    # A wrapper whose inner data is cut off keeps just its own name.
+    assert decode_revert_data(to_hex(transformer_failed(message)[:-64])) == 'TransformerFailedError'
+
+def test_reasons_of_column():
+    expired = to_hex(encode_revert_error('OrderStatusError', [bytes(32), to_word(4)]))
+    reasons = get_revert_reasons(pa.chunked_array([[expired, '0x', None], [expired]]))
+    assert pd.Series(reasons).isna().tolist() == [False, True, True, False]
+    assert reasons[0] == reasons[3] == 'OrderStatusError(EXPIRED)'
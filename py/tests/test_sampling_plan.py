@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+from swap_store import read_log
+from utils import get_api_url, get_value_buckets, get_delay_buckets
+
+SAMPLING_PLAN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sampling_plan.py')
+
+def get_plan(path, output, *args):
+    subprocess.run([sys.executable, SAMPLING_PLAN, path, output, *args], check=True, capture_output=True)
+    with open(output) as f:
+        return json.load(f)['cells']
+
+def get_cell(cell):
+    return (cell['side'], cell['makerToken'], cell['takerToken'], cell['minValue'], cell['minDelay'])
+
+def test_plan_covers_every_cell(swaps_path, tmp_path):
+    cells = get_plan(swaps_path, str(tmp_path / 'plan.json'), '--tokens', 'ETH,WETH,DAI,USDC', '--sells')
+    # 12 ordered pairs, less ETH/WETH and WETH/ETH, times 5 values and 5 delays.
+    assert len(cells) == len(set(map(get_cell, cells))) == 10 * 5 * 5
+    assert all(c['side'] == 'sell' for c in cells)
+    assert not any(c['makerToken'] in ['ETH', 'WETH'] and c['takerToken'] in ['ETH', 'WETH'] for c in cells)
+    weights = np.array([c['weight'] for c in cells])
+    assert np.isclose(weights.sum(), 1)
+    assert (weights >= 0.1 / len(cells)).all()
+    uniform = get_plan(swaps_path, str(tmp_path / 'uniform.json'), '--tokens', 'DAI,USDC', '--exploration', '1')
+    assert np.allclose([c['weight'] for c in uniform], 1 / len(uniform))
+
+def test_unsampled_cells_come_first(swaps_path, tmp_path):
+    # With a single api only revert rates are planned for, and a cell without
+    # samples always gains more from one than a sampled cell.
+    path = str(tmp_path / 'swaps.json')
+    with open(swaps_path) as f, open(path, 'w') as out:
+        out.writelines(l for l in f if '/A/' in get_api_url(json.loads(l)))
+    table = read_log(path)
+    assert set(table['api'].to_pylist()) == {'A'}
+    cells = get_plan(path, str(tmp_path / 'plan.json'))
+    # Values below the first stop count towards the first bucket, like in
+    # `sampling_plan.get_swap_cells()`.
+    value_brackets = sorted({ (c['minValue'], c['maxValue']) for c in cells })
+    delay_brackets = sorted({ (c['minDelay'], c['maxDelay']) for c in cells })
+    sampled = set(zip(
+        table['side'].to_pylist(),
+        table['maker_token'].to_pylist(),
+        table['taker_token'].to_pylist(),
+        [value_brackets[i][0] if i < len(value_brackets) else None for i in get_value_buckets(table['fill_value'], value_brackets)],
+        [delay_brackets[i][0] if i < len(delay_brackets) else None for i in get_delay_buckets(table['fill_delay'], delay_brackets)],
+    ))
+    is_sampled = np.array([get_cell(c) in sampled for c in cells])
+    assert 0 < sum(is_sampled) < len(cells)
+    weights = np.array([c['weight'] for c in cells])
+    assert weights[~is_sampled].min() > weights[is_sampled].max()
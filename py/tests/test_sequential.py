@@ -0,0 +1,45 @@
+import numpy as np
+from sequential import ALPHA, create_test, update_test, get_p_value, is_decided
+
+def run_test(values, batch_size):
+    test = create_test()
+    for start in range(0, len(values), batch_size):
+        update_test(test, values[start:start + batch_size])
+        if is_decided(test):
+            break
+    return test
+
+def test_batches_equal_one_update():
+    values = np.random.default_rng(0).normal(0.1, 1, 1000)
+    batched = create_test()
+    for batch in np.array_split(values, 17):
+        update_test(batched, batch)
+    update_test(batched, [])
+    single = update_test(create_test(), values)
+    assert batched['n'] == single['n'] == len(values)
+    assert np.isclose(batched['mean'], values.mean())
+    assert np.isclose(batched['m2'] / (len(values) - 1), values.var(ddof=1))
+    assert np.isclose(single['m2'], batched['m2'])
+    # The running p-value keeps the smallest one seen.
+    assert single['p'] == get_p_value(len(values), values.mean(), values.var(ddof=1))
+    assert batched['p'] <= single['p']
+
+def test_null_effect_rarely_decides():
+    # Checking after every batch still keeps false positives below alpha.
+    rng = np.random.default_rng(1)
+    runs = 300
+    decided = sum(is_decided(run_test(rng.normal(0, 1, 2000), 20)) for _ in range(runs))
+    assert decided / runs <= ALPHA
+
+def test_effect_decides():
+    rng = np.random.default_rng(2)
+    test = run_test(rng.normal(0.3, 1, 2000), 20)
+    assert is_decided(test)
+    assert test['n'] < 2000 and test['mean'] > 0
+    # One-sided sign tests and constant differences are decided too.
+    assert is_decided(update_test(create_test(), [1] * 100, variance=1.0))
+    assert is_decided(update_test(create_test(), [1] * 100))
+    assert not is_decided(update_test(create_test(), [0] * 100))
+    signs = np.random.default_rng(3).choice([-1, 1], 100)
+    assert get_p_value(100, signs.mean(), 1.0) == update_test(create_test(), signs, variance=1.0)['p']
+    assert get_p_value(1, 5.0, 1.0) == 1.0
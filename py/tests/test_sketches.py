@@ -0,0 +1,20 @@
+import numpy as np
+from sketches import RELATIVE_ACCURACY, QUANTILES, build_sketches, merge_sketches, get_quantiles
+from swap_store import read_log
+
+def test_gas_quantiles_of_successful_swaps(swaps_path):
+    table = read_log(swaps_path)
+    quantiles = get_quantiles(build_sketches(table, ['api']), 'gas_used').set_index('api')
+    df = table.select(['api', 'success', 'gas_used']).to_pandas()
+    assert (~df['success']).any()
+    for api, swaps in df[df['success']].groupby('api'):
+        assert quantiles.loc[api, 'count'] == len(swaps)
+        for q in QUANTILES:
+            expected = np.quantile(swaps['gas_used'], q, method='lower')
+            assert abs(quantiles.loc[api, f'p{q * 100:g}'] - expected) <= expected * RELATIVE_ACCURACY
+
+def test_merged_halves_equal_whole(swaps_path):
+    table = read_log(swaps_path)
+    half = table.num_rows // 2
+    merged = merge_sketches(build_sketches(table.slice(0, half), ['value']), build_sketches(table.slice(half), ['value']))
+    assert merged.equals(merge_sketches(build_sketches(table, ['value'])))
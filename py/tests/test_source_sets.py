@@ -0,0 +1,33 @@
+import pyarrow as pa
+from source_sets import build_source_sets, get_source_counts, has_source, has_only_source, get_single_sources, get_source_set_names
+from swap_store import SOURCE, read_log
+
+def get_used_sources(table):
+    return [
+        sorted(s['name'] for s in sources if s['proportion'] > 0)
+            for sources in table['sources'].to_pylist()
+    ]
+
+def test_masks_match_used_sources(swaps_path):
+    table = read_log(swaps_path)
+    source_sets = build_source_sets(table)
+    used = get_used_sources(table)
+    assert list(source_sets['names']) == sorted(set(n for names in used for n in names))
+    assert get_source_counts(source_sets['masks']).tolist() == [len(names) for names in used]
+    assert list(get_source_set_names(source_sets)) == ['+'.join(names) for names in used]
+    assert list(get_single_sources(source_sets)) == [names[0] if len(names) == 1 else None for names in used]
+    for name in source_sets['names']:
+        assert has_source(source_sets, name).tolist() == [name in names for names in used]
+        assert has_only_source(source_sets, name).tolist() == [names == [name] for names in used]
+    assert not has_source(source_sets, 'Unknown').any()
+
+def test_zero_proportions_are_not_used():
+    table = pa.table({ 'sources': pa.array([
+        [{ 'name': 'Uniswap', 'proportion': 0.7 }, { 'name': 'Kyber', 'proportion': 0.3 }, { 'name': '0x', 'proportion': 0.0 }],
+        [{ 'name': 'Kyber', 'proportion': 0.0 }, { 'name': '0x', 'proportion': 1.0 }],
+        [],
+    ], pa.list_(SOURCE)) })
+    source_sets = build_source_sets(table)
+    assert list(source_sets['names']) == ['0x', 'Kyber', 'Uniswap']
+    assert source_sets['masks'].tolist() == [0b110, 0b001, 0]
+    assert list(get_single_sources(source_sets)) == [None, '0x', None]
@@ -0,0 +1,58 @@
+import json
+import numpy as np
+import pandas as pd
+from sql_store import connect, insert_table
+from source_sets import build_source_sets, get_source_counts, get_source_set_names
+from prices import get_realized_prices, get_best_order_prices, get_slippages
+from swap_store import read_log
+from utils import get_max_values
+
+def load(swaps_path, tmp_path):
+    # Quotes list sources they didn't route through with a zero proportion.
+    path = str(tmp_path / 'swaps.json')
+    with open(swaps_path) as f, open(path, 'w') as out:
+        for line in f:
+            swap = json.loads(line)
+            swap['sources'].append({ 'name': 'Zero', 'proportion': '0' })
+            out.write(json.dumps(swap) + '\n')
+    table = read_log(path)
+    conn = connect(str(tmp_path / 'swaps.db'))
+    insert_table(conn, table)
+    return table, conn
+
+def test_view_counts_equal_pandas(swaps_path, tmp_path):
+    table, conn = load(swaps_path, tmp_path)
+    counts = pd.read_sql_query('''
+        SELECT api, max_value, COUNT(*) AS total, SUM(reverted) AS reverts, SUM(failed) AS failures
+        FROM swap_metrics GROUP BY api, max_value ORDER BY api, max_value
+    ''', conn)
+    df = pd.DataFrame({
+        'api': table['api'].to_numpy(zero_copy_only=False),
+        'max_value': get_max_values(table['fill_value'].to_numpy()),
+        'reverted': table['reverted'].to_numpy(zero_copy_only=False),
+        'failed': ~table['success'].to_numpy(zero_copy_only=False),
+    })
+    expected = df.groupby(['api', 'max_value']).agg(
+        total=('reverted', 'size'),
+        reverts=('reverted', 'sum'),
+        failures=('failed', 'sum'),
+    ).reset_index()
+    assert counts['total'].tolist() == expected['total'].tolist()
+    assert counts['reverts'].tolist() == expected['reverts'].tolist()
+    assert counts['failures'].tolist() == expected['failures'].tolist()
+
+def test_view_per_swap_metrics(swaps_path, tmp_path):
+    table, conn = load(swaps_path, tmp_path)
+    metrics = pd.read_sql_query('SELECT source_count, source_set, success, slippage FROM swap_metrics ORDER BY swap_id', conn)
+    source_sets = build_source_sets(table)
+    assert metrics['source_count'].tolist() == get_source_counts(source_sets['masks']).tolist()
+    assert metrics['source_set'].fillna('').tolist() == pd.Series(get_source_set_names(source_sets)).fillna('').tolist()
+    slippages = get_slippages(get_realized_prices(table), get_best_order_prices(table))
+    slippages[~table['success'].to_numpy(zero_copy_only=False)] = np.nan
+    assert not metrics['success'].all() and metrics.loc[metrics['success'] == 0, 'slippage'].isna().all()
+    assert np.allclose(metrics['slippage'].astype(float), slippages, equal_nan=True)
+
+def test_filtered_queries_use_indexes(swaps_path, tmp_path):
+    table, conn = load(swaps_path, tmp_path)
+    plan = ' '.join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN SELECT slippage, source_count FROM swap_metrics WHERE sim_id = 'x'"))
+    assert 'SCAN' not in plan
@@ -0,0 +1,47 @@
+import os
+import shutil
+from swap_cache import get_cache_path, get_fingerprint, open_cache
+from swap_store import SCHEMA, read_log, read_cached_log
+
+def test_cache_is_written_reused_and_invalidated(swaps_path, tmp_path):
+    path = str(tmp_path / 'swaps.json')
+    shutil.copy(swaps_path, path)
+    table = read_cached_log(path)
+    assert table.equals(read_log(path))
+    assert os.path.exists(get_cache_path(path))
+    cached = open_cache(path, get_fingerprint(path, SCHEMA))
+    assert cached is not None and cached.equals(table)
+    assert read_cached_log(path).equals(table)
+    # Appending to the log changes its fingerprint, so it's parsed again.
+    with open(swaps_path) as f:
+        line = f.readline()
+    with open(path, 'a') as f:
+        f.write(line)
+    assert open_cache(path, get_fingerprint(path, SCHEMA)) is None
+    appended = read_cached_log(path)
+    assert appended.num_rows == table.num_rows + 1
+    assert appended.equals(read_log(path))
+    assert open_cache(path, get_fingerprint(path, SCHEMA)).equals(appended)
+
+def test_rewritten_log_of_same_size_is_parsed_again(swaps_path, tmp_path):
+    path = str(tmp_path / 'swaps.json')
+    with open(swaps_path) as f:
+        lines = f.readlines()
+    with open(path, 'w') as f:
+        f.writelines(lines[:2])
+    first = read_cached_log(path)
+    stat = os.stat(path)
+    # Same size and mtime, different content.
+    with open(path, 'w') as f:
+        f.writelines(lines[1::-1])
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.stat(path).st_size == stat.st_size
+    second = read_cached_log(path)
+    assert second.equals(read_log(path)) and not second.equals(first)
+
+def test_unwritable_cache_is_not_an_error(swaps_path, tmp_path):
+    path = str(tmp_path / 'swaps.json')
+    shutil.copy(swaps_path, path)
+    os.mkdir(get_cache_path(path) + '.tmp')
+    assert read_cached_log(path).equals(read_log(path))
+    assert not os.path.exists(get_cache_path(path))
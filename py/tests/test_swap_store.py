@@ -0,0 +1,27 @@
+import shutil
+from swap_store import get_byte_ranges, is_store, read_log, read_table, iter_batches, write_store
+from conftest import SWAP_COUNT
+
+def test_read_log_parses_every_swap(swaps_path):
+    assert read_log(swaps_path).num_rows == SWAP_COUNT
+
+def test_store_is_detected_by_content(swaps_path, tmp_path):
+    for name in ['swaps.parquet', 'swaps.pq', 'swaps']:
+        store = str(tmp_path / name)
+        write_store(store, iter_batches(swaps_path))
+        assert is_store(store)
+        assert read_table(store, ['id']).num_rows == SWAP_COUNT
+    log = str(tmp_path / 'log.parquet')
+    shutil.copy(swaps_path, log)
+    assert not is_store(log)
+    assert not is_store(swaps_path)
+    assert read_table(log, ['id']).num_rows == SWAP_COUNT
+
+def test_parallel_parse_equals_serial(swaps_path):
+    ranges = get_byte_ranges(swaps_path, 7)
+    with open(swaps_path, 'rb') as f:
+        data = f.read()
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(data[start - 1:start] == b'\n' for start, end in ranges[1:])
+    assert read_log(swaps_path, workers=3).equals(read_log(swaps_path, workers=1))
+    assert read_log(swaps_path, ['id', 'api'], '/A/', workers=2).equals(read_log(swaps_path, ['id', 'api'], '/A/', workers=1))
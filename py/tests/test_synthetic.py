@@ -0,0 +1,35 @@
+import collections
+import json
+from synthetic import CHUNK_GROUPS, write_swaps
+from swap_store import read_log
+from conftest import SWAP_COUNT
+
+def test_output_does_not_depend_on_jobs(tmp_path):
+    # Enough swaps for a few chunks, the last one partial.
+    count = CHUNK_GROUPS * 2 * 2 + 101
+    paths = [str(tmp_path / f'swaps-{jobs}.json') for jobs in [1, 2]]
+    for jobs, path in zip([1, 2], paths):
+        assert write_swaps(path, count, seed=3, jobs=jobs) == count
+    with open(paths[0], 'rb') as f, open(paths[1], 'rb') as g:
+        serial = f.read()
+        assert serial == g.read()
+    assert serial.count(b'\n') == count
+    write_swaps(paths[1], count, seed=4, jobs=2)
+    with open(paths[1], 'rb') as f:
+        assert f.read() != serial
+
+def test_swaps_come_in_ab_groups(swaps_path):
+    table = read_log(swaps_path, ['id', 'api', 'success', 'reverted'])
+    assert table.num_rows == SWAP_COUNT
+    apis = collections.defaultdict(list)
+    for id, api in zip(table['id'].to_pylist(), table['api'].to_pylist()):
+        apis[id].append(api)
+    assert all(sorted(a) == ['A', 'B'] for a in apis.values())
+    reverted = sum(table['reverted'].to_pylist())
+    assert 0 < reverted < table.num_rows
+
+def test_orders_fill_the_sell_amount(swaps_path):
+    with open(swaps_path) as f:
+        swaps = [json.loads(line) for line in f]
+    assert all(sum(int(o['takerAssetAmount']) for o in s['orders']) == int(s['sellAmount']) for s in swaps)
+    assert all(sum(int(o['makerAssetAmount']) for o in s['orders']) == int(s['buyAmount']) for s in swaps)
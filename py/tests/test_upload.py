@@ -0,0 +1,36 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from conftest import SWAP_COUNT
+
+UPLOAD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'upload.py')
+TABLES = ['simulation_result', 'simulation_result_source', 'simulation_result_order']
+
+def upload(path, db, *args):
+    subprocess.run([sys.executable, UPLOAD, path, '--db', db, '--batch-size', '100', *args], check=True, capture_output=True)
+
+def get_counts(db):
+    conn = sqlite3.connect(db)
+    counts = [conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in TABLES]
+    conn.close()
+    return counts
+
+def test_upload_is_idempotent(swaps_path, tmp_path):
+    with open(swaps_path, 'rb') as f:
+        lines = f.readlines()
+    path = str(tmp_path / 'swaps.json')
+    db = str(tmp_path / 'results.db')
+    with open(path, 'wb') as f:
+        f.writelines(lines[:SWAP_COUNT // 2])
+    upload(path, db)
+    with open(path, 'ab') as f:
+        f.writelines(lines[SWAP_COUNT // 2:])
+    # Resumes from where the first upload stopped.
+    upload(path, db)
+    counts = get_counts(db)
+    assert counts[0] == SWAP_COUNT
+    assert counts[1] > 0 and counts[2] > 0
+    # Reading the whole file again adds nothing.
+    upload(path, db, '--restart')
+    assert get_counts(db) == counts
@@ -0,0 +1,34 @@
+import json
+from utils import VALUES, DELAYS, iter_data, load_data, get_api_url, is_successful_swap
+from utils import get_max_value, get_min_delay, get_max_values, get_min_delays
+
+def read_swaps(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_iter_data_filters_and_projects(swaps_path):
+    swaps = read_swaps(swaps_path)
+    fields = ['metadata.id', 'metadata.swapResult.revertData', 'metadata.missing.field']
+    data = list(iter_data(swaps_path, '/B/', is_successful_swap, fields))
+    expected = [s for s in swaps if '/B/' in get_api_url(s) and is_successful_swap(s)]
+    assert len(data) == len(expected) > 0
+    assert data == [
+        { 'metadata': { 'id': s['metadata']['id'], 'swapResult': { 'revertData': s['metadata']['swapResult']['revertData'] } } }
+            for s in expected
+    ]
+
+def test_malformed_lines_are_skipped(swaps_path, tmp_path):
+    with open(swaps_path) as f:
+        lines = f.readlines()
+    path = str(tmp_path / 'swaps.json')
+    with open(path, 'w') as f:
+        f.writelines([lines[0], '{"metadata": \n', '\n', *lines[1:3]])
+    assert load_data(path) == [json.loads(l) for l in lines[:3]]
+
+def test_buckets_match_per_swap_buckets(swaps_path):
+    swaps = read_swaps(swaps_path)
+    # Every bucket edge, and values past the first and last bucket.
+    fill_values = [float(s['metadata']['fillValue']) for s in swaps] + [v for b in VALUES for v in b] + [-1, 1e12]
+    fill_delays = [s['metadata']['fillDelay'] for s in swaps] + [d for b in DELAYS for d in b] + [-1, 1e6]
+    assert get_max_values(fill_values).tolist() == [get_max_value({ 'metadata': { 'fillValue': v } }) for v in fill_values]
+    assert get_min_delays(fill_delays).tolist() == [get_min_delay({ 'metadata': { 'fillDelay': d } }) for d in fill_delays]
@@ -0,0 +1,280 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from decimal import Decimal
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+from incremental import read_complete_lines
+from sql_store import ORDER_COLUMNS
+from swap_store import to_amount, to_float, flatten_order, flatten_order_info
+from utils import parse_json
+
+VARCHAR = 'character varying'
+NUMERIC = 'numeric(78,0)'
+FLOAT = 'double precision'
+INT = 'integer'
+BOOL = 'boolean'
+# SQLite would turn 78-digit numerics into floats, so keep them as text.
+SQLITE_TYPES = { NUMERIC: 'TEXT' }
+COPY_TYPES = { VARCHAR: 'varchar', NUMERIC: 'numeric', FLOAT: 'float8', INT: 'int4', BOOL: 'bool' }
+
+# Same table and columns as the `SimulationResult` entity in `src/upload.js`.
+RESULT_TABLE = 'simulation_result'
+RESULT_COLUMNS = [
+    ('run_id', VARCHAR),
+    ('sim_id', VARCHAR),
+    ('url', VARCHAR),
+    ('maker_token', VARCHAR),
+    ('taker_token', VARCHAR),
+    ('sell_amount', NUMERIC),
+    ('buy_amount', NUMERIC),
+    ('response_time', FLOAT),
+    ('reverted', BOOL),
+    ('sold_amount', NUMERIC),
+    ('bought_amount', NUMERIC),
+    ('gas_used', NUMERIC),
+    ('gas_price', NUMERIC),
+    ('eth_usd', FLOAT),
+    ('maker_token_usd', FLOAT),
+    ('maker_token_decimals', INT),
+    ('taker_token_decimals', INT),
+    ('fill_delay', FLOAT),
+    ('fill_value_usd', FLOAT),
+    ('protocol_fee_paid', NUMERIC),
+]
+NULLABLE_COLUMNS = ['sold_amount', 'bought_amount']
+# Results are unique by these, so loading a file twice is a no-op.
+KEY_COLUMNS = [('run_id', VARCHAR), ('sim_id', VARCHAR), ('url', VARCHAR)]
+SOURCE_TABLE = 'simulation_result_source'
+SOURCE_COLUMNS = [
+    ('source_index', INT),
+    ('name', VARCHAR),
+    ('proportion', FLOAT),
+]
+ORDER_TABLE = 'simulation_result_order'
+ORDER_TABLE_COLUMNS = [
+    ('order_index', INT),
+    *((c, NUMERIC if c.endswith('_amount') else VARCHAR) for c in ORDER_COLUMNS),
+    ('order_status', INT),
+    ('order_taker_asset_filled_amount', NUMERIC),
+]
+# Rows are staged per batch in temp tables (with the result key instead of
+# an id) and then merged, skipping results that are already loaded.
+STAGED_TABLES = {
+    RESULT_TABLE: ('staged_result', RESULT_COLUMNS[len(KEY_COLUMNS):]),
+    SOURCE_TABLE: ('staged_source', SOURCE_COLUMNS),
+    ORDER_TABLE: ('staged_order', ORDER_TABLE_COLUMNS),
+}
+BATCH_SIZE = 10000
+
+def get_program_args():
+    args = argparse.ArgumentParser()
+    args.add_argument('path', type=str, help='output file of `yarn start`/`yarn start-ab`')
+    args.add_argument('--db', type=str, required=True, help='postgres:// URI, or a SQLite database file')
+    args.add_argument('--run-id', type=str, help='run id for results without one. Defaults to the file name.')
+    args.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args.add_argument('--restart', action='store_true', help='read the file from the start instead of resuming')
+    return args.parse_args()
+
+def is_sqlite(conn):
+    return isinstance(conn, sqlite3.Connection)
+
+def get_column_defs(conn, columns, nullable=[]):
+    return ', '.join(
+        f'{c} {SQLITE_TYPES.get(t, t) if is_sqlite(conn) else t}{"" if c in nullable else " NOT NULL"}'
+            for c, t in columns
+    )
+
+def get_schema(conn):
+    id_def = 'id INTEGER PRIMARY KEY' if is_sqlite(conn) else 'id SERIAL PRIMARY KEY'
+    child_key = f'result_id {INT} NOT NULL REFERENCES {RESULT_TABLE}(id) ON DELETE CASCADE'
+    return [
+        f'CREATE TABLE IF NOT EXISTS {RESULT_TABLE} ({id_def}, {get_column_defs(conn, RESULT_COLUMNS, NULLABLE_COLUMNS)})',
+        f'CREATE INDEX IF NOT EXISTS sim_id_index ON {RESULT_TABLE} (sim_id)',
+        f'CREATE UNIQUE INDEX IF NOT EXISTS run_sim_url_index ON {RESULT_TABLE} (run_id, sim_id, url)',
+        f'''CREATE TABLE IF NOT EXISTS {SOURCE_TABLE} (
+            {child_key}, {get_column_defs(conn, SOURCE_COLUMNS, ['proportion'])},
+            PRIMARY KEY (result_id, source_index)
+        )''',
+        f'CREATE INDEX IF NOT EXISTS source_name_index ON {SOURCE_TABLE} (name)',
+        f'''CREATE TABLE IF NOT EXISTS {ORDER_TABLE} (
+            {child_key}, {get_column_defs(conn, ORDER_TABLE_COLUMNS, [c for c, _ in ORDER_TABLE_COLUMNS[1:]])},
+            PRIMARY KEY (result_id, order_index)
+        )''',
+        # How far into each file loading got.
+        f'''CREATE TABLE IF NOT EXISTS upload_progress (
+            path {VARCHAR} PRIMARY KEY, byte_offset bigint NOT NULL, results {INT} NOT NULL
+        )''',
+        *(
+            f'CREATE TEMP TABLE IF NOT EXISTS {staged} ({get_column_defs(conn, KEY_COLUMNS + columns, [c for c, _ in columns])})'
+                for staged, columns in STAGED_TABLES.values()
+        ),
+    ]
+
+def connect(db):
+    if db.startswith('postgres://') or db.startswith('postgresql://'):
+        if psycopg is None:
+            raise ImportError('Loading into postgres requires psycopg (`pip install psycopg`)')
+        conn = psycopg.connect(db)
+    else:
+        conn = sqlite3.connect(db)
+    for statement in get_schema(conn):
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+def get_param(conn):
+    return '?' if is_sqlite(conn) else '%s'
+
+def get_rows(swap, run_id):
+    # Mirrors `parseResult()` in `src/upload.js`.
+    metadata = swap['metadata']
+    result = metadata['swapResult']
+    key = (metadata.get('runId') or run_id, metadata['id'], metadata['api'])
+    infos = [flatten_order_info(oi) for oi in result.get('orderInfos', [])]
+    return {
+        RESULT_TABLE: [(
+            *key,
+            metadata['makerToken'],
+            metadata['takerToken'],
+            to_amount(swap['sellAmount']),
+            to_amount(swap['buyAmount']),
+            to_float(metadata['responseTime']),
+            result['revertData'] != '0x' or result.get('boughtAmount') == '0',
+            to_amount(result.get('soldAmount') or 0),
+            to_amount(result.get('boughtAmount') or 0),
+            to_amount(result['gasUsed']),
+            to_amount(swap['gasPrice']),
+            to_float(metadata['ethUsd']),
+            to_float(metadata['makerTokenUsd']),
+            metadata['makerTokenDecimals'],
+            metadata['takerTokenDecimals'],
+            to_float(metadata['fillDelay']),
+            to_float(metadata['fillValue']),
+            to_amount(result['protocolFeePaid']),
+        )],
+        SOURCE_TABLE: [
+            (*key, i, s['name'], to_float(s.get('proportion')))
+                for i, s in enumerate(swap.get('sources', []))
+        ],
+        ORDER_TABLE: [
+            (
+                *key,
+                i,
+                *flatten_order(o).values(),
+                *(infos[i] if i < len(infos) else flatten_order_info({})).values(),
+            ) for i, o in enumerate(swap.get('orders', []))
+        ],
+    }
+
+def read_batches(path, start, run_id, batch_size):
+    # Yields ({table: rows}, end offset, malformed count) for every
+    # `batch_size` complete lines from `start`.
+    with open(path, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size
+        batch = { table: [] for table in STAGED_TABLES }
+        count = malformed = 0
+        offset = start
+        for line_offset, line in read_complete_lines(f, start, end):
+            offset = line_offset + len(line) + 1
+            if line.strip():
+                try:
+                    for table, rows in get_rows(parse_json(line), run_id).items():
+                        batch[table].extend(rows)
+                    count += 1
+                except (ValueError, KeyError, TypeError):
+                    malformed += 1
+                    print(f'Skipping malformed line at byte {line_offset}', file=sys.stderr)
+            if count == batch_size:
+                yield batch, offset, malformed
+                batch = { table: [] for table in STAGED_TABLES }
+                count = malformed = 0
+        if offset > start:
+            yield batch, offset, malformed
+
+def write_staged(conn, table, columns, rows):
+    names = [c for c, _ in KEY_COLUMNS + columns]
+    if is_sqlite(conn):
+        conn.executemany(
+            f'INSERT INTO {table} ({", ".join(names)}) VALUES ({", ".join("?" * len(names))})',
+            rows,
+        )
+        return
+    with conn.cursor().copy(f'COPY {table} ({", ".join(names)}) FROM STDIN (FORMAT BINARY)') as copy:
+        copy.set_types([COPY_TYPES[t] for _, t in KEY_COLUMNS + columns])
+        for row in rows:
+            copy.write_row(row)
+
+def merge_staged(conn):
+    # Returns the number of new results. `WHERE true` keeps SQLite from
+    # reading `ON CONFLICT` as a join constraint.
+    keys = ', '.join(c for c, _ in KEY_COLUMNS)
+    columns = ', '.join(c for c, _ in RESULT_COLUMNS)
+    count = conn.execute(f'''
+        INSERT INTO {RESULT_TABLE} ({columns})
+        SELECT {columns} FROM staged_result WHERE true
+        ON CONFLICT ({keys}) DO NOTHING
+    ''').rowcount
+    for table in [SOURCE_TABLE, ORDER_TABLE]:
+        staged, child_columns = STAGED_TABLES[table]
+        names = [c for c, _ in child_columns]
+        conn.execute(f'''
+            INSERT INTO {table} (result_id, {", ".join(names)})
+            SELECT r.id, {", ".join(f"s.{c}" for c in names)}
+            FROM {staged} s
+            JOIN {RESULT_TABLE} r ON {" AND ".join(f"r.{c} = s.{c}" for c, _ in KEY_COLUMNS)}
+            WHERE true
+            ON CONFLICT DO NOTHING
+        ''')
+    for staged, _ in STAGED_TABLES.values():
+        conn.execute(f'DELETE FROM {staged}')
+    return count
+
+def get_progress(conn, path):
+    row = conn.execute(
+        f'SELECT byte_offset, results FROM upload_progress WHERE path = {get_param(conn)}',
+        (path,),
+    ).fetchone()
+    return row or (0, 0)
+
+def save_progress(conn, path, offset, count):
+    p = get_param(conn)
+    conn.execute(f'''
+        INSERT INTO upload_progress (path, byte_offset, results) VALUES ({p}, {p}, {p})
+        ON CONFLICT (path) DO UPDATE SET
+            byte_offset = excluded.byte_offset,
+            results = upload_progress.results + excluded.results
+    ''', (path, offset, count))
+
+def upload(conn, path, run_id, batch_size=BATCH_SIZE, restart=False):
+    # Loads results appended to `path` since the last upload. Each batch and
+    # the new file offset are committed together, so a failed upload resumes
+    # from the last committed batch.
+    path = os.path.abspath(path)
+    start, total = (0, 0) if restart else get_progress(conn, path)
+    uploaded = skipped = 0
+    for batch, offset, malformed in read_batches(path, start, run_id, batch_size):
+        for table, (staged, columns) in STAGED_TABLES.items():
+            write_staged(conn, staged, columns, batch[table])
+        count = merge_staged(conn)
+        save_progress(conn, path, offset, count)
+        conn.commit()
+        uploaded += count
+        skipped += len(batch[RESULT_TABLE]) - count + malformed
+        print(f'Uploaded {total + uploaded} results ({skipped} skipped) up to byte {offset}')
+    return uploaded, skipped
+
+# Amounts are loaded into SQLite as integer strings.
+sqlite3.register_adapter(Decimal, lambda d: format(d, 'f'))
+
+args = get_program_args()
+started = time.time()
+conn = connect(args.db)
+run_id = args.run_id or os.path.splitext(os.path.basename(args.path))[0]
+uploaded, skipped = upload(conn, args.path, run_id, args.batch_size, args.restart)
+conn.close()
+print(f'Uploaded {uploaded} results ({skipped} skipped) in {time.time() - started:.1f}s')
@@ -1,25 +1,96 @@
 import json
+import numpy as np
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 DELAYS = [(0, 30), (30, 60), (60, 90), (90, 180), (180, 600)]
 VALUES = [(0, 250), (250, 1000), (1000, 5000), (5000, 10000), (10000, 25000)]
+# Fields needed by `is_successful_swap()`.
+SUCCESS_FIELDS = ['metadata.swapResult.revertData', 'metadata.swapResult.boughtAmount']
 
-def load_data(path, url=None):
-    data = []
-    with open(path) as f:
-        for line in f.readlines():
+def get_api_url(swap):
+    metadata = swap['metadata']
+    return metadata.get('apiURL') or metadata.get('apiPath') or metadata.get('api')
+
+def project_swap(swap, fields):
+    # `fields` are dotted paths into the swap object, e.g.
+    # 'metadata.swapResult.revertData'. Missing paths are skipped.
+    projected = {}
+    for field in fields:
+        src = swap
+        dst = projected
+        parts = field.split('.')
+        for part in parts[:-1]:
+            if not isinstance(src, dict) or part not in src:
+                break
+            src = src[part]
+            dst = dst.setdefault(part, {})
+        else:
+            if isinstance(src, dict) and parts[-1] in src:
+                dst[parts[-1]] = src[parts[-1]]
+    return projected
+
+def parse_json(line):
+    # orjson (if installed) is much faster, but rejects integers wider than
+    # 64 bits, so anything it can't parse goes through the stdlib too.
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except ValueError:
+            pass
+    return json.loads(line)
+
+def parse_lines(path, start=0, end=None):
+    # Parses the lines starting in the byte range [start, end). `start` must
+    # be the start of a line.
+    with open(path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        while end is None or offset < end:
+            line = f.readline()
+            if not line:
+                break
+            offset += len(line)
             try:
-                data.append(json.loads(line))
-            except:
-                pass
-    if url is None:
-        return data
-    return [d for d in data if url in d['metadata']['apiURL']]
+                yield parse_json(line)
+            except ValueError:
+                continue
+
+def filter_swaps(swaps, url=None, predicate=None, fields=None):
+    for swap in swaps:
+        if url is not None and url not in get_api_url(swap):
+            continue
+        if predicate is not None and not predicate(swap):
+            continue
+        yield project_swap(swap, fields) if fields is not None else swap
+
+def iter_data(path, url=None, predicate=None, fields=None):
+    return filter_swaps(parse_lines(path), url, predicate, fields)
+
+def load_data(path, url=None, predicate=None, fields=None):
+    return list(iter_data(path, url, predicate, fields))
 
 def format_value(value):
     if value >= 1000:
         return f'${int(value / 1000)}K'
     return f'${int(value)}'
 
+def add_error_bars(ax, errors):
+    # Draws `errors` (one row per x, one column per hue) on the bars of a
+    # seaborn bar plot with one value per bar.
+    for container, column in zip(ax.containers, np.asarray(errors).T):
+        ax.errorbar(
+            [bar.get_x() + bar.get_width() / 2 for bar in container],
+            [bar.get_height() for bar in container],
+            yerr=column,
+            fmt='none',
+            ecolor='black',
+            elinewidth=1,
+            capsize=2,
+        )
+
 def get_max_value(swap):
     fill_value = float(swap['metadata']['fillValue'])
     for min_value, max_value in VALUES:
@@ -34,6 +105,38 @@ def get_min_delay(swap):
             return min_delay
     return DELAYS[-1][1]
 
+def get_value_buckets(fill_values, buckets=VALUES):
+    # Bucket index of each value, i.e., the first bucket whose max exceeds it.
+    # Values past the last bucket get index `len(buckets)`.
+    return np.searchsorted(
+        [max_value for min_value, max_value in buckets],
+        np.asarray(fill_values, dtype=float),
+        side='right',
+    )
+
+def get_delay_buckets(fill_delays, buckets=DELAYS):
+    return np.searchsorted(
+        [max_delay for min_delay, max_delay in buckets],
+        np.asarray(fill_delays, dtype=float),
+        side='right',
+    )
+
+def get_max_values(fill_values, buckets=VALUES):
+    # Vectorized `get_max_value()`.
+    return np.array([*(max_value for min_value, max_value in buckets), float('inf')])[
+        get_value_buckets(fill_values, buckets)
+    ]
+
+def get_min_delays(fill_delays, buckets=DELAYS):
+    # Vectorized `get_min_delay()`.
+    return np.array([*(min_delay for min_delay, max_delay in buckets), buckets[-1][1]])[
+        get_delay_buckets(fill_delays, buckets)
+    ]
+
+def count_by_bucket(codes, num_buckets, weights=None):
+    # Drops codes past the last bucket.
+    return np.bincount(codes, weights=weights, minlength=num_buckets + 1)[:num_buckets]
+
 def is_successful_swap(swap):
     result = swap['metadata']['swapResult']
     return result['revertData'] == '0x' and int(result['boughtAmount']) != 0
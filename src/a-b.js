@@ -5,8 +5,8 @@ const _ = require('lodash');
 
 const {
     forever,
-    getRandomBracketValue,
-    getRandomQuotePair,
+    getQuoteParams,
+    loadSamplingPlan,
     LogWriter,
     parseURLSpec,
     randomHash,
@@ -16,7 +16,7 @@ const {
 } = require('./utils');
 const TOKENS = require('./tokens');
 const { fillBuyQuote, fillSellQuote } = require('./quotes');
-const { DELAY_STOPS, FILL_STOPS, LIVE_API_PATH } = require('./constants');
+const { LIVE_API_PATH } = require('./constants');
 const { createConnectionAsync, saveResultAsync } = require('./upload');
 
 const ARGV = yargs
@@ -53,6 +53,10 @@ const ARGV = yargs
         type: 'boolean',
         describe: 'only perform sells',
     })
+    .option('plan', {
+        type: 'string',
+        describe: 'sampling plan file written by py/sampling_plan.py',
+    })
     .option('jobs', {
         alias: 'j',
         type: 'number',
@@ -63,6 +67,7 @@ const ARGV = yargs
         type: 'string',
         describe: 'URI to the database to upload to',
     }).argv;
+const PLAN = ARGV.plan ? loadSamplingPlan(ARGV.plan) : undefined;
 
 const runId = randomMoniker();
 let dbConnection;
@@ -94,12 +99,13 @@ let dbConnection;
 })();
 
 async function fillSellQuotes(urls, logs) {
-    const [makerToken, takerToken] = getRandomQuotePair(ARGV.token, {
-        v0: ARGV.v0,
-    });
+    const {
+        makerToken,
+        takerToken,
+        swapValue,
+        fillDelay,
+    } = getQuoteParams(PLAN, 'sell', ARGV.token, { v0: ARGV.v0 });
     const id = randomHash();
-    const swapValue = getRandomBracketValue(FILL_STOPS);
-    const fillDelay = getRandomBracketValue(DELAY_STOPS);
     const _urls = urls.map((u) => parseURLSpec(u));
     const results = await Promise.all(
         _urls.map((url) =>
@@ -139,12 +145,13 @@ async function fillSellQuotes(urls, logs) {
 }
 
 async function fillBuyQuotes(urls, logs) {
-    const [makerToken, takerToken] = getRandomQuotePair(ARGV.token, {
-        v0: ARGV.v0,
-    });
+    const {
+        makerToken,
+        takerToken,
+        swapValue,
+        fillDelay,
+    } = getQuoteParams(PLAN, 'buy', ARGV.token, { v0: ARGV.v0 });
     const id = randomHash();
-    const swapValue = getRandomBracketValue(FILL_STOPS);
-    const fillDelay = getRandomBracketValue(DELAY_STOPS);
     const _urls = urls.map((u) => parseURLSpec(u));
     const results = await Promise.all(
         _urls.map((url) =>
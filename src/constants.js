@@ -7,4 +7,6 @@ module.exports = {
     // DELAY_STOPS: [0, 30],
     FILL_STOPS: [10, 250, 1e3, 5e3, 10e3, 25e3],
     LIVE_API_PATH: 'https://api.0x.org/swap/v0/quote',
+    // Asset data prefix of native (ERC20) orders. Same as `py/asset_data.py`.
+    ERC20_PROXY_ID: '0xf47261b0',
 };
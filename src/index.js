@@ -5,8 +5,8 @@ const _ = require('lodash');
 
 const {
     forever,
-    getRandomBracketValue,
-    getRandomQuotePair,
+    getQuoteParams,
+    loadSamplingPlan,
     LogWriter,
     parseURLSpec,
     randomHash,
@@ -15,7 +15,7 @@ const {
 } = require('./utils');
 const TOKENS = require('./tokens');
 const { fillBuyQuote, fillSellQuote } = require('./quotes');
-const { DELAY_STOPS, FILL_STOPS, LIVE_API_PATH } = require('./constants');
+const { LIVE_API_PATH } = require('./constants');
 
 const ARGV = yargs
     .option('output', {
@@ -52,12 +52,17 @@ const ARGV = yargs
         type: 'boolean',
         describe: 'only perform sells',
     })
+    .option('plan', {
+        type: 'string',
+        describe: 'sampling plan file written by py/sampling_plan.py',
+    })
     .option('jobs', {
         alias: 'j',
         type: 'number',
         default: 8,
         describe: 'number of jobs/quotes to run in parallel',
     }).argv;
+const PLAN = ARGV.plan ? loadSamplingPlan(ARGV.plan) : undefined;
 
 (async () => {
     if (ARGV.token.length < 2) {
@@ -80,33 +85,21 @@ const ARGV = yargs
 })();
 
 async function _fillSellQuote(logs) {
-    const [makerToken, takerToken] = getRandomQuotePair(ARGV.token, {
-        v0: ARGV.v0,
-    });
     const result = await fillSellQuote({
-        makerToken,
-        takerToken,
+        ...getQuoteParams(PLAN, 'sell', ARGV.token, { v0: ARGV.v0 }),
         id: randomHash(),
         apiPath: parseURLSpec(ARGV.url).url,
         apiId: parseURLSpec(ARGV.url).id,
-        swapValue: getRandomBracketValue(FILL_STOPS),
-        fillDelay: getRandomBracketValue(DELAY_STOPS),
     });
     await logs.writeObject(result);
 }
 
 async function _fillBuyQuote(logs) {
-    const [makerToken, takerToken] = getRandomQuotePair(ARGV.token, {
-        v0: ARGV.v0,
-    });
     const result = await fillBuyQuote({
-        makerToken,
-        takerToken,
+        ...getQuoteParams(PLAN, 'buy', ARGV.token, { v0: ARGV.v0 }),
         id: randomHash(),
         apiPath: parseURLSpec(ARGV.url).url,
         apiId: parseURLSpec(ARGV.url).id,
-        swapValue: getRandomBracketValue(FILL_STOPS),
-        fillDelay: getRandomBracketValue(DELAY_STOPS),
     });
     await logs.writeObject(result);
 }
@@ -27,6 +27,7 @@ const {
     createContractFromArtifactPath,
 } = require('./web3');
 const TOKENS = require('./tokens');
+const { ERC20_PROXY_ID } = require('./constants');
 const CONFIG = loadConfig();
 
 const ARTIFACTS = {
@@ -303,16 +304,16 @@ function printFillSummary(quote, success, result) {
     }
 }
 
+function isNativeOrder(order) {
+    return order.makerAssetData.startsWith(ERC20_PROXY_ID);
+}
+
 function doesQuoteHaveFallback(quote) {
-    const nativeOrders = quote.orders.filter((o) =>
-        /^0xf47261b0/.test(o.makerAssetData)
-    );
+    const nativeOrders = quote.orders.filter((o) => isNativeOrder(o));
     if (nativeOrders.length == 0) {
         return false;
     }
-    const bridgeOrders = quote.orders.filter(
-        (o) => !/^0xf47261b0/.test(o.makerAssetData)
-    );
+    const bridgeOrders = quote.orders.filter((o) => !isNativeOrder(o));
     if (quote.metadata.side === 'sell') {
         const totalBridgesTakerAssetAmount = BigNumber.sum(
             ...bridgeOrders.map((o) => o.takerAssetAmount)
@@ -165,6 +165,12 @@ const simulationResultEntity = new EntitySchema({
             unique: false,
             columns: ['simId'],
         },
+        {
+            // Lets `py/upload.py` skip results that are already loaded.
+            name: 'run_sim_url_index',
+            unique: true,
+            columns: ['runId', 'simId', 'url'],
+        },
     ],
 });
 
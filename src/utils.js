@@ -9,6 +9,7 @@ const moniker = require('moniker');
 const ethjs = require('ethereumjs-util');
 
 const TOKENS = require('./tokens');
+const { DELAY_STOPS, FILL_STOPS } = require('./constants');
 const CONFIG_PATH = path.resolve(__dirname, '../config.json');
 const CONFIG_TEMPLATE = {
     gst: '0x0000000000b3F879cb30FE243b4Dfee438691c04',
@@ -70,6 +71,40 @@ function getRandomBracketValue(stops) {
     return (max - min) * Math.random() + min;
 }
 
+function loadSamplingPlan(planPath) {
+    return JSON.parse(fs.readFileSync(planPath, 'utf-8'));
+}
+
+// Picks the tokens, swap value and fill delay of the next quote from a
+// weighted plan written by `py/sampling_plan.py`, or uniformly if there is no
+// plan (or it has no cells for `side` and `tokens`).
+function getQuoteParams(plan, side, tokens, opts = {}) {
+    const cells = (plan ? plan.cells : []).filter(
+        (c) =>
+            c.side === side &&
+            tokens.includes(c.makerToken) &&
+            tokens.includes(c.takerToken) &&
+            !(opts.v0 && c.makerToken === 'ETH')
+    );
+    if (cells.length === 0) {
+        const [makerToken, takerToken] = getRandomQuotePair(tokens, opts);
+        return {
+            makerToken,
+            takerToken,
+            swapValue: getRandomBracketValue(FILL_STOPS),
+            fillDelay: getRandomBracketValue(DELAY_STOPS),
+        };
+    }
+    let r = Math.random() * _.sumBy(cells, (c) => c.weight);
+    const cell = cells.find((c) => (r -= c.weight) <= 0) || _.last(cells);
+    return {
+        makerToken: cell.makerToken,
+        takerToken: cell.takerToken,
+        swapValue: _.random(cell.minValue, cell.maxValue, true),
+        fillDelay: _.random(cell.minDelay, cell.maxDelay, true),
+    };
+}
+
 function toTokenWeis(token, units) {
     const base = new BigNumber(10).pow(TOKENS[token].decimals);
     return new BigNumber(units).times(base).integerValue();
@@ -231,6 +266,8 @@ module.exports = {
     forever,
     getRandomBracketValue,
     getRandomQuotePair,
+    getQuoteParams,
+    loadSamplingPlan,
     toTokenWeis,
     fromTokenWeis,
     LogWriter,